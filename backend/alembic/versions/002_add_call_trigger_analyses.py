@@ -0,0 +1,40 @@
+"""Add call_trigger_analyses table for persisted per-call trigger results
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('call_trigger_analyses',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('call_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('trigger_type', sa.String(length=50), nullable=False),
+        sa.Column('confidence', sa.Float(), nullable=True),
+        sa.Column('severity', sa.String(length=20), nullable=True),
+        sa.Column('match_count', sa.Integer(), nullable=True),
+        sa.Column('rank', sa.Integer(), nullable=True),
+        sa.Column('offsets', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['call_id'], ['calls.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_call_trigger_analyses_call_id', 'call_trigger_analyses', ['call_id'])
+    op.create_index('ix_call_trigger_analyses_trigger_type', 'call_trigger_analyses', ['trigger_type'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_call_trigger_analyses_trigger_type', table_name='call_trigger_analyses')
+    op.drop_index('ix_call_trigger_analyses_call_id', table_name='call_trigger_analyses')
+    op.drop_table('call_trigger_analyses')
@@ -0,0 +1,31 @@
+"""Record the trigger ruleset version behind each stored analysis
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('calls', sa.Column('trigger_ruleset_version', sa.String(length=16), nullable=True))
+    op.create_index('ix_calls_trigger_ruleset_version', 'calls', ['trigger_ruleset_version'])
+
+    op.add_column('call_trigger_analyses', sa.Column('ruleset_version', sa.String(length=16), nullable=True))
+    op.create_index('ix_call_trigger_analyses_ruleset_version', 'call_trigger_analyses', ['ruleset_version'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_call_trigger_analyses_ruleset_version', table_name='call_trigger_analyses')
+    op.drop_column('call_trigger_analyses', 'ruleset_version')
+
+    op.drop_index('ix_calls_trigger_ruleset_version', table_name='calls')
+    op.drop_column('calls', 'trigger_ruleset_version')
@@ -0,0 +1,43 @@
+"""Store trigger rulesets in the database so workers can hot-reload them
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('trigger_rulesets',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('version', sa.String(length=16), nullable=False),
+        sa.Column('patterns', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('recommendations', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.text('false')),
+        sa.Column('notes', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('activated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('version')
+    )
+    op.create_index('ix_trigger_rulesets_is_active', 'trigger_rulesets', ['is_active'])
+    # At most one ruleset can be active at a time
+    op.create_index(
+        'uq_trigger_rulesets_single_active', 'trigger_rulesets', ['is_active'],
+        unique=True, postgresql_where=sa.text('is_active')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_trigger_rulesets_single_active', table_name='trigger_rulesets')
+    op.drop_index('ix_trigger_rulesets_is_active', table_name='trigger_rulesets')
+    op.drop_table('trigger_rulesets')
@@ -0,0 +1,22 @@
+"""Index calls by patient and date for per-patient latest-call queries
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_calls_patient_id_call_date', 'calls', ['patient_id', 'call_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_calls_patient_id_call_date', table_name='calls')
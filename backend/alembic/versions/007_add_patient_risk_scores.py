@@ -0,0 +1,41 @@
+"""Add patient_risk_scores table of materialized per-patient abandonment risk
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('patient_risk_scores',
+        sa.Column('patient_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('risk_score', sa.Integer(), nullable=False),
+        sa.Column('risk_level', sa.String(length=20), nullable=False),
+        sa.Column('trigger_breakdown', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('trigger_count', sa.Integer(), nullable=True),
+        sa.Column('call_count', sa.Integer(), nullable=True),
+        sa.Column('last_call_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('patient_id')
+    )
+    # Keyset pagination over (risk_score desc, patient_id)
+    op.create_index(
+        'ix_patient_risk_scores_ranking', 'patient_risk_scores',
+        [sa.text('risk_score DESC'), 'patient_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_patient_risk_scores_ranking', table_name='patient_risk_scores')
+    op.drop_table('patient_risk_scores')
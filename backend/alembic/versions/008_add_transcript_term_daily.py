@@ -0,0 +1,35 @@
+"""Add transcript_term_daily rollup of transcript keyword counts
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('transcript_term_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('speaker', sa.String(length=20), nullable=False),
+        sa.Column('term', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('day', 'speaker', 'term')
+    )
+
+    op.add_column('calls', sa.Column('terms_counted', sa.Boolean(), nullable=False, server_default=sa.text('false')))
+    op.create_index('ix_calls_terms_pending', 'calls', ['id'], postgresql_where=sa.text('NOT terms_counted'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_calls_terms_pending', table_name='calls')
+    op.drop_column('calls', 'terms_counted')
+
+    op.drop_table('transcript_term_daily')
@@ -0,0 +1,59 @@
+"""Add competitor lexicon and per-call competitor mentions
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('competitor_drugs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('generic_name', sa.String(length=100), nullable=True),
+        sa.Column('aliases', postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.text('true')),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+
+    op.create_table('call_mentions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('call_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('drug_name', sa.String(length=100), nullable=False),
+        sa.Column('matched_text', sa.String(length=100), nullable=True),
+        sa.Column('start_offset', sa.Integer(), nullable=False),
+        sa.Column('end_offset', sa.Integer(), nullable=False),
+        sa.Column('speaker', sa.String(length=20), nullable=True),
+        sa.Column('lexicon_version', sa.String(length=16), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['call_id'], ['calls.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_call_mentions_call_id', 'call_mentions', ['call_id'])
+    op.create_index('ix_call_mentions_drug_name_call_id', 'call_mentions', ['drug_name', 'call_id'])
+
+    op.add_column('calls', sa.Column('mention_lexicon_version', sa.String(length=16), nullable=True))
+    op.create_index('ix_calls_mention_lexicon_version', 'calls', ['mention_lexicon_version'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_calls_mention_lexicon_version', table_name='calls')
+    op.drop_column('calls', 'mention_lexicon_version')
+
+    op.drop_index('ix_call_mentions_drug_name_call_id', table_name='call_mentions')
+    op.drop_index('ix_call_mentions_call_id', table_name='call_mentions')
+    op.drop_table('call_mentions')
+    op.drop_table('competitor_drugs')
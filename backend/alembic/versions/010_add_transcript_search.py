@@ -0,0 +1,39 @@
+"""Add a generated tsvector column on calls.transcript with a GIN index
+
+Adding a stored generated column rewrites the calls table once; the GIN index
+is then built concurrently so writes are not blocked while it builds.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('calls', sa.Column(
+        'transcript_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('english', coalesce(transcript, ''))", persisted=True),
+        nullable=True
+    ))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_calls_transcript_tsv', 'calls', ['transcript_tsv'],
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_calls_transcript_tsv', table_name='calls')
+    op.drop_column('calls', 'transcript_tsv')
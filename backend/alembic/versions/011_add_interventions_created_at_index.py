@@ -0,0 +1,22 @@
+"""Index interventions by creation time and type for outcome aggregates
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_interventions_created_at_type', 'interventions', ['created_at', 'intervention_type'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_interventions_created_at_type', table_name='interventions')
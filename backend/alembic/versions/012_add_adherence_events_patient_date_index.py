@@ -0,0 +1,22 @@
+"""Index adherence events by patient and date for survival analysis
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_adherence_events_patient_id_event_date', 'adherence_events', ['patient_id', 'event_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_adherence_events_patient_id_event_date', table_name='adherence_events')
@@ -1,17 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, and_, or_
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from collections import Counter
-import re
-import os
+import asyncio
+import json
 from pydantic import BaseModel
-from openai import OpenAI
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.models import Call, Patient, GeographicProfile
-from app.services.trigger_detection import detect_triggers_in_transcript
+from app.models import Call, Patient, GeographicProfile, CallTriggerAnalysis, TranscriptTermDaily, CallMention
+from app.services.competitor_mentions import get_competitor_matcher, replace_competitor_lexicon
+from app.services.llm_gateway import LLMNotConfiguredError, get_llm_gateway
+from app.services.time_buckets import TimeBuckets
+from app.services.topic_classifier import get_topic_classifier
+from app.services.transcript_terms import ALL_SPEAKERS
+from app.services.trigger_detection import get_ruleset_version, get_trigger_matcher
+from app.services.query_cache import query_cache
 
 router = APIRouter()
 
@@ -22,38 +28,35 @@ class WebsiteAnalysisRequest(BaseModel):
     total_words: int
 
 
-class TopicDistribution(BaseModel):
+class WebsiteBatchSite(BaseModel):
     name: str
-    percentage: float
+    website_contents: List[str]
 
 
-class WebsiteAnalysisResponse(BaseModel):
-    topics: List[TopicDistribution]
-    total_words: int
+class WebsiteBatchRequest(BaseModel):
+    sites: List[WebsiteBatchSite]
+    max_concurrency: Optional[int] = None
 
 
-def extract_keywords_from_transcripts(transcripts: List[str], min_length: int = 4) -> Dict[str, int]:
-    """Extract and count keywords from transcripts"""
-    # Common words to exclude
-    stop_words = {
-        'the', 'and', 'for', 'that', 'this', 'with', 'from', 'have', 'has',
-        'will', 'can', 'about', 'just', 'like', 'know', 'what', 'when', 'where',
-        'would', 'could', 'should', 'your', 'you', 'are', 'was', 'were', 'been',
-        'being', 'they', 'them', 'their', 'there', 'here', 'than', 'then', 'these',
-        'those', 'said', 'says', 'okay', 'yeah', 'yes', 'well', 'want', 'need'
-    }
+class CompetitorEntry(BaseModel):
+    name: str
+    generic_name: Optional[str] = None
+    aliases: List[str] = []
+    is_active: bool = True
+
+
+class CompetitorLexiconRequest(BaseModel):
+    competitors: List[CompetitorEntry]
 
-    all_words = []
-    for transcript in transcripts:
-        # Extract words
-        words = re.findall(r'\b[a-z]{' + str(min_length) + r',}\b', transcript.lower())
-        all_words.extend([w for w in words if w not in stop_words])
 
-    # Count occurrences
-    word_counts = Counter(all_words)
+class TopicDistribution(BaseModel):
+    name: str
+    percentage: float
+
 
-    # Return top 100
-    return dict(word_counts.most_common(100))
+class WebsiteAnalysisResponse(BaseModel):
+    topics: List[TopicDistribution]
+    total_words: int
 
 
 @router.get("/patient-voice-themes")
@@ -61,10 +64,15 @@ def get_patient_voice_themes(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     min_frequency: int = 3,
+    speaker: Optional[str] = None,
     db: Session = Depends(get_db)
 ) -> Dict:
     """
     Extract patient voice themes from call transcripts for word cloud visualization
+
+    Counts come from the transcript_term_daily rollup, so the range is taken in
+    whole (UTC) days and counts are exact. Pass speaker=patient to ignore the
+    agent's own lines.
     """
     # Parse dates
     if start_date:
@@ -77,23 +85,14 @@ def get_patient_voice_themes(
     else:
         end = datetime.utcnow()
 
-    # Get calls with transcripts
-    calls = db.query(Call).filter(
-        Call.call_date >= start,
-        Call.call_date <= end,
-        Call.transcript.isnot(None)
-    ).all()
-
-    transcripts = [call.transcript for call in calls if call.transcript]
-
-    # Extract keywords
-    keywords = extract_keywords_from_transcripts(transcripts)
+    start_day = start.date()
+    end_day = end.date()
 
-    # Filter by minimum frequency
-    filtered_keywords = {
-        word: count for word, count in keywords.items()
-        if count >= min_frequency
-    }
+    total_calls = db.query(func.count(Call.id)).filter(
+        Call.call_date >= datetime.combine(start_day, datetime.min.time()),
+        Call.call_date < datetime.combine(end_day + timedelta(days=1), datetime.min.time()),
+        Call.transcript.isnot(None)
+    ).scalar() or 0
 
     # Categorize keywords by theme
     themes = {
@@ -103,22 +102,50 @@ def get_patient_voice_themes(
         "concerns": ["worried", "concerned", "afraid", "scared", "anxiety", "nervous", "side", "effect", "reaction"],
         "support": ["help", "support", "assistance", "program", "enroll", "eligibility", "qualify"],
     }
+    theme_words = [word for words in themes.values() for word in words]
+
+    # Term totals over the requested days, aggregated once for both the top 50 and the themes
+    term_totals = db.query(
+        TranscriptTermDaily.term.label("term"),
+        func.sum(TranscriptTermDaily.count).label("total")
+    ).filter(
+        TranscriptTermDaily.day >= start_day,
+        TranscriptTermDaily.day <= end_day,
+        TranscriptTermDaily.speaker == (speaker or ALL_SPEAKERS)
+    ).group_by(TranscriptTermDaily.term).having(
+        func.sum(TranscriptTermDaily.count) >= min_frequency
+    ).subquery()
+
+    ranked_terms = db.query(
+        term_totals.c.term,
+        term_totals.c.total,
+        func.count().over().label("term_count"),
+        func.row_number().over(order_by=(term_totals.c.total.desc(), term_totals.c.term)).label("term_rank")
+    ).subquery()
+
+    rows = db.query(ranked_terms).filter(
+        or_(ranked_terms.c.term_rank <= 50, ranked_terms.c.term.in_(theme_words))
+    ).order_by(ranked_terms.c.term_rank).all()
+
+    total_keywords = rows[0].term_count if rows else 0
+    top_keywords = {row.term: int(row.total) for row in rows if row.term_rank <= 50}
+    theme_counts = {row.term: int(row.total) for row in rows}
 
     categorized = {}
-    for theme, theme_words in themes.items():
+    for theme, words in themes.items():
         categorized[theme] = {}
-        for word in theme_words:
-            if word in filtered_keywords:
-                categorized[theme][word] = filtered_keywords[word]
+        for word in words:
+            if word in theme_counts:
+                categorized[theme][word] = theme_counts[word]
 
     return {
         "date_range": {
             "start": start.isoformat(),
             "end": end.isoformat(),
         },
-        "total_calls_analyzed": len(calls),
-        "total_keywords": len(filtered_keywords),
-        "top_keywords": dict(sorted(filtered_keywords.items(), key=lambda x: x[1], reverse=True)[:50]),
+        "total_calls_analyzed": total_calls,
+        "total_keywords": total_keywords,
+        "top_keywords": top_keywords,
         "categorized_themes": categorized,
     }
 
@@ -132,6 +159,10 @@ def get_barrier_trends(
 ) -> Dict:
     """
     Get trending data on barriers over time
+
+    interval is a calendar unit (day, week, month, quarter, year) or a fixed
+    length such as "6 hours" or "3d". Buckets are assigned in SQL over stored
+    trigger results, so the whole trend is one grouped query.
     """
     # Parse dates
     if start_date:
@@ -144,67 +175,49 @@ def get_barrier_trends(
     else:
         end = datetime.utcnow()
 
-    # Get all calls
-    calls = db.query(Call).filter(
+    try:
+        buckets = TimeBuckets(interval, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    trigger_types = list(get_trigger_matcher().patterns)
+
+    # Per-bucket call and trigger counts; trigger type columns are labelled by
+    # position since type names come from user-defined rulesets
+    bucket = buckets.bucket(Call.call_date).label("bucket")
+    counts = db.query(
+        bucket,
+        func.count(func.distinct(Call.id)).label("total_calls"),
+        *[
+            func.count(CallTriggerAnalysis.id).filter(
+                CallTriggerAnalysis.trigger_type == trigger_type
+            ).label(f"t{index}")
+            for index, trigger_type in enumerate(trigger_types)
+        ]
+    ).outerjoin(
+        CallTriggerAnalysis, CallTriggerAnalysis.call_id == Call.id
+    ).filter(
         Call.call_date >= start,
         Call.call_date <= end,
         Call.transcript.isnot(None)
-    ).order_by(Call.call_date).all()
-
-    # Group by time interval
-    if interval == "day":
-        delta = timedelta(days=1)
-    elif interval == "week":
-        delta = timedelta(weeks=1)
-    else:  # month
-        delta = timedelta(days=30)
-
-    # Create time buckets
-    time_series = {}
-    current = start
-    while current <= end:
-        time_series[current.isoformat()] = {
-            "cost_concern": 0,
-            "injection_anxiety": 0,
-            "side_effect_fear": 0,
-            "insurance_denial": 0,
-            "access_barrier": 0,
-            "complexity_concern": 0,
-            "total_calls": 0,
-        }
-        current += delta
-
-    # Analyze calls and bin by time
-    for call in calls:
-        if not call.call_date or not call.transcript:
-            continue
-
-        # Find appropriate time bucket
-        bucket_date = start
-        while bucket_date <= call.call_date:
-            next_bucket = bucket_date + delta
-            if call.call_date < next_bucket:
-                break
-            bucket_date = next_bucket
-
-        bucket_key = bucket_date.isoformat()
-        if bucket_key in time_series:
-            time_series[bucket_key]["total_calls"] += 1
-
-            # Detect triggers
-            triggers = detect_triggers_in_transcript(call.transcript)
-            for trigger in triggers:
-                trigger_type = trigger["trigger_type"]
-                if trigger_type in time_series[bucket_key]:
-                    time_series[bucket_key][trigger_type] += 1
-
-    # Convert to list format
+    ).group_by(bucket).subquery()
+
+    # Every bucket in the range, including empty ones
+    series = buckets.series()
+    rows = db.query(
+        series.c.bucket,
+        func.coalesce(counts.c.total_calls, 0),
+        *[func.coalesce(counts.c[f"t{index}"], 0) for index in range(len(trigger_types))]
+    ).outerjoin(counts, counts.c.bucket == series.c.bucket).order_by(series.c.bucket).all()
+
+    # Fixed keys last, so a trigger type can't overwrite them
     trend_data = [
         {
-            "date": date,
-            **values
+            **dict(zip(trigger_types, row[2:])),
+            "date": row[0].isoformat(),
+            "total_calls": row[1],
         }
-        for date, values in sorted(time_series.items())
+        for row in rows
     ]
 
     return {
@@ -217,54 +230,68 @@ def get_barrier_trends(
     }
 
 
-@router.get("/geographic-insights")
-def get_geographic_insights(
-    db: Session = Depends(get_db)
+# Trigger types that feed the estimated abandonment rate of a state
+GEOGRAPHIC_TRIGGER_TYPES = ["cost_concern", "injection_anxiety", "side_effect_fear", "insurance_denial"]
+
+
+def _compute_geographic_insights(
+    db: Session,
+    start: Optional[datetime],
+    end: Optional[datetime]
 ) -> Dict:
-    """
-    Get geographic distribution of barriers and abandonment risk
-    """
-    # Get all patients with their states
-    patient_states = db.query(
-        Patient.state,
-        func.count(Patient.id).label('patient_count'),
-        func.avg(Patient.sdoh_risk_score).label('avg_sdoh_risk')
+    call_filters = [Call.transcript.isnot(None)]
+    if start:
+        call_filters.append(Call.call_date >= start)
+    if end:
+        call_filters.append(Call.call_date <= end)
+
+    # Patients per state
+    patient_stats = db.query(
+        Patient.state.label("state"),
+        func.count(Patient.id).label("patient_count"),
+        func.avg(Patient.sdoh_risk_score).label("avg_sdoh_risk")
     ).filter(
         Patient.state.isnot(None)
-    ).group_by(Patient.state).all()
+    ).group_by(Patient.state).subquery()
+
+    # Calls and stored triggers per state; trigger columns are labelled by position
+    call_stats = db.query(
+        Patient.state.label("state"),
+        func.count(func.distinct(Call.id)).label("call_count"),
+        *[
+            func.count(CallTriggerAnalysis.id).filter(
+                CallTriggerAnalysis.trigger_type == trigger_type
+            ).label(f"t{index}")
+            for index, trigger_type in enumerate(GEOGRAPHIC_TRIGGER_TYPES)
+        ]
+    ).select_from(Call).join(
+        Patient, Patient.id == Call.patient_id
+    ).outerjoin(
+        CallTriggerAnalysis, CallTriggerAnalysis.call_id == Call.id
+    ).filter(
+        Patient.state.isnot(None),
+        *call_filters
+    ).group_by(Patient.state).subquery()
+
+    rows = db.query(
+        patient_stats.c.state,
+        patient_stats.c.patient_count,
+        patient_stats.c.avg_sdoh_risk,
+        func.coalesce(call_stats.c.call_count, 0),
+        *[func.coalesce(call_stats.c[f"t{index}"], 0) for index in range(len(GEOGRAPHIC_TRIGGER_TYPES))]
+    ).outerjoin(call_stats, call_stats.c.state == patient_stats.c.state).all()
 
-    # Get calls by state
     state_data = {}
-    for state, patient_count, avg_sdoh in patient_states:
-        # Get calls for patients in this state
-        calls = db.query(Call).join(Patient).filter(
-            Patient.state == state,
-            Call.transcript.isnot(None)
-        ).all()
-
-        # Analyze triggers
-        trigger_counts = {
-            "cost_concern": 0,
-            "injection_anxiety": 0,
-            "side_effect_fear": 0,
-            "insurance_denial": 0,
-        }
-
-        for call in calls:
-            if call.transcript:
-                triggers = detect_triggers_in_transcript(call.transcript)
-                for trigger in triggers:
-                    trigger_type = trigger["trigger_type"]
-                    if trigger_type in trigger_counts:
-                        trigger_counts[trigger_type] += 1
+    for state, patient_count, avg_sdoh, call_count, *type_counts in rows:
+        trigger_counts = dict(zip(GEOGRAPHIC_TRIGGER_TYPES, type_counts))
 
         total_triggers = sum(trigger_counts.values())
-        abandonment_rate = (total_triggers / len(calls) * 20) if calls else 0  # Rough estimate
+        abandonment_rate = (total_triggers / call_count * 20) if call_count else 0  # Rough estimate
 
         state_data[state] = {
             "patient_count": patient_count,
             "avg_sdoh_risk": round(float(avg_sdoh) if avg_sdoh else 0, 1),
-            "call_count": len(calls),
+            "call_count": call_count,
             "trigger_breakdown": trigger_counts,
             "total_triggers": total_triggers,
             "estimated_abandonment_rate": round(min(abandonment_rate, 100), 1),
@@ -277,140 +304,133 @@ def get_geographic_insights(
             for state, data in state_data.items()
             if data["estimated_abandonment_rate"] >= 30
         ],
-        key=lambda x: x["estimated_abandonment_rate"],
-        reverse=True
+        key=lambda x: (-x["estimated_abandonment_rate"], x["state"])
     )
 
     return {
+        "date_range": {
+            "start": start.isoformat() if start else None,
+            "end": end.isoformat() if end else None,
+        },
         "state_breakdown": state_data,
         "total_states": len(state_data),
         "hotspots": hotspots[:10],  # Top 10 high-risk states
     }
 
 
+@router.get("/geographic-insights")
+def get_geographic_insights(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Get geographic distribution of barriers and abandonment risk
+
+    Calls can be limited to a date window (all calls by default). The per-state
+    breakdown is one aggregate query over stored trigger results, cached per
+    window for a few minutes.
+    """
+    start = datetime.fromisoformat(start_date) if start_date else None
+    end = datetime.fromisoformat(end_date) if end_date else None
+
+    key = query_cache.make_key(
+        "geographic-insights",
+        start=start,
+        end=end,
+        ruleset_version=get_ruleset_version(),
+    )
+    return query_cache.get_or_compute(key, lambda: _compute_geographic_insights(db, start, end))
+
+
+ANALYSIS_MODES = ("fast", "llm", "hybrid")
+
+
 @router.post("/analyze-marketing-content")
-async def analyze_marketing_content(request: WebsiteAnalysisRequest) -> WebsiteAnalysisResponse:
+async def analyze_marketing_content(request: WebsiteAnalysisRequest, mode: str = "llm") -> WebsiteAnalysisResponse:
     """
-    Analyze marketing website content using OpenAI to determine topic distribution
+    Analyze marketing website content to determine topic distribution
+
+    mode selects who does the analysis: "llm" asks OpenAI, "fast" uses the local
+    keyword classifier (no network, milliseconds), "hybrid" uses the classifier
+    and only asks OpenAI when its confidence is below TOPIC_CLASSIFIER_MIN_CONFIDENCE.
     """
-    try:
-        # Get OpenAI API key from environment
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(ANALYSIS_MODES)}")
+
+    analysis_data = None
+    if mode in ("fast", "hybrid"):
+        analysis_data = get_topic_classifier().classify(request.website_contents, request.total_words)
+        if mode == "hybrid" and analysis_data["confidence"] < settings.TOPIC_CLASSIFIER_MIN_CONFIDENCE:
+            analysis_data = None
+
+    if analysis_data is None:
+        try:
+            analysis_data = await get_llm_gateway().analyze_marketing_content(
+                request.website_contents, request.total_words
+            )
+        except LLMNotConfiguredError:
             raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error analyzing content: {str(e)}")
 
-        # Initialize OpenAI client
-        client = OpenAI(api_key=api_key)
-
-        # Define patient barriers - these are the categories we want OpenAI to analyze
-        patient_barriers = [
-            {'name': 'Cost & Insurance Support', 'keywords': 'affordability, cost, pricing, insurance, copay, financial assistance, patient assistance programs'},
-            {'name': 'Injection Support & Training', 'keywords': 'injection, self-administration, needle anxiety, injection training, how to inject'},
-            {'name': 'Side Effects Management', 'keywords': 'side effects, adverse events, safety, tolerability, what to expect'},
-            {'name': 'Access & Logistics', 'keywords': 'access, availability, delivery, logistics, pharmacy, specialty pharmacy'},
-            {'name': 'Efficacy & Clinical Results', 'keywords': 'efficacy, effectiveness, clinical trials, results, outcomes, benefits'},
-            {'name': 'Dosing & Convenience', 'keywords': 'dosing, dosing schedule, convenience, frequency, administration'}
-        ]
+    return WebsiteAnalysisResponse(
+        topics=[TopicDistribution(**topic) for topic in analysis_data["topics"]],
+        total_words=analysis_data["total_words"]
+    )
 
-        # Build the prompt
-        prompt = f"""You are analyzing pharmaceutical website content. Determine what percentage of the content focuses on each category below.
-
-CRITICAL INSTRUCTIONS:
-1. Read the website content VERY carefully
-2. The percentages MUST add up to approximately 100%
-3. If a category is not mentioned AT ALL, use 0%
-4. Be REALISTIC - don't inflate numbers
-
-CATEGORIES TO ANALYZE:
-
-1. Cost & Insurance Support ({patient_barriers[0]['keywords']})
-   - Look for: patient assistance programs, copay cards, financial help, eligibility for assistance, affordability programs, insurance coverage, cost reduction, "cares" programs, application for financial aid
-   - If the website is primarily about applying for financial assistance or a patient assistance program, this should be 80-90%
-
-2. Injection Support & Training ({patient_barriers[1]['keywords']})
-   - Look for: how to inject, injection techniques, self-administration guides, overcoming fear of needles, injection tutorials
-
-3. Side Effects Management ({patient_barriers[2]['keywords']})
-   - Look for: managing side effects, what to expect, adverse events, safety information, dealing with reactions
-
-4. Access & Logistics ({patient_barriers[3]['keywords']})
-   - Look for: where to get medication, pharmacy information, delivery, prescription fulfillment
-
-5. Efficacy & Clinical Results ({patient_barriers[4]['keywords']})
-   - Look for: how well the drug works, clinical trial data, effectiveness, treatment outcomes, scientific evidence
-
-6. Dosing & Convenience ({patient_barriers[5]['keywords']})
-   - Look for: how often to take/inject, dosing schedule, treatment regimen
-
-WEBSITE CONTENT TO ANALYZE:
-{chr(10).join(request.website_contents)}
-
-EXAMPLES:
-- If website is a patient assistance program (e.g., "LillyCares", "JanssenCares"), use ~85% Cost Support
-- If website is about clinical trials/efficacy, use ~60-70% Efficacy
-- If website is an injection training portal, use ~70-80% Injection Support
-
-Return ONLY valid JSON (no other text):
-{{
-  "topics": [
-    {{"name": "Cost & Insurance Support", "percentage": 85}},
-    {{"name": "Injection Support & Training", "percentage": 0}},
-    {{"name": "Side Effects Management", "percentage": 5}},
-    {{"name": "Access & Logistics", "percentage": 10}},
-    {{"name": "Efficacy & Clinical Results", "percentage": 0}},
-    {{"name": "Dosing & Convenience", "percentage": 0}}
-  ],
-  "total_words": {request.total_words}
-}}"""
-
-        # Call OpenAI API
-        completion = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a marketing analyst that helps pharmaceutical companies understand how well their marketing aligns with patient needs. Always respond with valid JSON only."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
 
-        # Parse response
-        response_text = completion.choices[0].message.content
-        if not response_text:
-            raise HTTPException(status_code=500, detail="Empty response from OpenAI")
+@router.post("/analyze-marketing-content/batch")
+async def analyze_marketing_content_batch(request: WebsiteBatchRequest) -> StreamingResponse:
+    """
+    Analyze many websites, streaming one NDJSON line per site as it finishes
 
-        import json
-        analysis_data = json.loads(response_text)
+    Oversized sites are split into token-budgeted chunks whose topic percentages
+    are merged by word count. Model calls across the whole batch are limited to
+    max_concurrency (capped at LLM_MAX_CONCURRENCY).
+    """
+    gateway = get_llm_gateway()
+    if not request.sites:
+        raise HTTPException(status_code=400, detail="No sites to analyze")
+    if not gateway.backend.is_configured:
+        raise HTTPException(status_code=500, detail="OpenAI API key not configured")
 
-        # Convert to response model
-        topics = [
-            TopicDistribution(name=topic["name"], percentage=topic["percentage"])
-            for topic in analysis_data.get("topics", [])
-        ]
+    concurrency = min(request.max_concurrency or settings.LLM_MAX_CONCURRENCY, settings.LLM_MAX_CONCURRENCY)
 
-        return WebsiteAnalysisResponse(
-            topics=topics,
-            total_words=analysis_data.get("total_words", request.total_words)
-        )
+    async def stream():
+        semaphore = asyncio.Semaphore(max(1, concurrency))
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error analyzing content: {str(e)}")
+        async def analyze(index: int, site: WebsiteBatchSite) -> Dict:
+            try:
+                analysis = await gateway.analyze_website(site.website_contents, semaphore)
+                return {"index": index, "name": site.name, **analysis}
+            except Exception as e:
+                return {"index": index, "name": site.name, "error": f"Error analyzing content: {str(e)}"}
+
+        tasks = [asyncio.create_task(analyze(index, site)) for index, site in enumerate(request.sites)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished) + "\n"
+        finally:
+            # Client went away: stop spending model calls on the rest
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @router.get("/competitor-mentions")
 def get_competitor_mentions(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    speaker: Optional[str] = None,
     db: Session = Depends(get_db)
 ) -> Dict:
     """
     Extract mentions of competitor drugs from call transcripts
+
+    Counts and example contexts come from mentions stored at ingest. Pass
+    speaker=patient to only count mentions made by the patient.
     """
     # Parse dates
     if start_date:
@@ -423,63 +443,83 @@ def get_competitor_mentions(
     else:
         end = datetime.utcnow()
 
-    # Common competitor drugs (mock data - would be configurable in production)
-    competitors = [
-        "humira", "enbrel", "remicade", "stelara", "cosentyx",
-        "taltz", "skyrizi", "rinvoq", "xeljanz", "otezla"
-    ]
-
-    # Get calls
-    calls = db.query(Call).filter(
+    in_range = and_(
         Call.call_date >= start,
         Call.call_date <= end,
         Call.transcript.isnot(None)
-    ).all()
+    )
+    mention_filters = [in_range]
+    if speaker:
+        mention_filters.append(CallMention.speaker == speaker)
+
+    total_calls = db.query(func.count(Call.id)).filter(in_range).scalar() or 0
+
+    # Calls mentioning each drug, and all of its mentions
+    counts = db.query(
+        CallMention.drug_name,
+        func.count(func.distinct(CallMention.call_id)),
+        func.count(CallMention.id)
+    ).join(Call, Call.id == CallMention.call_id).filter(
+        *mention_filters
+    ).group_by(CallMention.drug_name).all()
+
+    # First mention row in each call (both offsets from that row), then the earliest 3 calls per drug
+    first_mentions = db.query(
+        CallMention.drug_name.label("drug_name"),
+        CallMention.call_id.label("call_id"),
+        Call.call_date.label("call_date"),
+        CallMention.start_offset.label("start_offset"),
+        (CallMention.end_offset - CallMention.start_offset).label("length"),
+    ).join(Call, Call.id == CallMention.call_id).filter(
+        *mention_filters
+    ).distinct(
+        CallMention.drug_name, CallMention.call_id
+    ).order_by(
+        CallMention.drug_name, CallMention.call_id, CallMention.start_offset, CallMention.id
+    ).subquery()
+
+    ranked = db.query(
+        first_mentions,
+        func.row_number().over(
+            partition_by=first_mentions.c.drug_name,
+            order_by=(first_mentions.c.call_date, first_mentions.c.call_id)
+        ).label("example_rank")
+    ).subquery()
+
+    context_start = func.greatest(ranked.c.start_offset - 75, 0)
+    examples = db.query(
+        ranked.c.drug_name,
+        ranked.c.call_id,
+        ranked.c.call_date,
+        func.substr(
+            Call.transcript,
+            context_start + 1,
+            ranked.c.start_offset + ranked.c.length + 75 - context_start
+        )
+    ).join(Call, Call.id == ranked.c.call_id).filter(
+        ranked.c.example_rank <= 3  # Keep up to 3 examples
+    ).order_by(ranked.c.drug_name, ranked.c.example_rank).all()
 
-    competitor_counts = {}
     competitor_contexts = {}
-
-    for competitor in competitors:
-        competitor_counts[competitor] = 0
-        competitor_contexts[competitor] = []
-
-    # Search transcripts
-    for call in calls:
-        if not call.transcript:
-            continue
-
-        transcript_lower = call.transcript.lower()
-
-        for competitor in competitors:
-            if competitor in transcript_lower:
-                competitor_counts[competitor] += 1
-
-                # Extract context
-                index = transcript_lower.find(competitor)
-                start_idx = max(0, index - 75)
-                end_idx = min(len(call.transcript), index + len(competitor) + 75)
-                context = call.transcript[start_idx:end_idx].strip()
-
-                if len(competitor_contexts[competitor]) < 3:  # Keep up to 3 examples
-                    competitor_contexts[competitor].append({
-                        "call_id": str(call.id),
-                        "context": context,
-                        "date": call.call_date.isoformat() if call.call_date else None,
-                    })
+    for drug_name, call_id, call_date, context in examples:
+        competitor_contexts.setdefault(drug_name, []).append({
+            "call_id": str(call_id),
+            "context": context.strip(),
+            "date": call_date.isoformat() if call_date else None,
+        })
 
     # Sort by mention count
     sorted_competitors = sorted(
         [
             {
-                "drug_name": comp,
-                "mention_count": count,
-                "example_contexts": competitor_contexts[comp],
+                "drug_name": drug_name,
+                "mention_count": call_count,
+                "total_mentions": mention_count,
+                "example_contexts": competitor_contexts.get(drug_name, []),
             }
-            for comp, count in competitor_counts.items()
-            if count > 0
+            for drug_name, call_count, mention_count in counts
         ],
-        key=lambda x: x["mention_count"],
-        reverse=True
+        key=lambda x: (-x["mention_count"], x["drug_name"])
     )
 
     return {
@@ -487,7 +527,45 @@ def get_competitor_mentions(
             "start": start.isoformat(),
             "end": end.isoformat(),
         },
-        "total_calls_analyzed": len(calls),
+        "total_calls_analyzed": total_calls,
         "competitor_mentions": sorted_competitors,
-        "total_mentions": sum(competitor_counts.values()),
+        "total_mentions": sum(call_count for _, call_count, _ in counts),
+    }
+
+
+@router.get("/competitors")
+def get_competitors(db: Session = Depends(get_db)) -> Dict:
+    """
+    Get the competitor lexicon used for mention extraction
+    """
+    matcher = get_competitor_matcher(db, refresh=True)
+
+    return {
+        "lexicon_version": matcher.version,
+        "competitors": [
+            {"name": name, "aliases": aliases}
+            for name, aliases in sorted(matcher.lexicon.items())
+        ],
+    }
+
+
+@router.put("/competitors")
+def update_competitors(
+    request: CompetitorLexiconRequest,
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Replace the competitor lexicon
+
+    New calls use it right away; run the backfill-mentions command to re-scan
+    calls stored under the previous lexicon.
+    """
+    try:
+        matcher = replace_competitor_lexicon(db, [competitor.dict() for competitor in request.competitors])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "lexicon_version": matcher.version,
+        "competitor_count": len(matcher.lexicon),
     }
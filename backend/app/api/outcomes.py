@@ -1,14 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from uuid import UUID
-import random
+from pydantic import BaseModel
+
+import numpy as np
 
 from app.core.database import get_db
-from app.models import Call, Patient, Intervention, AdherenceEvent
-from app.schemas.intervention import InterventionResponse
+from app.services.cohort_analysis import DEFAULT_RESAMPLES, cohort_analysis
+from app.services.intervention_outcomes import intervention_effectiveness
+from app.services.query_cache import query_cache
+from app.services.roi_sensitivity import SWEEP_PARAMETERS, roi_metrics, roi_sensitivity
+from app.services.survival import (
+    MAX_TIME_POINTS, evaluate_curve, median_survival, survival_counts, survival_curves
+)
 
 router = APIRouter()
 
@@ -23,149 +28,29 @@ def get_intervention_effectiveness(
     Calculate effectiveness of different intervention types
     Returns comparison of outcomes for patients who received interventions vs those who didn't
     """
-    # Parse dates
-    if start_date:
-        start = datetime.fromisoformat(start_date)
-    else:
-        start = datetime.utcnow() - timedelta(days=90)
+    # Default window ends at the next whole hour, so repeated default requests share a cache key
+    next_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
 
+    # Parse dates
     if end_date:
         end = datetime.fromisoformat(end_date)
     else:
-        end = datetime.utcnow()
-
-    # Get all interventions in date range
-    interventions = db.query(Intervention).filter(
-        Intervention.created_at >= start,
-        Intervention.created_at <= end
-    ).all()
-
-    # Mock data for demonstration (in production, this would come from actual adherence tracking)
-    intervention_stats = {
-        "copay_enrollment": {
-            "total_interventions": 0,
-            "patients_with_intervention": set(),
-            "adherence_with": [],
-            "adherence_without": [],
-            "avg_cost_per_intervention": 45,
-        },
-        "nurse_callback": {
-            "total_interventions": 0,
-            "patients_with_intervention": set(),
-            "adherence_with": [],
-            "adherence_without": [],
-            "avg_cost_per_intervention": 75,
-        },
-        "educational_material": {
-            "total_interventions": 0,
-            "patients_with_intervention": set(),
-            "adherence_with": [],
-            "adherence_without": [],
-            "avg_cost_per_intervention": 15,
-        },
-        "prior_auth_support": {
-            "total_interventions": 0,
-            "patients_with_intervention": set(),
-            "adherence_with": [],
-            "adherence_without": [],
-            "avg_cost_per_intervention": 120,
-        },
-        "home_delivery": {
-            "total_interventions": 0,
-            "patients_with_intervention": set(),
-            "adherence_with": [],
-            "adherence_without": [],
-            "avg_cost_per_intervention": 25,
-        },
-    }
+        end = next_hour
 
-    # Process interventions
-    for intervention in interventions:
-        intervention_type = intervention.intervention_type
-        if intervention_type in intervention_stats:
-            intervention_stats[intervention_type]["total_interventions"] += 1
-            intervention_stats[intervention_type]["patients_with_intervention"].add(
-                intervention.patient_id
-            )
-
-            # Mock adherence data (in production, would query actual adherence events)
-            if intervention.adherence_90_day is not None:
-                adherence = intervention.adherence_90_day
-            else:
-                # Simulate adherence based on intervention type (higher for more effective interventions)
-                adherence_rates = {
-                    "copay_enrollment": 0.75,
-                    "nurse_callback": 0.70,
-                    "educational_material": 0.55,
-                    "prior_auth_support": 0.78,
-                    "home_delivery": 0.68,
-                }
-                adherence = random.random() < adherence_rates.get(intervention_type, 0.60)
-
-            intervention_stats[intervention_type]["adherence_with"].append(adherence)
-
-    # Generate comparison data (patients without intervention - mock)
-    for intervention_type in intervention_stats:
-        # Simulate control group (lower adherence rates)
-        control_adherence_rate = 0.45  # Base adherence rate without intervention
-        num_control = intervention_stats[intervention_type]["total_interventions"]
-
-        for _ in range(num_control):
-            adherent = random.random() < control_adherence_rate
-            intervention_stats[intervention_type]["adherence_without"].append(adherent)
-
-    # Calculate statistics
-    results = []
-    for intervention_type, stats in intervention_stats.items():
-        if stats["total_interventions"] > 0:
-            adherence_with = stats["adherence_with"]
-            adherence_without = stats["adherence_without"]
-
-            adherence_rate_with = (sum(adherence_with) / len(adherence_with) * 100) if adherence_with else 0
-            adherence_rate_without = (sum(adherence_without) / len(adherence_without) * 100) if adherence_without else 45
-
-            improvement = adherence_rate_with - adherence_rate_without
-
-            # Calculate ROI (mock - assumes $150k annual revenue per adherent patient)
-            revenue_per_patient = 150000
-            patients_retained = (len(adherence_with) * (adherence_rate_with / 100)) - (len(adherence_with) * (adherence_rate_without / 100))
-            revenue_saved = patients_retained * revenue_per_patient
-            cost = len(adherence_with) * stats["avg_cost_per_intervention"]
-            roi = ((revenue_saved - cost) / cost * 100) if cost > 0 else 0
-
-            results.append({
-                "intervention_type": intervention_type,
-                "total_interventions": stats["total_interventions"],
-                "unique_patients": len(stats["patients_with_intervention"]),
-                "adherence_rate_with_intervention": round(adherence_rate_with, 1),
-                "adherence_rate_without_intervention": round(adherence_rate_without, 1),
-                "improvement_percentage": round(improvement, 1),
-                "patients_retained": round(patients_retained, 1),
-                "revenue_saved": round(revenue_saved, 2),
-                "total_cost": round(cost, 2),
-                "roi_percentage": round(roi, 1),
-                "cost_per_intervention": stats["avg_cost_per_intervention"],
-            })
-
-    # Sort by improvement
-    results.sort(key=lambda x: x["improvement_percentage"], reverse=True)
-
-    total_revenue_saved = sum(r["revenue_saved"] for r in results)
-    total_cost = sum(r["total_cost"] for r in results)
-    total_interventions = sum(r["total_interventions"] for r in results)
+    if start_date:
+        start = datetime.fromisoformat(start_date)
+    else:
+        start = next_hour - timedelta(days=90)
+
+    key = query_cache.make_key("intervention-effectiveness", start=start, end=end)
+    effectiveness = query_cache.get_or_compute(key, lambda: intervention_effectiveness(db, start, end))
 
     return {
         "date_range": {
             "start": start.isoformat(),
             "end": end.isoformat(),
         },
-        "summary": {
-            "total_interventions": total_interventions,
-            "total_revenue_saved": round(total_revenue_saved, 2),
-            "total_cost": round(total_cost, 2),
-            "overall_roi": round(((total_revenue_saved - total_cost) / total_cost * 100) if total_cost > 0 else 0, 1),
-        },
-        "by_intervention_type": results,
+        **effectiveness,
     }
 
 
@@ -173,70 +58,40 @@ def get_intervention_effectiveness(
 def get_cohort_analysis(
     trigger_type: Optional[str] = None,
     intervention_type: Optional[str] = None,
+    state: Optional[str] = None,
+    insurance_type: Optional[str] = None,
+    journey_stage: Optional[str] = None,
+    stratify_by: Optional[str] = None,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
     db: Session = Depends(get_db)
 ) -> Dict:
     """
     Perform cohort analysis comparing patients with different triggers/interventions
-    """
-    # Get interventions
-    query = db.query(Intervention)
-
-    if trigger_type:
-        query = query.filter(Intervention.trigger_type == trigger_type)
-
-    if intervention_type:
-        query = query.filter(Intervention.intervention_type == intervention_type)
 
-    interventions = query.all()
-
-    if not interventions:
-        return {
-            "trigger_type": trigger_type,
-            "intervention_type": intervention_type,
-            "cohort_size": 0,
-            "cohorts": [],
-        }
-
-    # Group by intervention applied vs not applied
-    cohorts = {
-        "intervention_applied": [],
-        "intervention_not_applied": [],
+    Filters take comma-separated values; stratify_by is a comma-separated list of
+    trigger_type, intervention_type, state, insurance_type and journey_stage. Each
+    stratum compares applied vs not-applied adherence with a bootstrap CI.
+    """
+    def split(value: Optional[str]) -> Optional[List[str]]:
+        return value.split(",") if value else None
+
+    filters = {
+        "trigger_type": split(trigger_type),
+        "intervention_type": split(intervention_type),
+        "state": split(state),
+        "insurance_type": split(insurance_type),
+        "journey_stage": split(journey_stage),
     }
-
-    for intervention in interventions:
-        cohort_key = "intervention_applied" if intervention.intervention_applied else "intervention_not_applied"
-
-        # Mock adherence (in production, would query actual data)
-        if intervention.adherence_90_day is not None:
-            adherent = intervention.adherence_90_day
-        else:
-            adherent = random.random() < (0.70 if intervention.intervention_applied else 0.45)
-
-        cohorts[cohort_key].append({
-            "patient_id": str(intervention.patient_id),
-            "adherent": adherent,
-            "days_to_follow_up": random.randint(30, 90),
-        })
-
-    # Calculate statistics
-    cohort_stats = []
-    for cohort_name, cohort_data in cohorts.items():
-        if cohort_data:
-            adherence_rate = sum(1 for p in cohort_data if p["adherent"]) / len(cohort_data) * 100
-            avg_follow_up = sum(p["days_to_follow_up"] for p in cohort_data) / len(cohort_data)
-
-            cohort_stats.append({
-                "cohort_name": cohort_name,
-                "size": len(cohort_data),
-                "adherence_rate": round(adherence_rate, 1),
-                "avg_days_to_follow_up": round(avg_follow_up, 1),
-            })
+    try:
+        analysis = cohort_analysis(db, filters, split(stratify_by), resamples, confidence)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
         "trigger_type": trigger_type,
         "intervention_type": intervention_type,
-        "total_patients": len(interventions),
-        "cohorts": cohort_stats,
+        **analysis,
     }
 
 
@@ -251,22 +106,15 @@ def calculate_roi(
     """
     Calculate ROI for interventions with customizable parameters
     """
-    # Calculate patients retained due to intervention
-    patients_retained = interventions_count * ((intervention_adherence - baseline_adherence) / 100)
-
-    # Calculate revenue
-    revenue_saved = patients_retained * annual_revenue_per_patient
-
-    # Calculate costs
-    total_cost = interventions_count * intervention_cost
-
-    # Calculate ROI
-    net_benefit = revenue_saved - total_cost
-    roi_percentage = (net_benefit / total_cost * 100) if total_cost > 0 else 0
-
-    # Calculate payback period (months)
-    monthly_benefit = revenue_saved / 12
-    payback_months = (total_cost / monthly_benefit) if monthly_benefit > 0 else 0
+    metrics = roi_metrics(
+        interventions_count, intervention_cost, baseline_adherence, intervention_adherence, annual_revenue_per_patient
+    )
+    patients_retained = float(metrics["patients_retained"])
+    revenue_saved = float(metrics["revenue_saved"])
+    total_cost = float(metrics["total_cost"])
+    net_benefit = float(metrics["net_benefit"])
+    roi_percentage = float(metrics["roi_percentage"])
+    payback_months = float(metrics["payback_period_months"])
 
     return {
         "inputs": {
@@ -292,47 +140,130 @@ def calculate_roi(
     }
 
 
+class ParameterRange(BaseModel):
+    min: float
+    max: float
+    steps: int = 10
+
+
+class RoiSensitivityRequest(BaseModel):
+    interventions_count: int = 100
+    intervention_cost: ParameterRange = ParameterRange(min=10, max=200, steps=20)
+    baseline_adherence: ParameterRange = ParameterRange(min=30, max=60, steps=13)
+    intervention_adherence: ParameterRange = ParameterRange(min=50, max=90, steps=17)
+    annual_revenue_per_patient: ParameterRange = ParameterRange(min=50000, max=250000, steps=9)
+    # Base case for the tornado chart; defaults to the middle of each range
+    base: Dict[str, float] = {}
+    heatmap_x: str = "intervention_cost"
+    heatmap_y: str = "intervention_adherence"
+
+
+@router.post("/roi-sensitivity")
+def calculate_roi_sensitivity(request: RoiSensitivityRequest) -> Dict:
+    """
+    Sweep ROI over ranges of cost, baseline/intervention adherence and revenue per patient
+
+    Every combination is evaluated at once; returns heatmap arrays for two of the
+    parameters and tornado-chart sensitivities around the base case.
+    """
+    ranges = {
+        name: (getattr(request, name).min, getattr(request, name).max, getattr(request, name).steps)
+        for name in SWEEP_PARAMETERS
+    }
+    unknown = set(request.base) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown base parameter(s) {', '.join(sorted(unknown))}")
+    base = {
+        name: request.base.get(name, (ranges[name][0] + ranges[name][1]) / 2)
+        for name in SWEEP_PARAMETERS
+    }
+
+    try:
+        sensitivity = roi_sensitivity(
+            request.interventions_count, ranges, base, (request.heatmap_x, request.heatmap_y)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "interventions_count": request.interventions_count,
+        **sensitivity,
+    }
+
+
 @router.get("/time-to-abandonment")
 def get_time_to_abandonment(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    intervention_types: Optional[str] = None,
+    time_points: Optional[str] = None,
+    max_days: int = 180,
+    step_days: int = 30,
+    confidence: float = 0.95,
     db: Session = Depends(get_db)
 ) -> Dict:
     """
     Analyze time from trigger detection to patient abandonment
-    Shows survival curves for different intervention types
+    Shows Kaplan–Meier survival curves (with confidence bands) per intervention type
+
+    Args:
+        start_date: Only triggers on or after this date
+        end_date: Only triggers on or before this date
+        intervention_types: Comma-separated cohorts (intervention types or no_intervention)
+        time_points: Comma-separated days to evaluate the curves at
+        max_days: Last day of the default grid when time_points is not given
+        step_days: Spacing of the default grid
+        confidence: Confidence level of the bands
     """
-    # Mock survival data for demonstration
-    intervention_types = [
-        "copay_enrollment",
-        "nurse_callback",
-        "educational_material",
-        "no_intervention"
-    ]
-
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+        if time_points:
+            grid = sorted({float(point) for point in time_points.split(",") if point.strip()})
+        else:
+            if step_days < 1 or max_days < 0:
+                raise ValueError("step_days must be positive and max_days non-negative")
+            grid = list(range(0, max_days + 1, step_days))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not grid or len(grid) > MAX_TIME_POINTS or grid[0] < 0:
+        raise HTTPException(status_code=400, detail=f"Give between 1 and {MAX_TIME_POINTS} non-negative time points")
+    if not 0 < confidence < 1:
+        raise HTTPException(status_code=400, detail="confidence must be between 0 and 1")
+
+    cohorts = sorted({c.strip() for c in intervention_types.split(",") if c.strip()}) if intervention_types else None
+
+    # Cache the step functions, not the grid, so any grid is served from one estimate
+    key = query_cache.make_key(
+        "survival-curves", start=start, end=end, cohorts=cohorts, confidence=confidence
+    )
+    curves = query_cache.get_or_compute(
+        key, lambda: survival_curves(survival_counts(db, start, end, cohorts), confidence)
+    )
+
+    grid_array = np.asarray(grid, dtype=np.float64)
     survival_data = {}
-
-    for intervention_type in intervention_types:
-        # Generate mock survival curve data (% still adherent over time)
-        time_points = [0, 30, 60, 90, 120, 150, 180]  # days
-
-        if intervention_type == "no_intervention":
-            # Baseline decay
-            survival_rates = [100, 75, 60, 48, 40, 35, 32]
-        elif intervention_type == "copay_enrollment":
-            # Better retention
-            survival_rates = [100, 90, 85, 80, 78, 75, 73]
-        elif intervention_type == "nurse_callback":
-            # Good retention
-            survival_rates = [100, 88, 82, 77, 74, 71, 69]
-        else:  # educational_material
-            # Moderate retention
-            survival_rates = [100, 82, 72, 65, 60, 57, 55]
-
-        survival_data[intervention_type] = [
-            {"days": day, "adherence_rate": rate}
-            for day, rate in zip(time_points, survival_rates)
+    cohort_summary = {}
+    for cohort, curve in curves.items():
+        values = evaluate_curve(curve, grid_array)
+        survival_data[cohort] = [
+            {
+                "days": day,
+                "adherence_rate": round(float(rate) * 100, 1),
+                "lower": round(float(lower) * 100, 1),
+                "upper": round(float(upper) * 100, 1),
+            }
+            for day, rate, lower, upper in zip(grid, values["survival"], values["lower"], values["upper"])
         ]
+        cohort_summary[cohort] = {
+            "patients": curve["patients"],
+            "abandonments": curve["events"],
+            "median_days_to_abandonment": median_survival(curve),
+        }
 
     return {
         "survival_curves": survival_data,
-        "time_points_days": [0, 30, 60, 90, 120, 150, 180],
+        "cohorts": cohort_summary,
+        "time_points_days": grid,
+        "confidence": confidence,
     }
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel
+import json
 import random
 from datetime import datetime
 import httpx
@@ -12,6 +13,12 @@ from app.models.patient import Patient
 from app.models.geographic import GeographicProfile
 from app.schemas.call import Call as CallSchema, CallCreate, CallAnalysis
 from app.core.config import settings
+from app.services.transcript_turns import parse_speaker_turns
+from app.services.streaming_triggers import StreamingTriggerDetector
+from app.services.trigger_store import store_call_triggers
+from app.services.transcript_terms import store_call_terms
+from app.services.competitor_mentions import store_call_mentions
+from app.services.transcript_search import search_calls as search_transcripts
 
 router = APIRouter(prefix="/api/calls", tags=["calls"])
 
@@ -37,6 +44,40 @@ def get_calls(
     return query.order_by(Call.call_date.desc()).offset(skip).limit(limit).all()
 
 
+@router.get("/search")
+def search_calls(
+    q: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    patient_id: Optional[UUID] = None,
+    outcome: Optional[str] = None,
+    sort: str = "relevance",
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search of call transcripts
+
+    q supports "quoted phrases", OR and -exclusions. Results carry highlighted
+    snippets; pass next_cursor back as cursor for the next page.
+    """
+    try:
+        return search_transcripts(
+            db,
+            q,
+            start=datetime.fromisoformat(start_date) if start_date else None,
+            end=datetime.fromisoformat(end_date) if end_date else None,
+            patient_id=patient_id,
+            outcome=outcome,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/{call_id}", response_model=CallSchema)
 def get_call(call_id: UUID, db: Session = Depends(get_db)):
     """Get a single call"""
@@ -147,14 +188,73 @@ AI: I understand. Let me see what programs you qualify for to help with both the
 
 @router.post("/", response_model=CallSchema)
 def create_call(call: CallCreate, db: Session = Depends(get_db)):
-    """Create a new call record"""
+    """Create a new call record and store its trigger analysis"""
     db_call = Call(**call.dict())
+    db_call.speaker_turns = parse_speaker_turns(db_call.transcript)
     db.add(db_call)
+    db.flush()
+    store_call_triggers(db, db_call)
+    store_call_terms(db, db_call)
+    store_call_mentions(db, db_call)
     db.commit()
     db.refresh(db_call)
     return db_call
 
 
+@router.websocket("/live-triggers")
+async def stream_call_triggers(
+    websocket: WebSocket,
+    patient_id: Optional[UUID] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Detect abandonment triggers while a call is in progress
+
+    The client sends transcript chunks as {"text": "..."} and {"event": "end"} when
+    the call is over. Each chunk is answered with the triggers it added or escalated
+    and the updated risk score; the end event is answered with the full trigger list
+    before the socket is closed.
+    """
+    await websocket.accept()
+
+    patient_history = None
+    if patient_id:
+        patient = db.query(Patient).filter(Patient.id == patient_id).first()
+        if not patient:
+            await websocket.close(code=1008, reason="Patient not found")
+            return
+        patient_history = {"sdoh_risk_score": patient.sdoh_risk_score or 0}
+    # Don't hold a pooled connection for the length of the call
+    db.close()
+
+    detector = StreamingTriggerDetector(patient_history)
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                await websocket.send_json({"error": "Messages must be JSON"})
+                continue
+            if not isinstance(message, dict):
+                await websocket.send_json({"error": "Messages must be JSON objects"})
+                continue
+
+            if message.get("event") == "end":
+                update = detector.finish()
+                update["final"] = True
+                await websocket.send_json(update)
+                await websocket.close()
+                return
+
+            text = message.get("text")
+            if not isinstance(text, str):
+                await websocket.send_json({"error": "Expected a text chunk or an end event"})
+                continue
+            await websocket.send_json(detector.feed(text))
+    except WebSocketDisconnect:
+        return
+
+
 @router.post("/initiate-outbound-call")
 async def initiate_outbound_call(request: InitiateCallRequest):
     """
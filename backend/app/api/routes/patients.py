@@ -8,6 +8,7 @@ from app.models.geographic import GeographicProfile
 from app.models.formulary import Formulary
 from app.models.program import AssistanceProgram, Enrollment
 from app.schemas.patient import Patient as PatientSchema, PatientWithEnrichment, PatientCreate, PatientUpdate
+from app.services.patient_risk import refresh_patient_risk
 
 router = APIRouter(prefix="/api/patients", tags=["patients"])
 
@@ -138,9 +139,14 @@ def update_patient(patient_id: UUID, patient_update: PatientUpdate, db: Session
     if not db_patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    for field, value in patient_update.dict(exclude_unset=True).items():
+    changes = patient_update.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(db_patient, field, value)
 
+    # The stored risk score includes the SDOH adjustment
+    if "sdoh_risk_score" in changes:
+        refresh_patient_risk(db, [patient_id])
+
     db.commit()
     db.refresh(db_patient)
     return db_patient
@@ -1,20 +1,44 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, and_
 from typing import List, Dict, Optional
 from uuid import UUID
 from datetime import datetime, timedelta
+from pydantic import BaseModel
 
 from app.core.database import get_db
 from app.models import Call, Patient, Intervention
-from app.services.trigger_detection import (
-    detect_triggers_in_transcript,
-    calculate_abandonment_risk,
-    analyze_call_for_triggers,
+from app.services.trigger_detection import get_ruleset_version, get_trigger_matcher
+from app.services.analysis_cache import cached_analyze_call, get_analysis_cache
+from app.services.trigger_store import analyze_calls_in_batches
+from app.services.trigger_aggregation import aggregate_trigger_summary
+from app.services.patient_risk import get_stored_patient_risk, rank_high_risk_patients
+from app.services.trigger_reanalysis import (
+    get_reanalysis_progress,
+    start_reanalysis_in_background,
 )
+from app.services.trigger_rules import save_ruleset
 
 router = APIRouter()
 
+# Calls analyzed per POST /analyze-calls page; larger ranges go through the CLI
+MAX_ANALYZE_PAGE_SIZE = 500
+
+
+class AnalyzeCallsRequest(BaseModel):
+    call_ids: Optional[List[UUID]] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    persist: bool = True
+    limit: int = 200
+    cursor: Optional[UUID] = None
+
+
+class TriggerRulesetRequest(BaseModel):
+    patterns: Dict[str, Dict]
+    recommendations: Dict[str, Dict]
+    notes: Optional[str] = None
+
 
 @router.post("/analyze-call/{call_id}")
 def analyze_call(
@@ -39,7 +63,7 @@ def analyze_call(
         }
     }
 
-    analysis = analyze_call_for_triggers(call_data)
+    analysis = cached_analyze_call(call_data)
 
     return {
         "call_id": str(call_id),
@@ -49,6 +73,134 @@ def analyze_call(
     }
 
 
+@router.post("/analyze-calls")
+def analyze_calls(
+    request: AnalyzeCallsRequest,
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Analyze one page of calls, selected by id and/or call date range
+
+    Calls are analyzed in id order, at most limit (capped at MAX_ANALYZE_PAGE_SIZE)
+    per request, in this process. Results are stored unless persist is false. For
+    the next page pass next_cursor back as cursor; it is None after the last page.
+    Whole date ranges are better run with `python -m app.cli analyze-calls`.
+    """
+    filters = []
+    if request.call_ids:
+        filters.append(Call.id.in_(request.call_ids))
+    if request.start_date:
+        filters.append(Call.call_date >= datetime.fromisoformat(request.start_date))
+    if request.end_date:
+        filters.append(Call.call_date <= datetime.fromisoformat(request.end_date))
+
+    if not filters:
+        raise HTTPException(status_code=400, detail="Provide call_ids or a start_date/end_date range")
+
+    call_filter = and_(*filters)
+    limit = max(1, min(request.limit, MAX_ANALYZE_PAGE_SIZE))
+    pages = analyze_calls_in_batches(
+        db,
+        call_filter,
+        chunk_size=limit,
+        max_workers=1,
+        persist=request.persist,
+        after_id=request.cursor
+    )
+    results = next(pages, [])
+    pages.close()
+
+    next_cursor = None
+    if len(results) == limit:
+        last_id = UUID(results[-1]["call_id"])
+        remaining = db.query(Call.id).filter(
+            call_filter,
+            Call.transcript.isnot(None),
+            Call.id > last_id
+        )
+        if db.query(remaining.exists()).scalar():
+            next_cursor = str(last_id)
+
+    return {
+        "ruleset_version": get_ruleset_version(),
+        "analyzed_count": len(results),
+        "calls_with_triggers": sum(1 for r in results if r["trigger_count"] > 0),
+        "high_risk_count": sum(1 for r in results if r["risk_level"] == "high"),
+        "calls": results,
+        "next_cursor": next_cursor,
+    }
+
+
+@router.post("/reanalysis")
+def start_reanalysis(
+    chunk_size: int = 500,
+    max_workers: Optional[int] = None
+) -> Dict:
+    """
+    Start re-analyzing calls whose stored triggers came from an older ruleset
+
+    The job runs in the background; poll GET /reanalysis for progress.
+    """
+    started = start_reanalysis_in_background(chunk_size=chunk_size, max_workers=max_workers)
+
+    return {
+        "started": started,
+        "progress": get_reanalysis_progress(),
+    }
+
+
+@router.get("/reanalysis")
+def get_reanalysis_status() -> Dict:
+    """
+    Get progress of the background re-analysis job
+    """
+    return get_reanalysis_progress()
+
+
+@router.get("/rules")
+def get_trigger_rules() -> Dict:
+    """
+    Get the trigger ruleset this worker is currently using
+    """
+    matcher = get_trigger_matcher()
+
+    return {
+        "ruleset_version": matcher.version,
+        "patterns": matcher.patterns,
+        "recommendations": matcher.recommendations,
+    }
+
+
+@router.put("/rules")
+def update_trigger_rules(
+    request: TriggerRulesetRequest,
+    db: Session = Depends(get_db)
+) -> Dict:
+    """
+    Store a new trigger ruleset and make it active
+
+    This worker switches immediately and the others on their next poll. Stored
+    analyses keep their old version until POST /reanalysis is run.
+    """
+    try:
+        ruleset = save_ruleset(db, request.patterns, request.recommendations, notes=request.notes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "ruleset_version": ruleset.version,
+        "activated_at": ruleset.activated_at.isoformat() if ruleset.activated_at else None,
+    }
+
+
+@router.get("/cache-stats")
+def get_cache_stats() -> Dict:
+    """
+    Get hit/miss counters and size of this worker's analysis cache
+    """
+    return get_analysis_cache().stats()
+
+
 @router.get("/trigger-summary")
 def get_trigger_summary(
     start_date: Optional[str] = None,
@@ -69,13 +221,14 @@ def get_trigger_summary(
     else:
         end = datetime.utcnow()
 
-    # Get all calls in date range
-    calls = db.query(Call).filter(
-        Call.call_date >= start,
-        Call.call_date <= end
-    ).all()
+    in_range = and_(Call.call_date >= start, Call.call_date <= end)
+
+    total_calls = db.query(func.count(Call.id)).filter(in_range).scalar() or 0
+
+    # One streaming pass over stored trigger results
+    summary = aggregate_trigger_summary(db, in_range)
+    calls_with_triggers = summary.calls_with_triggers
 
-    # Analyze all calls
     trigger_counts = {
         "cost_concern": 0,
         "injection_anxiety": 0,
@@ -84,22 +237,9 @@ def get_trigger_summary(
         "access_barrier": 0,
         "complexity_concern": 0,
     }
-
-    total_calls = len(calls)
-    calls_with_triggers = 0
-    all_triggers = []
-
-    for call in calls:
-        if call.transcript:
-            triggers = detect_triggers_in_transcript(call.transcript)
-            if triggers:
-                calls_with_triggers += 1
-                all_triggers.extend(triggers)
-
-                for trigger in triggers:
-                    trigger_type = trigger["trigger_type"]
-                    if trigger_type in trigger_counts:
-                        trigger_counts[trigger_type] += 1
+    for trigger_type, count in summary.type_counts.items():
+        if trigger_type in trigger_counts:
+            trigger_counts[trigger_type] = count
 
     # Calculate percentages
     trigger_percentages = {}
@@ -110,20 +250,15 @@ def get_trigger_summary(
                 "percentage": round((count / total_calls) * 100, 1)
             }
 
-    # Find most common trigger combinations
-    trigger_combinations = {}
-    for call in calls:
-        if call.transcript:
-            triggers = detect_triggers_in_transcript(call.transcript)
-            if len(triggers) > 1:
-                combo = tuple(sorted([t["trigger_type"] for t in triggers[:2]]))
-                trigger_combinations[combo] = trigger_combinations.get(combo, 0) + 1
-
-    top_combinations = sorted(
-        trigger_combinations.items(),
-        key=lambda x: x[1],
-        reverse=True
-    )[:5]
+    def combination_entries(pairs):
+        return [
+            {
+                "triggers": list(pair),
+                "count": count,
+                "percentage": round((count / calls_with_triggers * 100), 1) if calls_with_triggers > 0 else 0
+            }
+            for pair, count in pairs
+        ]
 
     return {
         "date_range": {
@@ -134,15 +269,9 @@ def get_trigger_summary(
         "calls_with_triggers": calls_with_triggers,
         "trigger_rate": round((calls_with_triggers / total_calls * 100), 1) if total_calls > 0 else 0,
         "trigger_breakdown": trigger_percentages,
-        "top_trigger_combinations": [
-            {
-                "triggers": list(combo),
-                "count": count,
-                "percentage": round((count / calls_with_triggers * 100), 1) if calls_with_triggers > 0 else 0
-            }
-            for combo, count in top_combinations
-        ],
-        "total_triggers_detected": len(all_triggers),
+        "top_trigger_combinations": combination_entries(summary.top_combinations(5)),
+        "trigger_co_occurrence": combination_entries(summary.co_occurring_pairs()),
+        "total_triggers_detected": summary.total_triggers,
     }
 
 
@@ -152,18 +281,18 @@ def get_patient_risk(
     db: Session = Depends(get_db)
 ) -> Dict:
     """
-    Calculate abandonment risk for a specific patient based on their call history
+    Get abandonment risk for a specific patient based on their recent calls
+
+    Reads the patient's materialized risk row, which is kept current as calls are
+    stored or re-analyzed.
     """
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    # Get all patient calls
-    calls = db.query(Call).filter(
-        Call.patient_id == patient_id
-    ).order_by(Call.call_date.desc()).all()
+    risk = get_stored_patient_risk(db, patient_id)
 
-    if not calls:
+    if not risk or not risk.call_count:
         return {
             "patient_id": str(patient_id),
             "risk_score": 20,
@@ -172,105 +301,38 @@ def get_patient_risk(
             "call_count": 0,
         }
 
-    # Analyze recent calls (last 5)
-    recent_calls = calls[:5]
-    all_triggers = []
-
-    for call in recent_calls:
-        if call.transcript:
-            triggers = detect_triggers_in_transcript(call.transcript)
-            all_triggers.extend(triggers)
-
-    # Calculate risk
-    patient_history = {
-        "sdoh_risk_score": patient.sdoh_risk_score or 0,
-        "prior_abandonments": 0,
-        "missed_appointments": 0,
-    }
-
-    risk_score, risk_level = calculate_abandonment_risk(all_triggers, patient_history)
-
-    # Group triggers by type
-    trigger_summary = {}
-    for trigger in all_triggers:
-        trigger_type = trigger["trigger_type"]
-        if trigger_type not in trigger_summary:
-            trigger_summary[trigger_type] = {
-                "count": 0,
-                "avg_confidence": 0,
-                "severity": trigger["severity"],
-            }
-        trigger_summary[trigger_type]["count"] += 1
-        trigger_summary[trigger_type]["avg_confidence"] += trigger["confidence"]
-
-    # Calculate averages
-    for trigger_type in trigger_summary:
-        count = trigger_summary[trigger_type]["count"]
-        trigger_summary[trigger_type]["avg_confidence"] = round(
-            trigger_summary[trigger_type]["avg_confidence"] / count, 2
-        )
-
     return {
         "patient_id": str(patient_id),
         "patient_name": f"{patient.first_name} {patient.last_name}",
-        "risk_score": risk_score,
-        "risk_level": risk_level,
-        "call_count": len(calls),
-        "triggers_found": trigger_summary,
-        "total_trigger_count": len(all_triggers),
-        "last_call_date": calls[0].call_date.isoformat() if calls[0].call_date else None,
+        "risk_score": risk.risk_score,
+        "risk_level": risk.risk_level,
+        "call_count": risk.call_count,
+        "triggers_found": risk.trigger_breakdown or {},
+        "total_trigger_count": risk.trigger_count,
+        "last_call_date": risk.last_call_date.isoformat() if risk.last_call_date else None,
         "sdoh_risk_score": patient.sdoh_risk_score,
         "journey_stage": patient.journey_stage,
+        "computed_at": risk.computed_at.isoformat() if risk.computed_at else None,
     }
 
 
 @router.get("/high-risk-patients")
 def get_high_risk_patients(
     limit: int = 50,
+    after_risk_score: Optional[int] = None,
+    after_patient_id: Optional[UUID] = None,
     db: Session = Depends(get_db)
 ) -> List[Dict]:
     """
-    Get list of patients with high abandonment risk
+    Get active patients with high abandonment risk, highest first
+
+    Every active patient is ranked by their materialized risk score.
+    For the next page pass the last row's risk_score and patient_id as
+    after_risk_score / after_patient_id.
     """
-    # Get all active patients
-    patients = db.query(Patient).filter(
-        Patient.status == "active"
-    ).all()
-
-    patient_risks = []
-
-    for patient in patients[:limit]:  # Limit to avoid timeout
-        # Get recent calls
-        calls = db.query(Call).filter(
-            Call.patient_id == patient.id
-        ).order_by(Call.call_date.desc()).limit(3).all()
-
-        all_triggers = []
-        for call in calls:
-            if call.transcript:
-                triggers = detect_triggers_in_transcript(call.transcript)
-                all_triggers.extend(triggers)
-
-        if all_triggers or patient.sdoh_risk_score > 60:
-            risk_score, risk_level = calculate_abandonment_risk(
-                all_triggers,
-                {"sdoh_risk_score": patient.sdoh_risk_score or 0}
-            )
-
-            if risk_score >= 60:  # High risk threshold
-                patient_risks.append({
-                    "patient_id": str(patient.id),
-                    "mrn": patient.mrn,
-                    "name": f"{patient.first_name} {patient.last_name}",
-                    "risk_score": risk_score,
-                    "risk_level": risk_level,
-                    "trigger_count": len(all_triggers),
-                    "sdoh_risk_score": patient.sdoh_risk_score,
-                    "journey_stage": patient.journey_stage,
-                    "last_contact": patient.last_contact_date.isoformat() if patient.last_contact_date else None,
-                })
-
-    # Sort by risk score
-    patient_risks.sort(key=lambda x: x["risk_score"], reverse=True)
-
-    return patient_risks
+    return rank_high_risk_patients(
+        db,
+        limit=limit,
+        after_risk_score=after_risk_score,
+        after_patient_id=after_patient_id,
+    )
@@ -0,0 +1,227 @@
+"""
+Maintenance commands
+
+Usage:
+    python -m app.cli backfill-triggers [--batch-size 500]
+    python -m app.cli backfill-turns [--batch-size 1000]
+    python -m app.cli reanalyze-triggers [--chunk-size 500] [--workers N]
+    python -m app.cli analyze-calls [--start-date 2025-01-01] [--end-date ...] [--call-id ID ...] [--workers N]
+    python -m app.cli backfill-patient-risk [--batch-size 1000]
+    python -m app.cli backfill-terms [--batch-size 500]
+    python -m app.cli backfill-mentions [--batch-size 500]
+    python -m app.cli import-rules rules.json [--notes TEXT]
+    python -m app.cli export-rules [rules.json]
+"""
+import argparse
+import json
+from datetime import datetime
+
+from app.core.database import SessionLocal
+
+
+def backfill_triggers(args: argparse.Namespace) -> None:
+    """Store trigger analyses for calls that have none yet"""
+    from app.services.trigger_store import backfill_call_triggers
+
+    db = SessionLocal()
+    try:
+        analyzed = backfill_call_triggers(db, batch_size=args.batch_size)
+        print(f"✓ Stored trigger analyses for {analyzed} calls")
+    finally:
+        db.close()
+
+
+def backfill_turns(args: argparse.Namespace) -> None:
+    """Store parsed speaker turns for calls that have none yet"""
+    from app.services.trigger_store import backfill_speaker_turns
+
+    db = SessionLocal()
+    try:
+        updated = backfill_speaker_turns(db, batch_size=args.batch_size)
+        print(f"✓ Stored speaker turns for {updated} calls")
+    finally:
+        db.close()
+
+
+def backfill_patient_risk(args: argparse.Namespace) -> None:
+    """Recompute the materialized risk score of every patient"""
+    from app.services.patient_risk import backfill_patient_risk as backfill
+
+    db = SessionLocal()
+    try:
+        refreshed = backfill(db, batch_size=args.batch_size)
+        print(f"✓ Stored risk scores for {refreshed} patients")
+    finally:
+        db.close()
+
+
+def backfill_terms(args: argparse.Namespace) -> None:
+    """Add calls missing from the daily keyword rollup"""
+    from app.services.transcript_terms import backfill_term_rollups
+
+    db = SessionLocal()
+    try:
+        added = backfill_term_rollups(db, batch_size=args.batch_size)
+        print(f"✓ Added keyword counts for {added} calls")
+    finally:
+        db.close()
+
+
+def backfill_mentions(args: argparse.Namespace) -> None:
+    """Extract competitor mentions for calls not yet scanned with the current lexicon"""
+    from app.services.competitor_mentions import backfill_call_mentions
+
+    db = SessionLocal()
+    try:
+        scanned = backfill_call_mentions(db, batch_size=args.batch_size)
+        print(f"✓ Extracted competitor mentions from {scanned} calls")
+    finally:
+        db.close()
+
+
+def reanalyze_triggers(args: argparse.Namespace) -> None:
+    """Re-analyze calls whose stored triggers came from an older ruleset"""
+    from app.services.trigger_reanalysis import run_reanalysis
+
+    def report(progress):
+        print(f"  {progress['processed_calls']}/{progress['total_calls']} calls re-analyzed")
+
+    progress = run_reanalysis(
+        chunk_size=args.chunk_size,
+        max_workers=args.workers,
+        progress_callback=report,
+    )
+    if progress["status"] == "failed":
+        raise SystemExit(f"❌ Re-analysis failed: {progress['error']}")
+    print(f"✓ Ruleset {progress['ruleset_version']} applied to {progress['processed_calls']} calls")
+
+
+def analyze_calls(args: argparse.Namespace) -> None:
+    """Analyze and store triggers for calls selected by id and/or date range (nightly backfills)"""
+    from sqlalchemy import and_
+    from app.models import Call
+    from app.services.trigger_store import analyze_calls_in_batches
+
+    filters = []
+    if args.call_id:
+        filters.append(Call.id.in_(args.call_id))
+    if args.start_date:
+        filters.append(Call.call_date >= datetime.fromisoformat(args.start_date))
+    if args.end_date:
+        filters.append(Call.call_date <= datetime.fromisoformat(args.end_date))
+    if not filters:
+        raise SystemExit("Provide --call-id or a --start-date/--end-date range")
+
+    db = SessionLocal()
+    try:
+        analyzed = 0
+        high_risk = 0
+        for chunk in analyze_calls_in_batches(
+            db,
+            and_(*filters),
+            chunk_size=args.chunk_size,
+            max_workers=args.workers,
+            persist=not args.dry_run
+        ):
+            analyzed += len(chunk)
+            high_risk += sum(1 for result in chunk if result["risk_level"] == "high")
+            print(f"  {analyzed} calls analyzed")
+        print(f"✓ Analyzed {analyzed} calls ({high_risk} high risk)")
+    finally:
+        db.close()
+
+
+def import_rules(args: argparse.Namespace) -> None:
+    """Store a ruleset from a JSON file ({"patterns": ..., "recommendations": ...}) and activate it"""
+    from app.services.trigger_rules import save_ruleset
+
+    with open(args.path) as f:
+        rules = json.load(f)
+
+    db = SessionLocal()
+    try:
+        ruleset = save_ruleset(db, rules["patterns"], rules["recommendations"], notes=args.notes)
+        print(f"✓ Activated trigger ruleset {ruleset.version}; running workers will reload it")
+    except (KeyError, ValueError) as e:
+        raise SystemExit(f"❌ Invalid ruleset: {e}")
+    finally:
+        db.close()
+
+
+def export_rules(args: argparse.Namespace) -> None:
+    """Write the active ruleset as JSON (to stdout without a path)"""
+    from app.services.trigger_detection import get_trigger_matcher
+    from app.services.trigger_rules import refresh_trigger_matcher
+
+    db = SessionLocal()
+    try:
+        refresh_trigger_matcher(db)
+    finally:
+        db.close()
+
+    matcher = get_trigger_matcher()
+    payload = json.dumps(
+        {"patterns": matcher.patterns, "recommendations": matcher.recommendations},
+        indent=2
+    )
+    if args.path:
+        with open(args.path, "w") as f:
+            f.write(payload + "\n")
+        print(f"✓ Exported trigger ruleset {matcher.version} to {args.path}")
+    else:
+        print(payload)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Voice AI Healthcare maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subparsers.add_parser("backfill-triggers", help="Analyze calls missing stored trigger results")
+    backfill.add_argument("--batch-size", type=int, default=500)
+    backfill.set_defaults(func=backfill_triggers)
+
+    turns = subparsers.add_parser("backfill-turns", help="Parse speaker turns for calls missing them")
+    turns.add_argument("--batch-size", type=int, default=1000)
+    turns.set_defaults(func=backfill_turns)
+
+    risk = subparsers.add_parser("backfill-patient-risk", help="Recompute every patient's stored risk score")
+    risk.add_argument("--batch-size", type=int, default=1000)
+    risk.set_defaults(func=backfill_patient_risk)
+
+    terms = subparsers.add_parser("backfill-terms", help="Add calls missing from the daily keyword rollup")
+    terms.add_argument("--batch-size", type=int, default=500)
+    terms.set_defaults(func=backfill_terms)
+
+    mentions = subparsers.add_parser("backfill-mentions", help="Extract competitor mentions with the current lexicon")
+    mentions.add_argument("--batch-size", type=int, default=500)
+    mentions.set_defaults(func=backfill_mentions)
+
+    reanalyze = subparsers.add_parser("reanalyze-triggers", help="Re-analyze calls with out-of-date trigger results")
+    reanalyze.add_argument("--chunk-size", type=int, default=500)
+    reanalyze.add_argument("--workers", type=int, default=None)
+    reanalyze.set_defaults(func=reanalyze_triggers)
+
+    analyze = subparsers.add_parser("analyze-calls", help="Analyze calls by id or date range across all cores")
+    analyze.add_argument("--call-id", action="append", help="Call id (repeatable)")
+    analyze.add_argument("--start-date", help="ISO date/time, inclusive")
+    analyze.add_argument("--end-date", help="ISO date/time, inclusive")
+    analyze.add_argument("--chunk-size", type=int, default=1000)
+    analyze.add_argument("--workers", type=int, default=None)
+    analyze.add_argument("--dry-run", action="store_true", help="Analyze without storing results")
+    analyze.set_defaults(func=analyze_calls)
+
+    import_parser = subparsers.add_parser("import-rules", help="Store and activate a trigger ruleset from JSON")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--notes", default=None)
+    import_parser.set_defaults(func=import_rules)
+
+    export = subparsers.add_parser("export-rules", help="Write the active trigger ruleset as JSON")
+    export.add_argument("path", nargs="?")
+    export.set_defaults(func=export_rules)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,24 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
 
+    # Transcript analysis cache
+    ANALYSIS_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    ANALYSIS_CACHE_REDIS: bool = False  # Share results between workers through REDIS_URL
+    ANALYSIS_CACHE_TTL_SECONDS: int = 86400
+
+    # Aggregate analytics responses (geographic insights, cohorts, ...)
+    QUERY_CACHE_TTL_SECONDS: float = 300.0
+
+    # Trigger rules
+    TRIGGER_RULES_POLL_SECONDS: float = 15.0  # 0 disables hot reload from the trigger_rulesets table
+
+    # LLM marketing analysis
+    LLM_BACKEND: str = "openai"  # "stub" scores content locally without calling a model
+    LLM_MODEL: str = "gpt-4o-mini"
+    LLM_CHUNK_TOKENS: int = 6000  # Website content budget per prompt
+    LLM_MAX_CONCURRENCY: int = 8  # Model calls in flight per batch analysis
+    TOPIC_CLASSIFIER_MIN_CONFIDENCE: float = 0.5  # Below this, mode=hybrid asks the LLM instead
+
     # API Keys
     OPENAI_API_KEY: str = "sk-mock-key"
     DEEPGRAM_API_KEY: str = "mock-deepgram-key"
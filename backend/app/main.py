@@ -32,6 +32,15 @@ app.include_router(marketing.router, prefix="/api/marketing", tags=["Marketing"]
 app.include_router(outcomes.router, prefix="/api/outcomes", tags=["Outcomes"])
 
 
+@app.on_event("startup")
+def start_trigger_rule_watcher():
+    """Pick up trigger ruleset changes without a redeploy"""
+    if settings.TRIGGER_RULES_POLL_SECONDS > 0:
+        from app.services.trigger_rules import start_rule_watcher
+
+        start_rule_watcher(settings.TRIGGER_RULES_POLL_SECONDS)
+
+
 @app.get("/")
 def root():
     return {
@@ -5,6 +5,11 @@ from app.models.formulary import Formulary
 from app.models.program import AssistanceProgram, Enrollment
 from app.models.integration import DataIntegration
 from app.models.intervention import Intervention, AdherenceEvent, MarketingCampaign
+from app.models.trigger_analysis import CallTriggerAnalysis
+from app.models.trigger_ruleset import TriggerRuleset
+from app.models.patient_risk import PatientRiskScore
+from app.models.transcript_term import TranscriptTermDaily
+from app.models.competitor import CompetitorDrug, CallMention
 
 __all__ = [
     "Patient",
@@ -17,4 +22,10 @@ __all__ = [
     "Intervention",
     "AdherenceEvent",
     "MarketingCampaign",
+    "CallTriggerAnalysis",
+    "TriggerRuleset",
+    "PatientRiskScore",
+    "TranscriptTermDaily",
+    "CompetitorDrug",
+    "CallMention",
 ]
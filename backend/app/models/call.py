@@ -1,12 +1,19 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, ARRAY, func, Float
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, ARRAY, func, Float, Index, Boolean, text, Computed
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from app.core.database import Base
 import uuid
 
 
 class Call(Base):
     __tablename__ = "calls"
+    __table_args__ = (
+        # Latest calls per patient (window queries and patient call history)
+        Index("ix_calls_patient_id_call_date", "patient_id", "call_date"),
+        # Calls still waiting to be added to transcript_term_daily
+        Index("ix_calls_terms_pending", "id", postgresql_where=text("NOT terms_counted")),
+        Index("ix_calls_transcript_tsv", "transcript_tsv", postgresql_using="gin"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
@@ -23,6 +30,15 @@ class Call(Base):
     actions_taken = Column(JSONB)  # {action: 'enroll_home_delivery', status: 'completed'}
     ai_recommendations = Column(JSONB)  # Full AI recommendation object
     call_summary = Column(Text)
+    speaker_turns = Column(JSONB)  # [[speaker, start, end], ...] offsets of each turn in transcript
+    trigger_ruleset_version = Column(String(16), index=True)  # Ruleset version of the stored trigger analysis
+    terms_counted = Column(Boolean, default=False, nullable=False)  # Included in transcript_term_daily
+    mention_lexicon_version = Column(String(16), index=True)  # Competitor lexicon version of the stored mentions
+    # Full-text search vector of the transcript, maintained by Postgres (GIN indexed); only loaded on request
+    transcript_tsv = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(transcript, ''))", persisted=True)
+    ))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationship
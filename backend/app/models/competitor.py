@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, ARRAY, func, Index
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+import uuid
+
+
+class CompetitorDrug(Base):
+    __tablename__ = "competitor_drugs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String(100), unique=True, nullable=False)  # Canonical name reported in analytics, e.g. 'humira'
+    generic_name = Column(String(100))  # e.g. 'adalimumab'
+    aliases = Column(ARRAY(String))  # Other spellings matched as this drug: generics, misspellings, biosimilars
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class CallMention(Base):
+    __tablename__ = "call_mentions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    call_id = Column(UUID(as_uuid=True), ForeignKey("calls.id", ondelete="CASCADE"), nullable=False, index=True)
+    drug_name = Column(String(100), nullable=False)  # Canonical competitor name
+    matched_text = Column(String(100))  # Alias as written in the transcript
+    start_offset = Column(Integer, nullable=False)  # Character offsets in calls.transcript
+    end_offset = Column(Integer, nullable=False)
+    speaker = Column(String(20))  # patient, agent, unknown
+    lexicon_version = Column(String(16))  # Content hash of the lexicon that produced this row
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_call_mentions_drug_name_call_id", "drug_name", "call_id"),
+    )
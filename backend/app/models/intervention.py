@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, func, Float, Boolean
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, func, Float, Boolean, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -7,6 +7,10 @@ import uuid
 
 class Intervention(Base):
     __tablename__ = "interventions"
+    __table_args__ = (
+        # Outcome aggregates over a created_at window, grouped by type
+        Index("ix_interventions_created_at_type", "created_at", "intervention_type"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     call_id = Column(UUID(as_uuid=True), ForeignKey("calls.id"), nullable=False)
@@ -35,6 +39,10 @@ class Intervention(Base):
 
 class AdherenceEvent(Base):
     __tablename__ = "adherence_events"
+    __table_args__ = (
+        # A patient's adherence history after a given date (survival analysis)
+        Index("ix_adherence_events_patient_id_event_date", "patient_id", "event_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
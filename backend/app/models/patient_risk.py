@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.core.database import Base
+
+
+class PatientRiskScore(Base):
+    __tablename__ = "patient_risk_scores"
+
+    patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id", ondelete="CASCADE"), primary_key=True)
+    risk_score = Column(Integer, nullable=False)  # 0-99, from calculate_abandonment_risk
+    risk_level = Column(String(20), nullable=False)  # high, medium, low
+    trigger_breakdown = Column(JSONB)  # {trigger_type: {count, avg_confidence, severity}} over recent calls
+    trigger_count = Column(Integer, default=0)  # Triggers across the recent calls
+    call_count = Column(Integer, default=0)  # All calls the patient has had
+    last_call_date = Column(DateTime(timezone=True))
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Keyset pagination over (risk_score desc, patient_id)
+        Index("ix_patient_risk_scores_ranking", risk_score.desc(), patient_id),
+    )
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Date, BigInteger
+from app.core.database import Base
+
+
+class TranscriptTermDaily(Base):
+    __tablename__ = "transcript_term_daily"
+
+    day = Column(Date, primary_key=True)  # UTC date of the calls
+    speaker = Column(String(20), primary_key=True)  # 'all' for whole transcripts, else 'patient', 'agent', ...
+    term = Column(String(100), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, func, Float
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.core.database import Base
+import uuid
+
+
+class CallTriggerAnalysis(Base):
+    __tablename__ = "call_trigger_analyses"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    call_id = Column(UUID(as_uuid=True), ForeignKey("calls.id", ondelete="CASCADE"), nullable=False, index=True)
+    trigger_type = Column(String(50), nullable=False, index=True)  # 'cost_concern', 'injection_anxiety', ...
+    confidence = Column(Float)  # 0.0-1.0
+    severity = Column(String(20))  # high, medium, low
+    match_count = Column(Integer)
+    rank = Column(Integer)  # Position in the confidence-sorted trigger list (0 = strongest)
+    offsets = Column(JSONB)  # [[start, end], ...] character offsets in calls.transcript
+    ruleset_version = Column(String(16), index=True)  # Content hash of the rules that produced this row
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, DateTime, Boolean, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.core.database import Base
+import uuid
+
+
+class TriggerRuleset(Base):
+    __tablename__ = "trigger_rulesets"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    version = Column(String(16), nullable=False, unique=True)  # Content hash of patterns + recommendations
+    patterns = Column(JSONB, nullable=False)  # Same shape as TRIGGER_PATTERNS
+    recommendations = Column(JSONB, nullable=False)  # Same shape as INTERVENTION_RECOMMENDATIONS
+    is_active = Column(Boolean, default=False, nullable=False, index=True)  # At most one active row
+    notes = Column(String(500))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    activated_at = Column(DateTime(timezone=True))
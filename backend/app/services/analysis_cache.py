@@ -0,0 +1,215 @@
+"""
+Content-addressed cache for transcript analysis results
+
+Results are keyed by a hash of the transcript (plus any inputs that change the
+result) and the active ruleset version, so identical transcripts share one entry
+and a ruleset change makes every old entry unreachable instead of stale. Values
+are stored as JSON bytes: eviction is bounded by their total size and every hit
+returns a fresh copy that callers may mutate freely.
+
+The in-process LRU is always used. When ANALYSIS_CACHE_REDIS is enabled the
+shared Redis tier at REDIS_URL sits behind it, so workers reuse each other's
+results; Redis errors are counted and treated as misses.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.trigger_detection import (
+    analyze_call_for_triggers,
+    detect_triggers_in_transcript,
+    get_ruleset_version,
+)
+
+KEY_PREFIX = "analysis:"
+
+
+class AnalysisCache:
+    """
+    Two-tier cache of JSON-serializable analysis results
+
+    Args:
+        max_bytes: Total size of encoded values kept in process
+        redis_url: Shared Redis tier; None keeps the cache process-local
+        redis_ttl_seconds: Expiry of entries written to Redis
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        redis_url: Optional[str] = None,
+        redis_ttl_seconds: int = 86400
+    ):
+        self.max_bytes = max_bytes
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+        }
+
+        self._redis = None
+        if redis_url:
+            import redis
+
+            self._redis = redis.Redis.from_url(
+                redis_url, socket_timeout=0.25, socket_connect_timeout=0.25
+            )
+
+    @property
+    def redis_enabled(self) -> bool:
+        """True when lookups may go over the network to the shared tier"""
+        return self._redis is not None
+
+    @staticmethod
+    def make_key(kind: str, transcript: str, ruleset_version: str, **params) -> str:
+        """Key for a result of this kind computed from a transcript and extra params"""
+        digest = hashlib.sha256(transcript.encode("utf-8"))
+        if params:
+            digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+        return f"{KEY_PREFIX}{kind}:{ruleset_version}:{digest.hexdigest()}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached value, or None on a miss"""
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+
+        if encoded is None and self._redis is not None:
+            try:
+                encoded = self._redis.get(key)
+            except Exception:
+                encoded = None
+                self._count("redis_errors")
+            if encoded is not None:
+                self._count("redis_hits")
+                self._store_local(key, encoded)
+
+        if encoded is None:
+            self._count("misses")
+            return None
+        return json.loads(encoded)
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache a JSON-serializable value in every tier"""
+        encoded = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+        self._store_local(key, encoded)
+
+        if self._redis is not None:
+            try:
+                self._redis.set(key, encoded, ex=self.redis_ttl_seconds)
+            except Exception:
+                self._count("redis_errors")
+
+    def clear(self) -> None:
+        """Drop every in-process entry (the Redis tier expires on its own)"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current in-process size"""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+            size = self._size
+
+        lookups = counters["hits"] + counters["redis_hits"] + counters["misses"]
+        return {
+            **counters,
+            "hit_rate": round((counters["hits"] + counters["redis_hits"]) / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "redis_enabled": self.redis_enabled,
+        }
+
+    def _store_local(self, key: str, encoded: bytes) -> None:
+        # A value larger than the whole budget would only evict everything else
+        if len(encoded) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = encoded
+            self._size += len(encoded)
+
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._counters["evictions"] += 1
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+
+_cache: Optional[AnalysisCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Return the process-wide cache, creating it from settings on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalysisCache(
+                    max_bytes=settings.ANALYSIS_CACHE_MAX_BYTES,
+                    redis_url=settings.REDIS_URL if settings.ANALYSIS_CACHE_REDIS else None,
+                    redis_ttl_seconds=settings.ANALYSIS_CACHE_TTL_SECONDS,
+                )
+    return _cache
+
+
+def cached_detect_triggers(
+    transcript: str,
+    turns: Optional[List[List]] = None,
+    speaker: Optional[str] = None
+) -> List[Dict]:
+    """detect_triggers_in_transcript() memoized on (transcript, speaker, ruleset version)"""
+    if not transcript:
+        return []
+
+    cache = get_analysis_cache()
+    key = cache.make_key("triggers", transcript, get_ruleset_version(), speaker=speaker)
+    triggers = cache.get(key)
+    if triggers is None:
+        triggers = detect_triggers_in_transcript(transcript, turns=turns, speaker=speaker)
+        cache.set(key, triggers)
+    return triggers
+
+
+def cached_analyze_call(call_data: Dict) -> Dict:
+    """
+    analyze_call_for_triggers() memoized on (transcript, patient history, ruleset version)
+
+    The analysis timestamp is always the time of this call, not of the cached result.
+    """
+    transcript = call_data.get("transcript", "")
+    patient_history = call_data.get("patient_history", {})
+
+    cache = get_analysis_cache()
+    key = cache.make_key(
+        "analysis", transcript or "", get_ruleset_version(), patient_history=patient_history
+    )
+    analysis = cache.get(key)
+    if analysis is None:
+        analysis = analyze_call_for_triggers(call_data)
+        cache.set(key, analysis)
+
+    analysis["analysis_timestamp"] = datetime.utcnow().isoformat()
+    return analysis
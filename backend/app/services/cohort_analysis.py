@@ -0,0 +1,246 @@
+"""
+Stratified cohort comparison of interventions applied vs not applied
+
+Interventions can be filtered and stratified by any mix of trigger type,
+intervention type and the patient's state, insurance type and journey stage.
+Postgres returns one row of counts per (stratum, applied) pair; confidence
+intervals for the adherence difference in every stratum come from one batched
+NumPy bootstrap over all strata at once. Missing outcomes are imputed with the
+seeded per-row draw from intervention_outcomes, so results are reproducible
+and cached by the normalized filter set.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Float, case, cast, extract, func
+from sqlalchemy.orm import Session
+
+from app.models import Intervention, Patient
+from app.services.intervention_outcomes import SIMULATION_SEED, imputed_adherence
+from app.services.query_cache import query_cache
+
+# Dimension name -> column, in the order strata are reported
+STRATA_COLUMNS = {
+    "trigger_type": Intervention.trigger_type,
+    "intervention_type": Intervention.intervention_type,
+    "state": Patient.state,
+    "insurance_type": Patient.insurance_type,
+    "journey_stage": Patient.journey_stage,
+}
+
+# Expected 90-day adherence when no outcome is recorded
+IMPUTED_RATE_APPLIED = 0.70
+IMPUTED_RATE_NOT_APPLIED = 0.45
+
+DEFAULT_RESAMPLES = 2000
+MAX_RESAMPLES = 20000
+
+# Resampled values held in memory at once; many strata are bootstrapped in blocks
+BOOTSTRAP_BLOCK_SIZE = 2_000_000
+
+
+def normalize_cohort_query(
+    filters: Dict[str, Optional[Sequence[str]]],
+    stratify_by: Optional[Sequence[str]]
+) -> Tuple[Dict[str, List[str]], List[str]]:
+    """
+    Canonical form of filters and strata, so equivalent requests share a cache entry
+
+    Raises:
+        ValueError: For a dimension not in STRATA_COLUMNS
+    """
+    unknown = [name for name in list(filters) + list(stratify_by or []) if name not in STRATA_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown dimension(s) {', '.join(sorted(set(unknown)))}; use {', '.join(STRATA_COLUMNS)}")
+
+    normalized_filters = {
+        name: sorted({value.strip() for value in values if value and value.strip()})
+        for name, values in filters.items()
+        if values
+    }
+    normalized_filters = {name: values for name, values in normalized_filters.items() if values}
+    strata = [name for name in STRATA_COLUMNS if name in set(stratify_by or [])]
+    return normalized_filters, strata
+
+
+def cohort_counts(db: Session, filters: Dict[str, List[str]], strata: List[str]) -> List[tuple]:
+    """
+    Counts per stratum and applied flag
+
+    Returns:
+        (*stratum values, applied, size, adherent, follow-up days sum, follow-up count) rows
+    """
+    applied = func.coalesce(Intervention.intervention_applied, False)
+    rate = case((applied, IMPUTED_RATE_APPLIED), else_=IMPUTED_RATE_NOT_APPLIED)
+    follow_up_days = extract(
+        "epoch",
+        Intervention.follow_up_date - func.coalesce(Intervention.intervention_timestamp, Intervention.trigger_timestamp)
+    ) / 86400
+
+    group_columns = [STRATA_COLUMNS[name].label(name) for name in strata] + [applied.label("applied")]
+    query = db.query(
+        *group_columns,
+        func.count(Intervention.id),
+        func.sum(imputed_adherence(rate)),
+        cast(func.sum(follow_up_days), Float),
+        func.count(follow_up_days)
+    )
+    if any(STRATA_COLUMNS[name].class_ is Patient for name in list(filters) + strata):
+        query = query.join(Patient, Patient.id == Intervention.patient_id)
+    for name, values in filters.items():
+        query = query.filter(STRATA_COLUMNS[name].in_(values))
+
+    return query.group_by(*group_columns).all()
+
+
+def bootstrap_difference_ci(
+    n_applied: np.ndarray,
+    k_applied: np.ndarray,
+    n_control: np.ndarray,
+    k_control: np.ndarray,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    seed: int = SIMULATION_SEED
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Percentile bootstrap CIs of (applied - control) adherence rates for many strata at once
+
+    Resampling n binary outcomes with replacement draws the adherent count from
+    Binomial(n, k / n), so every stratum's resamples are one (strata x resamples)
+    binomial draw per arm.
+
+    Returns:
+        (lower, upper) in percentage points; NaN where either arm is empty
+    """
+    rng = np.random.default_rng(seed)
+    n_applied = np.asarray(n_applied, dtype=np.int64)
+    n_control = np.asarray(n_control, dtype=np.int64)
+    valid = (n_applied > 0) & (n_control > 0)
+
+    safe_applied = np.maximum(n_applied, 1)
+    safe_control = np.maximum(n_control, 1)
+    p_applied = np.asarray(k_applied, dtype=np.float64) / safe_applied
+    p_control = np.asarray(k_control, dtype=np.float64) / safe_control
+
+    alpha = (1 - confidence) / 2
+    lower = np.empty(len(n_applied))
+    upper = np.empty(len(n_applied))
+    step = max(1, BOOTSTRAP_BLOCK_SIZE // resamples)
+    for start in range(0, len(n_applied), step):
+        block = slice(start, start + step)
+        shape = (len(n_applied[block]), resamples)
+        draws_applied = rng.binomial(safe_applied[block, None], p_applied[block, None], size=shape) / safe_applied[block, None]
+        draws_control = rng.binomial(safe_control[block, None], p_control[block, None], size=shape) / safe_control[block, None]
+        lower[block], upper[block] = np.quantile((draws_applied - draws_control) * 100, [alpha, 1 - alpha], axis=1)
+
+    return np.where(valid, lower, np.nan), np.where(valid, upper, np.nan)
+
+
+def _cohort_stats(cohort_name: str, size: int, adherent: int, follow_up_sum: float, follow_up_count: int) -> Dict:
+    return {
+        "cohort_name": cohort_name,
+        "size": size,
+        "adherence_rate": round(adherent / size * 100, 1) if size else 0,
+        "avg_days_to_follow_up": round(follow_up_sum / follow_up_count, 1) if follow_up_count else None,
+    }
+
+
+def _round_or_none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 1)
+
+
+def analyze_cohorts(
+    db: Session,
+    filters: Dict[str, List[str]],
+    strata: List[str],
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95
+) -> Dict:
+    """
+    Applied vs not-applied adherence overall and per stratum, with bootstrap CIs
+
+    Args:
+        db: Database session
+        filters: Normalized filters (see normalize_cohort_query)
+        strata: Normalized dimensions to stratify by
+        resamples: Bootstrap resamples per stratum
+        confidence: Confidence level of the intervals
+    """
+    rows = cohort_counts(db, filters, strata)
+
+    # stratum key -> [applied counts, not-applied counts], each (size, adherent, follow-up sum, follow-up count)
+    grouped: Dict[tuple, List[List[float]]] = {}
+    for row in rows:
+        key, is_applied = tuple(row[:len(strata)]), bool(row[len(strata)])
+        size, adherent, follow_up_sum, follow_up_count = row[len(strata) + 1:]
+        arms = grouped.setdefault(key, [[0, 0, 0.0, 0], [0, 0, 0.0, 0]])
+        # Sums can arrive as Decimal; mixing them with the float defaults breaks np.sum
+        arms[0 if is_applied else 1] = [
+            int(size), int(adherent or 0), float(follow_up_sum or 0), int(follow_up_count)
+        ]
+
+    keys = sorted(grouped, key=lambda key: tuple("" if value is None else str(value) for value in key))
+    # Row 0 is every stratum combined; the rest are the strata
+    counts = np.array(
+        [np.sum([grouped[key] for key in keys], axis=0) if keys else np.zeros((2, 4))]
+        + [grouped[key] for key in keys],
+        dtype=np.float64
+    )
+
+    n_applied, k_applied = counts[:, 0, 0], counts[:, 0, 1]
+    n_control, k_control = counts[:, 1, 0], counts[:, 1, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        differences = (k_applied / n_applied - k_control / n_control) * 100
+    lower, upper = bootstrap_difference_ci(n_applied, k_applied, n_control, k_control, resamples, confidence)
+
+    def comparison(index: int) -> Dict:
+        applied_arm, control_arm = counts[index]
+        return {
+            "cohorts": [
+                _cohort_stats(name, int(arm[0]), int(arm[1]), arm[2], int(arm[3]))
+                for name, arm in (("intervention_applied", applied_arm), ("intervention_not_applied", control_arm))
+                if arm[0]
+            ],
+            "adherence_difference": _round_or_none(differences[index]),
+            "ci_lower": _round_or_none(lower[index]),
+            "ci_upper": _round_or_none(upper[index]),
+        }
+
+    overall = comparison(0)
+    return {
+        "filters": filters,
+        "stratify_by": strata,
+        "total_patients": int(counts[0, :, 0].sum()),
+        "confidence": confidence,
+        "resamples": resamples,
+        **overall,
+        "strata": [
+            {"stratum": dict(zip(strata, key)), "size": int(counts[i + 1, :, 0].sum()), **comparison(i + 1)}
+            for i, key in enumerate(keys)
+        ] if strata else [],
+    }
+
+
+def cohort_analysis(
+    db: Session,
+    filters: Dict[str, Optional[Sequence[str]]],
+    stratify_by: Optional[Sequence[str]] = None,
+    resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95
+) -> Dict:
+    """
+    Cached analyze_cohorts() keyed by the normalized request
+
+    Raises:
+        ValueError: For unknown dimensions, or resamples/confidence out of range
+    """
+    if not 1 <= resamples <= MAX_RESAMPLES:
+        raise ValueError(f"resamples must be between 1 and {MAX_RESAMPLES}")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+
+    filters, strata = normalize_cohort_query(filters, stratify_by)
+    key = query_cache.make_key(
+        "cohort-analysis", filters=filters, strata=strata, resamples=resamples, confidence=confidence
+    )
+    return query_cache.get_or_compute(key, lambda: analyze_cohorts(db, filters, strata, resamples, confidence))
@@ -0,0 +1,259 @@
+"""
+Competitor drug mentions extracted at ingest
+
+The competitor lexicon (canonical names plus generics, brand variants and common
+misspellings) lives in competitor_drugs and is compiled into one trie-shaped
+regex, so a transcript is scanned once however many names are tracked. Every
+hit is stored in call_mentions with its offsets and speaker; analytics read
+that table instead of searching transcripts. Each call records the lexicon
+version its mentions came from, so a lexicon change can be backfilled.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models import Call, CallMention, CompetitorDrug
+from app.services.transcript_turns import UNKNOWN_SPEAKER, parse_speaker_turns
+from app.services.trigger_detection import build_trie_regex
+
+# Used until the competitor_drugs table has any rows
+DEFAULT_COMPETITORS = {
+    "humira": ["adalimumab"],
+    "enbrel": ["etanercept"],
+    "remicade": ["infliximab"],
+    "stelara": ["ustekinumab"],
+    "cosentyx": ["secukinumab"],
+    "taltz": ["ixekizumab"],
+    "skyrizi": ["risankizumab"],
+    "rinvoq": ["upadacitinib"],
+    "xeljanz": ["tofacitinib"],
+    "otezla": ["apremilast"],
+}
+
+# How long a worker uses its compiled lexicon before checking the table again
+LEXICON_REFRESH_SECONDS = 60.0
+
+
+class CompetitorMatcher:
+    """Single-pass matcher for every alias of every competitor in a lexicon"""
+
+    __slots__ = ("lexicon", "version", "_aliases", "_regex")
+
+    def __init__(self, lexicon: Dict[str, List[str]]):
+        """
+        Args:
+            lexicon: Canonical name -> aliases (the name itself always matches)
+        """
+        self.lexicon = {name.lower(): sorted({a.lower() for a in aliases if a}) for name, aliases in lexicon.items()}
+        self.version = hashlib.sha256(
+            json.dumps(self.lexicon, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()[:16]
+
+        self._aliases: Dict[str, str] = {}
+        for name, aliases in self.lexicon.items():
+            for alias in [name, *aliases]:
+                # An alias claimed by two drugs stays with the first
+                self._aliases.setdefault(alias, name)
+
+        if self._aliases:
+            self._regex = re.compile(r"\b(%s)\b" % build_trie_regex(list(self._aliases)))
+        else:
+            self._regex = re.compile("(?!)")
+
+    def find(
+        self,
+        transcript: str,
+        turns: Optional[List[List]] = None
+    ) -> List[Tuple[str, str, int, int, str]]:
+        """
+        Find every competitor mention in a transcript
+
+        Returns:
+            (drug name, matched text, start, end, speaker) in text order
+        """
+        if not transcript:
+            return []
+
+        transcript_lower = transcript.lower()
+        # Lowercasing can change the length of a few non-ASCII strings
+        if turns is None or len(transcript_lower) != len(transcript):
+            turns = parse_speaker_turns(transcript_lower)
+        turn_starts = [start for _, start, _ in turns]
+
+        mentions = []
+        for match in self._regex.finditer(transcript_lower):
+            start, end = match.span(1)
+            speaker = UNKNOWN_SPEAKER
+            index = bisect_right(turn_starts, start) - 1
+            if index >= 0 and start < turns[index][2]:
+                speaker = turns[index][0]
+            mentions.append((
+                self._aliases[match.group(1)],
+                transcript[start:end],
+                start,
+                end,
+                speaker,
+            ))
+        return mentions
+
+
+_matcher: Optional[CompetitorMatcher] = None
+_matcher_loaded_at = 0.0
+_matcher_lock = threading.Lock()
+
+
+def load_competitor_lexicon(db: Session) -> Dict[str, List[str]]:
+    """Active lexicon from the table, or the defaults while it is empty"""
+    rows = db.query(
+        CompetitorDrug.name,
+        CompetitorDrug.generic_name,
+        CompetitorDrug.aliases,
+        CompetitorDrug.is_active
+    ).all()
+    if not rows:
+        return DEFAULT_COMPETITORS
+
+    return {
+        name: [alias for alias in [generic_name, *(aliases or [])] if alias]
+        for name, generic_name, aliases, is_active in rows
+        if is_active
+    }
+
+
+def get_competitor_matcher(db: Session, refresh: bool = False) -> CompetitorMatcher:
+    """Return the compiled lexicon, reloading it from the table once it is old"""
+    global _matcher, _matcher_loaded_at
+
+    now = time.monotonic()
+    if not refresh and _matcher is not None and now - _matcher_loaded_at < LEXICON_REFRESH_SECONDS:
+        return _matcher
+
+    matcher = CompetitorMatcher(load_competitor_lexicon(db))
+    with _matcher_lock:
+        if _matcher is None or matcher.version != _matcher.version:
+            _matcher = matcher
+        _matcher_loaded_at = now
+        return _matcher
+
+
+def replace_competitor_lexicon(db: Session, competitors: List[Dict]) -> CompetitorMatcher:
+    """
+    Replace the competitor lexicon and recompile it in this worker
+
+    Args:
+        db: Database session (committed here)
+        competitors: Dicts with name, optional generic_name and aliases
+
+    Raises:
+        ValueError: If a competitor has no name or a name is repeated
+    """
+    names = [(competitor.get("name") or "").strip().lower() for competitor in competitors]
+    if not all(names):
+        raise ValueError("Every competitor needs a name")
+    if len(set(names)) != len(names):
+        raise ValueError("Competitor names must be unique")
+
+    db.query(CompetitorDrug).delete(synchronize_session=False)
+    db.add_all([
+        CompetitorDrug(
+            name=name,
+            generic_name=(competitor.get("generic_name") or "").strip().lower() or None,
+            aliases=sorted({alias.strip().lower() for alias in competitor.get("aliases") or [] if alias.strip()}),
+            is_active=competitor.get("is_active", True),
+        )
+        for name, competitor in zip(names, competitors)
+    ])
+    db.commit()
+
+    return get_competitor_matcher(db, refresh=True)
+
+
+def build_mention_rows(
+    call_id,
+    mentions: List[Tuple[str, str, int, int, str]],
+    lexicon_version: str
+) -> List[CallMention]:
+    """Convert mentions found by CompetitorMatcher.find() into table rows"""
+    return [
+        CallMention(
+            call_id=call_id,
+            drug_name=drug_name,
+            matched_text=matched_text[:100],
+            start_offset=start,
+            end_offset=end,
+            speaker=speaker,
+            lexicon_version=lexicon_version,
+        )
+        for drug_name, matched_text, start, end, speaker in mentions
+    ]
+
+
+def store_call_mentions(
+    db: Session,
+    call: Call,
+    matcher: Optional[CompetitorMatcher] = None
+) -> int:
+    """
+    Extract a call's competitor mentions and replace its stored rows
+
+    Returns:
+        Number of mentions stored
+    """
+    matcher = matcher or get_competitor_matcher(db)
+    mentions = matcher.find(call.transcript or "", call.speaker_turns)
+
+    db.query(CallMention).filter(CallMention.call_id == call.id).delete(synchronize_session=False)
+    db.add_all(build_mention_rows(call.id, mentions, matcher.version))
+    call.mention_lexicon_version = matcher.version
+    return len(mentions)
+
+
+def backfill_call_mentions(db: Session, batch_size: int = 500) -> int:
+    """
+    Extract mentions for calls never scanned or scanned with another lexicon
+
+    Batches are committed as they go, so the backfill can be interrupted and rerun.
+
+    Returns:
+        Number of calls scanned
+    """
+    matcher = get_competitor_matcher(db, refresh=True)
+    scanned = 0
+    last_id = None
+
+    while True:
+        query = db.query(Call.id, Call.transcript, Call.speaker_turns).filter(
+            Call.transcript.isnot(None),
+            or_(
+                Call.mention_lexicon_version.is_(None),
+                Call.mention_lexicon_version != matcher.version
+            )
+        )
+        if last_id is not None:
+            query = query.filter(Call.id > last_id)
+        batch = query.order_by(Call.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        call_ids = [row.id for row in batch]
+        db.query(CallMention).filter(CallMention.call_id.in_(call_ids)).delete(synchronize_session=False)
+        for row in batch:
+            db.add_all(build_mention_rows(
+                row.id, matcher.find(row.transcript, row.speaker_turns), matcher.version
+            ))
+        db.query(Call).filter(Call.id.in_(call_ids)).update(
+            {Call.mention_lexicon_version: matcher.version},
+            synchronize_session=False
+        )
+        db.commit()
+        scanned += len(batch)
+        last_id = batch[-1].id
+
+    return scanned
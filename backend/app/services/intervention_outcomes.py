@@ -0,0 +1,142 @@
+"""
+Intervention outcome statistics computed in the database
+
+Interventions without a recorded 90-day adherence outcome (and the simulated
+control group) are imputed from a hash of the intervention id and a fixed seed
+rather than random(), so a given row always imputes the same way and results
+are reproducible and cacheable. Everything is aggregated by one GROUP BY.
+"""
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import BigInteger, Float, Integer, String, case, cast, func, literal
+from sqlalchemy.orm import Session
+
+from app.models import Intervention
+
+# Changing the seed re-draws every imputed outcome
+SIMULATION_SEED = 20240101
+
+# Expected 90-day adherence by intervention type when no outcome is recorded
+IMPUTED_ADHERENCE_RATES = {
+    "copay_enrollment": 0.75,
+    "nurse_callback": 0.70,
+    "educational_material": 0.55,
+    "prior_auth_support": 0.78,
+    "home_delivery": 0.68,
+}
+DEFAULT_IMPUTED_ADHERENCE = 0.60
+
+# Adherence of the simulated control group (patients without the intervention)
+CONTROL_ADHERENCE_RATE = 0.45
+
+INTERVENTION_COSTS = {
+    "copay_enrollment": 45,
+    "nurse_callback": 75,
+    "educational_material": 15,
+    "prior_auth_support": 120,
+    "home_delivery": 25,
+}
+
+# Assumed annual revenue per adherent patient
+REVENUE_PER_PATIENT = 150000
+
+_MAX_BIGINT = 2 ** 63 - 1
+
+
+def seeded_uniform(column, salt: str):
+    """
+    SQL expression giving a deterministic uniform [0, 1) draw per row
+
+    Args:
+        column: Row identity to hash (e.g. Intervention.id)
+        salt: Distinguishes independent draws for the same row
+    """
+    hashed = func.hashtextextended(cast(column, String) + literal(":" + salt), SIMULATION_SEED)
+    return cast(hashed.op("&")(cast(literal(_MAX_BIGINT), BigInteger)), Float) / float(2 ** 63)
+
+
+def type_adherence_rate(intervention_type_column):
+    """SQL expression giving IMPUTED_ADHERENCE_RATES for an intervention type column"""
+    return case(IMPUTED_ADHERENCE_RATES, value=intervention_type_column, else_=DEFAULT_IMPUTED_ADHERENCE)
+
+
+def imputed_adherence(rate):
+    """
+    SQL 0/1 adherence: the recorded 90-day outcome, else a seeded draw at rate
+
+    Args:
+        rate: Adherence probability (number or SQL expression) for rows without an outcome
+    """
+    return case(
+        (Intervention.adherence_90_day.isnot(None), cast(Intervention.adherence_90_day, Integer)),
+        (seeded_uniform(Intervention.id, "adherence") < rate, 1),
+        else_=0
+    )
+
+
+def intervention_effectiveness(db: Session, start: datetime, end: datetime) -> Dict:
+    """
+    Adherence, retention and ROI per intervention type for interventions created in a window
+
+    The "without intervention" rate is a simulated control group of the same size
+    as the intervention group, drawn at CONTROL_ADHERENCE_RATE.
+
+    Returns:
+        Dict with summary and by_intervention_type (sorted by improvement)
+    """
+    control_adherent = case((seeded_uniform(Intervention.id, "control") < CONTROL_ADHERENCE_RATE, 1), else_=0)
+
+    rows = db.query(
+        Intervention.intervention_type,
+        func.count(Intervention.id),
+        func.count(func.distinct(Intervention.patient_id)),
+        func.sum(imputed_adherence(type_adherence_rate(Intervention.intervention_type))),
+        func.sum(control_adherent)
+    ).filter(
+        Intervention.created_at >= start,
+        Intervention.created_at <= end,
+        Intervention.intervention_type.in_(list(INTERVENTION_COSTS))
+    ).group_by(Intervention.intervention_type).all()
+
+    results: List[Dict] = []
+    for intervention_type, total, unique_patients, adherent_with, adherent_without in rows:
+        adherence_rate_with = adherent_with / total * 100
+        adherence_rate_without = adherent_without / total * 100
+        improvement = adherence_rate_with - adherence_rate_without
+
+        cost_per_intervention = INTERVENTION_COSTS[intervention_type]
+        patients_retained = (adherent_with - adherent_without)
+        revenue_saved = patients_retained * REVENUE_PER_PATIENT
+        cost = total * cost_per_intervention
+        roi = ((revenue_saved - cost) / cost * 100) if cost > 0 else 0
+
+        results.append({
+            "intervention_type": intervention_type,
+            "total_interventions": total,
+            "unique_patients": unique_patients,
+            "adherence_rate_with_intervention": round(adherence_rate_with, 1),
+            "adherence_rate_without_intervention": round(adherence_rate_without, 1),
+            "improvement_percentage": round(improvement, 1),
+            "patients_retained": round(patients_retained, 1),
+            "revenue_saved": round(revenue_saved, 2),
+            "total_cost": round(cost, 2),
+            "roi_percentage": round(roi, 1),
+            "cost_per_intervention": cost_per_intervention,
+        })
+
+    results.sort(key=lambda x: (-x["improvement_percentage"], x["intervention_type"]))
+
+    total_revenue_saved = sum(r["revenue_saved"] for r in results)
+    total_cost = sum(r["total_cost"] for r in results)
+    total_interventions = sum(r["total_interventions"] for r in results)
+
+    return {
+        "summary": {
+            "total_interventions": total_interventions,
+            "total_revenue_saved": round(total_revenue_saved, 2),
+            "total_cost": round(total_cost, 2),
+            "overall_roi": round(((total_revenue_saved - total_cost) / total_cost * 100) if total_cost > 0 else 0, 1),
+        },
+        "by_intervention_type": results,
+    }
@@ -0,0 +1,399 @@
+"""
+Shared gateway for LLM marketing-content analysis
+
+Both the FastAPI endpoint and the serverless handler in api/ build the prompt
+and call the model through this module. Completions go through one pooled
+AsyncOpenAI client per event loop, are cached by a hash of the prompt, model and
+PROMPT_VERSION, and identical requests already in flight are coalesced so only
+one of them reaches the model. LLM_BACKEND=stub swaps in a deterministic local
+backend for offline development and tests.
+"""
+import asyncio
+import json
+import re
+import weakref
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.services.analysis_cache import get_analysis_cache
+
+# Bump whenever the prompt or its expected output changes, to bypass old cache entries
+PROMPT_VERSION = "marketing-topics-v1"
+
+PATIENT_BARRIERS = [
+    {'name': 'Cost & Insurance Support', 'keywords': 'affordability, cost, pricing, insurance, copay, financial assistance, patient assistance programs'},
+    {'name': 'Injection Support & Training', 'keywords': 'injection, self-administration, needle anxiety, injection training, how to inject'},
+    {'name': 'Side Effects Management', 'keywords': 'side effects, adverse events, safety, tolerability, what to expect'},
+    {'name': 'Access & Logistics', 'keywords': 'access, availability, delivery, logistics, pharmacy, specialty pharmacy'},
+    {'name': 'Efficacy & Clinical Results', 'keywords': 'efficacy, effectiveness, clinical trials, results, outcomes, benefits'},
+    {'name': 'Dosing & Convenience', 'keywords': 'dosing, dosing schedule, convenience, frequency, administration'}
+]
+
+# Rough tokens per whitespace-separated word for English web copy
+TOKENS_PER_WORD = 1.4
+
+SYSTEM_PROMPT = "You are a marketing analyst that helps pharmaceutical companies understand how well their marketing aligns with patient needs. Always respond with valid JSON only."
+
+
+class LLMError(Exception):
+    """The model could not be reached or returned something unusable"""
+
+
+class LLMNotConfiguredError(LLMError):
+    """No API key is configured for the selected backend"""
+
+
+def build_marketing_prompt(website_contents: List[str], total_words: int) -> str:
+    """Prompt asking for the topic distribution of website content"""
+    return f"""You are analyzing pharmaceutical website content. Determine what percentage of the content focuses on each category below.
+
+CRITICAL INSTRUCTIONS:
+1. Read the website content VERY carefully
+2. The percentages MUST add up to approximately 100%
+3. If a category is not mentioned AT ALL, use 0%
+4. Be REALISTIC - don't inflate numbers
+
+CATEGORIES TO ANALYZE:
+
+1. Cost & Insurance Support ({PATIENT_BARRIERS[0]['keywords']})
+   - Look for: patient assistance programs, copay cards, financial help, eligibility for assistance, affordability programs, insurance coverage, cost reduction, "cares" programs, application for financial aid
+   - If the website is primarily about applying for financial assistance or a patient assistance program, this should be 80-90%
+
+2. Injection Support & Training ({PATIENT_BARRIERS[1]['keywords']})
+   - Look for: how to inject, injection techniques, self-administration guides, overcoming fear of needles, injection tutorials
+
+3. Side Effects Management ({PATIENT_BARRIERS[2]['keywords']})
+   - Look for: managing side effects, what to expect, adverse events, safety information, dealing with reactions
+
+4. Access & Logistics ({PATIENT_BARRIERS[3]['keywords']})
+   - Look for: where to get medication, pharmacy information, delivery, prescription fulfillment
+
+5. Efficacy & Clinical Results ({PATIENT_BARRIERS[4]['keywords']})
+   - Look for: how well the drug works, clinical trial data, effectiveness, treatment outcomes, scientific evidence
+
+6. Dosing & Convenience ({PATIENT_BARRIERS[5]['keywords']})
+   - Look for: how often to take/inject, dosing schedule, treatment regimen
+
+WEBSITE CONTENT TO ANALYZE:
+{chr(10).join(website_contents)}
+
+EXAMPLES:
+- If website is a patient assistance program (e.g., "LillyCares", "JanssenCares"), use ~85% Cost Support
+- If website is about clinical trials/efficacy, use ~60-70% Efficacy
+- If website is an injection training portal, use ~70-80% Injection Support
+
+Return ONLY valid JSON (no other text):
+{{
+  "topics": [
+    {{"name": "Cost & Insurance Support", "percentage": 85}},
+    {{"name": "Injection Support & Training", "percentage": 0}},
+    {{"name": "Side Effects Management", "percentage": 5}},
+    {{"name": "Access & Logistics", "percentage": 10}},
+    {{"name": "Efficacy & Clinical Results", "percentage": 0}},
+    {{"name": "Dosing & Convenience", "percentage": 0}}
+  ],
+  "total_words": {total_words}
+}}"""
+
+
+def chunk_website_content(website_contents: List[str], max_tokens: int) -> List[str]:
+    """
+    Split website content into chunks that each fit a token budget
+
+    Paragraphs are kept whole where they fit; a paragraph longer than the budget
+    is split on word boundaries.
+
+    Args:
+        website_contents: Page texts of one site
+        max_tokens: Approximate token budget per chunk
+
+    Returns:
+        Non-empty chunks in document order
+    """
+    max_words = max(1, int(max_tokens / TOKENS_PER_WORD))
+    chunks: List[str] = []
+    current: List[str] = []
+    current_words = 0
+
+    def flush():
+        nonlocal current, current_words
+        if current:
+            chunks.append("\n\n".join(current))
+        current, current_words = [], 0
+
+    for content in website_contents:
+        for paragraph in re.split(r"\n\s*\n", content or ""):
+            words = paragraph.split()
+            if not words:
+                continue
+            if current_words + len(words) > max_words:
+                flush()
+            while len(words) > max_words:
+                chunks.append(" ".join(words[:max_words]))
+                words = words[max_words:]
+            current.append(" ".join(words))
+            current_words += len(words)
+    flush()
+    return chunks
+
+
+def merge_topic_distributions(analyses: List[Dict]) -> Dict:
+    """
+    Combine chunk-level analyses into one, weighting percentages by word count
+
+    Args:
+        analyses: Results of LLMGateway.analyze_marketing_content, one per chunk
+
+    Returns:
+        Dict with topics (in PATIENT_BARRIERS order, then any others) and total_words
+    """
+    total_words = sum(analysis["total_words"] for analysis in analyses)
+    weighted: Dict[str, float] = {barrier["name"]: 0.0 for barrier in PATIENT_BARRIERS}
+    for analysis in analyses:
+        weight = analysis["total_words"] / total_words if total_words else 1 / len(analyses)
+        for topic in analysis["topics"]:
+            weighted[topic["name"]] = weighted.get(topic["name"], 0.0) + topic["percentage"] * weight
+
+    return {
+        "topics": [{"name": name, "percentage": round(percentage, 1)} for name, percentage in weighted.items()],
+        "total_words": total_words,
+    }
+
+
+class OpenAIBackend:
+    """Chat completions through a pooled AsyncOpenAI client (one per event loop)"""
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str], model: str, temperature: float = 0.7):
+        self.api_key = api_key
+        self.model = model
+        self.temperature = temperature
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.api_key) and not self.api_key.startswith("sk-mock")
+
+    def _client(self):
+        if not self.is_configured:
+            raise LLMNotConfiguredError("OpenAI API key not configured")
+
+        # httpx connection pools belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = self._clients[loop] = AsyncOpenAI(api_key=self.api_key)
+        return client
+
+    async def complete(self, system: str, prompt: str) -> str:
+        completion = await self._client().chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=self.temperature,
+            response_format={"type": "json_object"}
+        )
+        return completion.choices[0].message.content or ""
+
+
+class StubBackend:
+    """
+    Offline backend that scores the prompt's website content by category keywords
+
+    Deterministic, so it is suitable for tests and local development.
+    """
+
+    name = "stub"
+    model = "stub"
+    is_configured = True
+
+    _content_pattern = re.compile(r"WEBSITE CONTENT TO ANALYZE:\n(.*)\n\nEXAMPLES:", re.DOTALL)
+    _total_words_pattern = re.compile(r'"total_words": (\d+)\s*\}\s*$')
+
+    async def complete(self, system: str, prompt: str) -> str:
+        content_match = self._content_pattern.search(prompt)
+        content = (content_match.group(1) if content_match else prompt).lower()
+        words_match = self._total_words_pattern.search(prompt)
+
+        scores = []
+        for barrier in PATIENT_BARRIERS:
+            keywords = [keyword.strip() for keyword in barrier["keywords"].split(",")]
+            scores.append(sum(content.count(keyword) for keyword in keywords if keyword))
+
+        total = sum(scores)
+        topics = [
+            {
+                "name": barrier["name"],
+                "percentage": round(score / total * 100, 1) if total else 0,
+            }
+            for barrier, score in zip(PATIENT_BARRIERS, scores)
+        ]
+        return json.dumps({
+            "topics": topics,
+            "total_words": int(words_match.group(1)) if words_match else len(content.split()),
+        })
+
+
+class LLMGateway:
+    """Cached, coalescing front for one LLM backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        # One completion task per (event loop, cache key), and how many callers await it
+        self._in_flight: Dict[str, "asyncio.Task"] = {}
+        self._waiters: Dict[str, int] = {}
+
+    async def complete_json(self, system: str, prompt: str) -> Dict:
+        """
+        Run a JSON completion, served from cache or a matching in-flight request when possible
+
+        The completion runs in its own task that every caller awaits through
+        asyncio.shield, so a cancelled caller never cancels the others; the task
+        is only cancelled once no caller is waiting for it.
+
+        Raises:
+            LLMError: If the backend fails or returns invalid JSON
+        """
+        cache = get_analysis_cache()
+        key = cache.make_key(
+            "llm", prompt, PROMPT_VERSION, system=system, backend=self.backend.name, model=self.backend.model
+        )
+
+        cached = await self._cache_call(cache.get, key)
+        if cached is not None:
+            return cached
+
+        flight_key = f"{id(asyncio.get_running_loop())}:{key}"
+        task = self._in_flight.get(flight_key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._complete_and_cache(system, prompt, key))
+            self._in_flight[flight_key] = task
+            task.add_done_callback(lambda done: self._finish_flight(flight_key, done))
+
+        self._waiters[flight_key] = self._waiters.get(flight_key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[flight_key] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[flight_key] -= 1
+            if not self._waiters[flight_key]:
+                del self._waiters[flight_key]
+
+    def _finish_flight(self, flight_key: str, task: "asyncio.Task") -> None:
+        if self._in_flight.get(flight_key) is task:
+            del self._in_flight[flight_key]
+        # Waiters that were cancelled never retrieve the outcome; don't warn about it
+        if not task.cancelled():
+            task.exception()
+
+    async def _complete_and_cache(self, system: str, prompt: str, key: str) -> Dict:
+        result = await self._complete(system, prompt)
+        await self._cache_call(get_analysis_cache().set, key, result)
+        return result
+
+    async def _complete(self, system: str, prompt: str) -> Dict:
+        try:
+            response_text = await self.backend.complete(system, prompt)
+        except LLMError:
+            raise
+        except Exception as e:
+            raise LLMError(str(e)) from e
+
+        if not response_text:
+            raise LLMError("Model returned an empty response")
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError as e:
+            raise LLMError(f"Model returned invalid JSON: {e}") from e
+
+    @staticmethod
+    async def _cache_call(method, *args):
+        # Keep the event loop free while the shared tier is queried over the network
+        if get_analysis_cache().redis_enabled:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def analyze_marketing_content(self, website_contents: List[str], total_words: int) -> Dict:
+        """
+        Topic distribution of website content across PATIENT_BARRIERS
+
+        Returns:
+            Dict with topics ([{name, percentage}]) and total_words
+        """
+        analysis = await self.complete_json(SYSTEM_PROMPT, build_marketing_prompt(website_contents, total_words))
+        return {
+            "topics": [
+                {"name": topic["name"], "percentage": topic["percentage"]}
+                for topic in analysis.get("topics", [])
+            ],
+            "total_words": analysis.get("total_words", total_words),
+        }
+
+    async def analyze_website(
+        self,
+        website_contents: List[str],
+        semaphore: Optional[asyncio.Semaphore] = None,
+        max_tokens: Optional[int] = None
+    ) -> Dict:
+        """
+        Topic distribution of one site of any size
+
+        Content is split into chunks of at most max_tokens, the chunks are analyzed
+        concurrently (bounded by semaphore) and merged by word count. The first
+        failing chunk cancels the rest and its error is raised.
+
+        Returns:
+            Dict with topics, total_words and chunks (number of model calls)
+        """
+        chunks = chunk_website_content(website_contents, max_tokens or settings.LLM_CHUNK_TOKENS)
+        if not chunks:
+            return {**merge_topic_distributions([]), "chunks": 0}
+
+        async def analyze_chunk(chunk: str) -> Dict:
+            words = len(chunk.split())
+            if semaphore is None:
+                analysis = await self.analyze_marketing_content([chunk], words)
+            else:
+                async with semaphore:
+                    analysis = await self.analyze_marketing_content([chunk], words)
+            # Weight by what was actually sent, not the model's echo of it
+            return {**analysis, "total_words": words}
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                tasks = [group.create_task(analyze_chunk(chunk)) for chunk in chunks]
+        except ExceptionGroup as e:
+            # Surface the first chunk's error as the gateway's own (LLMError etc.)
+            raise e.exceptions[0] from None
+
+        analyses = [task.result() for task in tasks]
+        return {**merge_topic_distributions(analyses), "chunks": len(chunks)}
+
+
+def create_backend(name: Optional[str] = None):
+    """Backend selected by name or settings.LLM_BACKEND"""
+    name = name or settings.LLM_BACKEND
+    if name == "stub":
+        return StubBackend()
+    if name == "openai":
+        return OpenAIBackend(settings.OPENAI_API_KEY, settings.LLM_MODEL)
+    raise ValueError(f"Unknown LLM backend {name!r}")
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Return the process-wide gateway for the configured backend"""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway(create_backend())
+    return _gateway
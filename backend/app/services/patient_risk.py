@@ -0,0 +1,271 @@
+"""
+Materialized patient abandonment risk
+
+patient_risk_scores holds one row per patient, computed from the stored trigger
+rows of the patient's most recent calls. Rows are refreshed for just the affected
+patients whenever a call is stored or re-analyzed (or a patient's SDOH score
+changes), so risk lookups and high-risk rankings are plain indexed reads. Each
+refresh is set-based: a window function picks every affected patient's latest
+calls in one query and the results are upserted in one statement.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Call, CallTriggerAnalysis, Patient, PatientRiskScore
+from app.services.trigger_detection import calculate_abandonment_risk
+
+# Calls per patient that count towards the risk score
+RECENT_CALLS_PER_PATIENT = 5
+
+HIGH_RISK_THRESHOLD = 60
+
+# Risk of a patient with no calls yet
+NO_CALLS_RISK = (20, "low")
+
+
+def _risk_row(patient_id: UUID, sdoh_risk_score: Optional[int], calls: Dict) -> Dict:
+    """Build a patient_risk_scores row from the patient's recent calls and their triggers"""
+    if not calls["call_count"]:
+        risk_score, risk_level = NO_CALLS_RISK
+    else:
+        risk_score, risk_level = calculate_abandonment_risk(
+            calls["triggers"],
+            {
+                "sdoh_risk_score": sdoh_risk_score or 0,
+                "prior_abandonments": 0,
+                "missed_appointments": 0,
+            }
+        )
+
+    breakdown = {}
+    for trigger in calls["triggers"]:
+        entry = breakdown.setdefault(trigger["trigger_type"], {
+            "count": 0,
+            "avg_confidence": 0,
+            "severity": trigger["severity"],
+        })
+        entry["count"] += 1
+        entry["avg_confidence"] += trigger["confidence"] or 0
+    for entry in breakdown.values():
+        entry["avg_confidence"] = round(entry["avg_confidence"] / entry["count"], 2)
+
+    return {
+        "patient_id": patient_id,
+        "risk_score": risk_score,
+        "risk_level": risk_level,
+        "trigger_breakdown": breakdown,
+        "trigger_count": len(calls["triggers"]),
+        "call_count": calls["call_count"],
+        "last_call_date": calls["last_call_date"],
+        "computed_at": datetime.utcnow(),
+    }
+
+
+def compute_patient_risk(db: Session, patient_ids: Iterable[UUID]) -> List[Dict]:
+    """
+    Compute patient_risk_scores rows for some patients without storing them
+
+    Pending trigger rows in the session are flushed first so they are counted.
+
+    Returns:
+        One row per existing patient
+    """
+    patient_ids = list(set(patient_ids))
+    if not patient_ids:
+        return []
+    db.flush()
+
+    ranked_calls = db.query(
+        Call.id.label("call_id"),
+        Call.patient_id.label("patient_id"),
+        Call.call_date.label("call_date"),
+        func.row_number().over(
+            partition_by=Call.patient_id,
+            order_by=(Call.call_date.desc(), Call.id.desc())
+        ).label("call_rank"),
+        func.count().over(partition_by=Call.patient_id).label("call_count"),
+    ).filter(Call.patient_id.in_(patient_ids)).subquery()
+
+    rows = db.query(
+        ranked_calls.c.patient_id,
+        ranked_calls.c.call_rank,
+        ranked_calls.c.call_count,
+        ranked_calls.c.call_date,
+        CallTriggerAnalysis.trigger_type,
+        CallTriggerAnalysis.confidence,
+        CallTriggerAnalysis.severity,
+    ).outerjoin(
+        CallTriggerAnalysis, CallTriggerAnalysis.call_id == ranked_calls.c.call_id
+    ).filter(
+        ranked_calls.c.call_rank <= RECENT_CALLS_PER_PATIENT
+    ).order_by(
+        ranked_calls.c.patient_id, ranked_calls.c.call_rank, CallTriggerAnalysis.rank
+    ).all()
+
+    calls_by_patient: Dict[UUID, Dict] = {}
+    for patient_id, call_rank, call_count, call_date, trigger_type, confidence, severity in rows:
+        calls = calls_by_patient.setdefault(patient_id, {
+            "call_count": call_count,
+            "last_call_date": None,
+            "triggers": [],
+        })
+        if call_rank == 1:
+            calls["last_call_date"] = call_date
+        if trigger_type is not None:
+            calls["triggers"].append({
+                "trigger_type": trigger_type,
+                "confidence": confidence,
+                "severity": severity,
+            })
+
+    no_calls = {"call_count": 0, "last_call_date": None, "triggers": []}
+    return [
+        _risk_row(patient_id, sdoh_risk_score, calls_by_patient.get(patient_id, no_calls))
+        for patient_id, sdoh_risk_score in db.query(Patient.id, Patient.sdoh_risk_score).filter(
+            Patient.id.in_(patient_ids)
+        )
+    ]
+
+
+def refresh_patient_risk(db: Session, patient_ids: Iterable[UUID]) -> int:
+    """
+    Recompute and upsert the stored risk of some patients
+
+    Args:
+        db: Database session (the caller commits)
+        patient_ids: Patients to refresh
+
+    Returns:
+        Number of patients refreshed
+    """
+    values = compute_patient_risk(db, patient_ids)
+    if not values:
+        return 0
+
+    statement = insert(PatientRiskScore).values(values)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[PatientRiskScore.patient_id],
+        set_={
+            column: statement.excluded[column]
+            for column in (
+                "risk_score", "risk_level", "trigger_breakdown", "trigger_count",
+                "call_count", "last_call_date", "computed_at",
+            )
+        }
+    ))
+    return len(values)
+
+
+def refresh_patient_risk_for_calls(db: Session, call_ids: Iterable[UUID]) -> int:
+    """Refresh the stored risk of every patient owning one of these calls"""
+    call_ids = list(call_ids)
+    if not call_ids:
+        return 0
+
+    patient_ids = [
+        patient_id for patient_id, in db.query(Call.patient_id).filter(
+            Call.id.in_(call_ids)
+        ).distinct()
+    ]
+    return refresh_patient_risk(db, patient_ids)
+
+
+def backfill_patient_risk(db: Session, batch_size: int = 1000) -> int:
+    """
+    Recompute the stored risk of every patient, committing batch by batch
+
+    Returns:
+        Number of patients refreshed
+    """
+    refreshed = 0
+    last_id = None
+
+    while True:
+        query = db.query(Patient.id)
+        if last_id is not None:
+            query = query.filter(Patient.id > last_id)
+        batch = [patient_id for patient_id, in query.order_by(Patient.id).limit(batch_size)]
+        if not batch:
+            break
+
+        refreshed += refresh_patient_risk(db, batch)
+        db.commit()
+        last_id = batch[-1]
+
+    return refreshed
+
+
+def get_stored_patient_risk(db: Session, patient_id: UUID) -> Optional[PatientRiskScore]:
+    """
+    Return a patient's stored risk row
+
+    A missing row is computed but not stored (read paths never write); the
+    refresh on call storage and backfill-patient-risk fill it in.
+    """
+    risk = db.get(PatientRiskScore, patient_id)
+    if risk is None:
+        rows = compute_patient_risk(db, [patient_id])
+        if rows:
+            risk = PatientRiskScore(**rows[0])
+    return risk
+
+
+def rank_high_risk_patients(
+    db: Session,
+    limit: int = 50,
+    min_risk_score: int = HIGH_RISK_THRESHOLD,
+    after_risk_score: Optional[int] = None,
+    after_patient_id: Optional[UUID] = None
+) -> List[Dict]:
+    """
+    Rank active patients by stored abandonment risk
+
+    Args:
+        db: Database session
+        limit: Page size
+        min_risk_score: Only patients scoring at least this much
+        after_risk_score: Keyset cursor: risk_score of the previous page's last row
+        after_patient_id: Keyset cursor: patient_id of the previous page's last row
+
+    Returns:
+        Patients ordered by (risk_score desc, patient_id)
+    """
+    query = db.query(Patient, PatientRiskScore).join(
+        PatientRiskScore, PatientRiskScore.patient_id == Patient.id
+    ).filter(
+        Patient.status == "active",
+        PatientRiskScore.risk_score >= min_risk_score
+    )
+
+    if after_risk_score is not None and after_patient_id is not None:
+        query = query.filter(or_(
+            PatientRiskScore.risk_score < after_risk_score,
+            and_(
+                PatientRiskScore.risk_score == after_risk_score,
+                PatientRiskScore.patient_id > after_patient_id
+            )
+        ))
+
+    rows = query.order_by(
+        PatientRiskScore.risk_score.desc(), PatientRiskScore.patient_id
+    ).limit(limit).all()
+
+    return [
+        {
+            "patient_id": str(patient.id),
+            "mrn": patient.mrn,
+            "name": f"{patient.first_name} {patient.last_name}",
+            "risk_score": risk.risk_score,
+            "risk_level": risk.risk_level,
+            "trigger_count": risk.trigger_count,
+            "sdoh_risk_score": patient.sdoh_risk_score,
+            "journey_stage": patient.journey_stage,
+            "last_contact": patient.last_contact_date.isoformat() if patient.last_contact_date else None,
+        }
+        for patient, risk in rows
+    ]
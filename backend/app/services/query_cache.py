@@ -0,0 +1,83 @@
+"""
+Short-lived in-process cache for aggregate query results
+
+Analytics endpoints whose answer only depends on their (normalized) parameters
+and slowly changing tables cache the finished response for a few minutes. Keys
+include the active ruleset version where results depend on stored triggers, so
+a ruleset change never serves numbers computed under the old rules. Entries
+are deep-copied in and out, so a caller that mutates a result it was handed
+never changes what other requests see.
+"""
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class QueryCache:
+    """
+    Thread-safe LRU of computed results with a per-entry time to live
+
+    Args:
+        ttl_seconds: How long a result is served before it is recomputed
+        max_entries: Entries kept before the least recently used is dropped
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(namespace: str, **params) -> str:
+        """Key from a namespace and JSON-able params (order-insensitive)"""
+        return namespace + ":" + json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached result, or None if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache a copy of a result for ttl_seconds"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return a copy of the cached result, or compute, cache and return it"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+query_cache = QueryCache(ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS)
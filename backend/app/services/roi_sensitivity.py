@@ -0,0 +1,179 @@
+"""
+Vectorized ROI scenarios for the outcomes calculator
+
+roi_metrics() evaluates the ROI model on scalars or NumPy arrays alike, so the
+single-scenario calculator and the sensitivity sweep share one formula. A sweep
+broadcasts the ranges of every parameter against each other and evaluates the
+whole Cartesian product in one pass.
+"""
+from typing import Dict, Tuple
+
+import numpy as np
+
+# Swept parameters, in grid axis order
+SWEEP_PARAMETERS = (
+    "intervention_cost",
+    "baseline_adherence",
+    "intervention_adherence",
+    "annual_revenue_per_patient",
+)
+
+# Upper bound on scenarios evaluated by one sweep
+MAX_GRID_POINTS = 5_000_000
+
+MAX_STEPS_PER_PARAMETER = 1000
+
+
+def roi_metrics(
+    interventions_count,
+    intervention_cost,
+    baseline_adherence,
+    intervention_adherence,
+    annual_revenue_per_patient
+) -> Dict[str, np.ndarray]:
+    """
+    ROI model over scalars or broadcastable arrays
+
+    Adherence values are percentages; payback is in months (0 when there is no benefit).
+    """
+    patients_retained = interventions_count * ((np.asarray(intervention_adherence) - baseline_adherence) / 100)
+    revenue_saved = patients_retained * annual_revenue_per_patient
+    total_cost = interventions_count * np.asarray(intervention_cost, dtype=np.float64)
+    net_benefit = revenue_saved - total_cost
+    monthly_benefit = revenue_saved / 12
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi_percentage = np.where(total_cost > 0, net_benefit / total_cost * 100, 0.0)
+        payback_months = np.where(monthly_benefit > 0, total_cost / monthly_benefit, 0.0)
+
+    return {
+        "patients_retained": patients_retained,
+        "revenue_saved": revenue_saved,
+        "total_cost": total_cost,
+        "net_benefit": net_benefit,
+        "roi_percentage": roi_percentage,
+        "payback_period_months": payback_months,
+    }
+
+
+def parameter_values(minimum: float, maximum: float, steps: int) -> np.ndarray:
+    """
+    Evenly spaced values of one swept parameter
+
+    Raises:
+        ValueError: If steps is out of range or maximum < minimum
+    """
+    if not 1 <= steps <= MAX_STEPS_PER_PARAMETER:
+        raise ValueError(f"steps must be between 1 and {MAX_STEPS_PER_PARAMETER}")
+    if maximum < minimum:
+        raise ValueError("max must not be less than min")
+    return np.linspace(minimum, maximum, steps)
+
+
+def _nearest_index(values: np.ndarray, target: float) -> int:
+    return int(np.abs(values - target).argmin())
+
+
+def roi_sensitivity(
+    interventions_count: int,
+    ranges: Dict[str, Tuple[float, float, int]],
+    base: Dict[str, float],
+    heatmap_axes: Tuple[str, str] = ("intervention_cost", "intervention_adherence")
+) -> Dict:
+    """
+    Evaluate every combination of the swept parameters
+
+    Args:
+        interventions_count: Interventions per scenario
+        ranges: Parameter -> (min, max, steps) for each of SWEEP_PARAMETERS
+        base: Parameter -> base-case value, used for the tornado chart and to
+            slice the heatmap along the axes not shown
+        heatmap_axes: (x, y) parameters of the heatmaps
+
+    Raises:
+        ValueError: For unknown parameters, bad ranges or too large a grid
+
+    Returns:
+        Dict with axes, heatmap (ROI at base values of the other parameters and
+        share of scenarios with positive ROI), summary over the full grid, base
+        case and tornado sensitivities sorted by swing
+    """
+    x_axis, y_axis = heatmap_axes
+    if x_axis not in SWEEP_PARAMETERS or y_axis not in SWEEP_PARAMETERS or x_axis == y_axis:
+        raise ValueError(f"heatmap axes must be two different parameters of {', '.join(SWEEP_PARAMETERS)}")
+
+    axes = {name: parameter_values(*ranges[name]) for name in SWEEP_PARAMETERS}
+    grid_points = int(np.prod([len(values) for values in axes.values()]))
+    if grid_points > MAX_GRID_POINTS:
+        raise ValueError(f"Grid has {grid_points} scenarios; the limit is {MAX_GRID_POINTS}")
+
+    # One axis per parameter: shape (cost, baseline, intervention, revenue)
+    dimensions = len(SWEEP_PARAMETERS)
+    shaped = [
+        axes[name].reshape([-1 if i == axis else 1 for i in range(dimensions)])
+        for axis, name in enumerate(SWEEP_PARAMETERS)
+    ]
+    roi = roi_metrics(interventions_count, *shaped)["roi_percentage"]
+    roi = np.broadcast_to(roi, [len(axes[name]) for name in SWEEP_PARAMETERS])
+
+    # Heatmap: y rows by x columns, other parameters at the grid point nearest their base value
+    x_index, y_index = SWEEP_PARAMETERS.index(x_axis), SWEEP_PARAMETERS.index(y_axis)
+    selector = [
+        slice(None) if axis in (x_index, y_index) else _nearest_index(axes[name], base[name])
+        for axis, name in enumerate(SWEEP_PARAMETERS)
+    ]
+    roi_slice = roi[tuple(selector)]
+    if x_index < y_index:
+        roi_slice = roi_slice.T
+    other_axes = tuple(axis for axis in range(dimensions) if axis not in (x_index, y_index))
+    share_positive = (roi > 0).mean(axis=other_axes)
+    if x_index < y_index:
+        share_positive = share_positive.T
+
+    base_metrics = roi_metrics(interventions_count, *(base[name] for name in SWEEP_PARAMETERS))
+    base_roi = float(base_metrics["roi_percentage"])
+
+    # Tornado: ROI with one parameter at each end of its range, the rest at base
+    tornado = []
+    for name in SWEEP_PARAMETERS:
+        low, high = axes[name][0], axes[name][-1]
+        values = np.array([low, high])
+        scenario = [values if other == name else base[other] for other in SWEEP_PARAMETERS]
+        roi_low, roi_high = roi_metrics(interventions_count, *scenario)["roi_percentage"]
+        tornado.append({
+            "parameter": name,
+            "low_value": float(low),
+            "high_value": float(high),
+            "roi_at_low": round(float(roi_low), 1),
+            "roi_at_high": round(float(roi_high), 1),
+            "swing": round(abs(float(roi_high - roi_low)), 1),
+        })
+    tornado.sort(key=lambda entry: entry["swing"], reverse=True)
+
+    percentiles = np.percentile(roi, [5, 25, 50, 75, 95])
+    return {
+        "axes": {name: np.round(values, 4).tolist() for name, values in axes.items()},
+        "heatmap": {
+            "x": x_axis,
+            "y": y_axis,
+            "fixed_at": {
+                name: float(axes[name][selector[axis]])
+                for axis, name in enumerate(SWEEP_PARAMETERS)
+                if axis not in (x_index, y_index)
+            },
+            "roi_percentage": np.round(roi_slice, 1).tolist(),
+            "share_positive_roi": np.round(share_positive, 4).tolist(),
+        },
+        "summary": {
+            "scenarios": grid_points,
+            "min_roi": round(float(roi.min()), 1),
+            "max_roi": round(float(roi.max()), 1),
+            "share_positive_roi": round(float((roi > 0).mean()), 4),
+            "roi_percentiles": dict(zip(("p5", "p25", "p50", "p75", "p95"), np.round(percentiles, 1).tolist())),
+        },
+        "base_case": {
+            "inputs": dict(base),
+            "roi_percentage": round(base_roi, 1),
+        },
+        "tornado": tornado,
+    }
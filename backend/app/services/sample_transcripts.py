@@ -0,0 +1,126 @@
+"""
+Realistic call transcripts used to generate mock calls and benchmark corpora
+"""
+
+SAMPLE_TRANSCRIPTS = [
+    {
+        "transcript": "AI: Good morning! This is PharmAI calling about your Humira prescription. Is this a good time to talk? Patient: Yes, hi. I've been waiting for this call. AI: Great! I see your prior authorization was approved yesterday. Your medication will be delivered to your home within 2 days. Patient: Oh wonderful! I was so worried about the cost. AI: You're enrolled in our copay assistance program, so your out-of-pocket cost will be just $5. Patient: That's amazing, thank you so much!",
+        "sentiment": 0.9,
+        "friction": [],
+        "outcome": "resolved",
+        "barriers": [],
+        "programs": ["copay_assistance"]
+    },
+    {
+        "transcript": "AI: Hi, I'm calling to check on your medication adherence. How have you been doing with taking your Ozempic? Patient: Honestly, I've been missing doses. I keep forgetting. AI: I understand. Would you like me to set up daily text reminders? Patient: Yes, that would help a lot. AI: Perfect. I've also noticed your pharmacy is 25 miles away. Would home delivery make it easier? Patient: Absolutely! I didn't know that was an option. AI: Let me enroll you right now.",
+        "sentiment": 0.7,
+        "friction": ["Refill Problems"],
+        "outcome": "resolved",
+        "barriers": ["transportation", "health_literacy"],
+        "programs": []
+    },
+    {
+        "transcript": "Patient: I'm calling because my insurance denied my prescription! AI: I'm sorry to hear that. Let me look into this. Can you tell me which medication? Patient: It's Keytruda for my cancer treatment. AI: I see the issue. Your insurance requires step therapy - they want you to try a different medication first. Patient: But my doctor specifically prescribed this one! AI: I completely understand your frustration. Let me help you file a medical exception with your doctor's support. This usually takes 3-5 business days. Patient: Okay, please do whatever you can. I'm really worried.",
+        "sentiment": 0.3,
+        "friction": ["PA Delays", "Insurance Questions"],
+        "outcome": "escalated",
+        "barriers": ["cost"],
+        "programs": []
+    },
+    {
+        "transcript": "AI: Hello, this is a refill reminder for your Eliquis prescription. You have 5 days of medication left. Would you like me to process your refill? Patient: Yes please. Will it be delivered or do I need to pick it up? AI: It will be delivered to your home address on file. You should receive it in 2 days. Patient: Perfect, thank you!",
+        "sentiment": 0.8,
+        "friction": [],
+        "outcome": "resolved",
+        "barriers": [],
+        "programs": []
+    },
+    {
+        "transcript": "Patient: I need help understanding my bill. I thought my copay was supposed to be covered? AI: Let me pull up your account. I see you're enrolled in the patient assistance program. Can you tell me what amount you were charged? Patient: It says $89. AI: That doesn't look right. Let me contact your pharmacy directly. Please hold. [pause] Thank you for holding. I've confirmed with the pharmacy that they incorrectly processed your claim. They're issuing a full refund and reprocessing with your assistance program. Patient: Oh thank goodness! I was so confused.",
+        "sentiment": 0.5,
+        "friction": ["High Costs", "Pharmacy Issues"],
+        "outcome": "resolved",
+        "barriers": ["cost"],
+        "programs": ["copay_assistance"]
+    },
+    {
+        "transcript": "AI: I'm calling to follow up on your prior authorization request from last week. Patient: Yes? What's the status? AI: Unfortunately, it was denied by your insurance. However, I have good news - you qualify for the manufacturer's patient assistance program which will provide your medication at no cost. Patient: Really? How long will that take? AI: I can complete your enrollment right now over the phone. You'll receive your medication within 5 business days. Patient: That's such a relief!",
+        "sentiment": 0.7,
+        "friction": ["PA Delays", "High Costs"],
+        "outcome": "resolved",
+        "barriers": ["cost"],
+        "programs": ["pap"]
+    },
+    {
+        "transcript": "Patient: I'm having side effects from my new medication. Should I stop taking it? AI: I understand you're concerned. Can you describe the side effects you're experiencing? Patient: I'm feeling dizzy and nauseous. AI: This is important. I'm going to connect you with a pharmacist right away for a clinical consultation. Please hold. Patient: Okay, thank you.",
+        "sentiment": 0.4,
+        "friction": ["Side Effects"],
+        "outcome": "escalated",
+        "barriers": [],
+        "programs": []
+    },
+    {
+        "transcript": "AI: This is an outbound call to check on your recent enrollment in our bridge program. Did you receive your starter supply of Enbrel? Patient: Yes, it arrived yesterday. AI: Excellent! Do you have any questions about how to administer the injection? Patient: Actually yes, I'm nervous about giving myself a shot. AI: That's completely normal. I'm going to send you a video tutorial and schedule a nurse visit to help with your first injection. Would tomorrow at 2 PM work? Patient: Yes, that would be perfect. Thank you so much.",
+        "sentiment": 0.8,
+        "friction": ["Dosage Confusion"],
+        "outcome": "resolved",
+        "barriers": ["health_literacy"],
+        "programs": ["bridge"]
+    },
+    {
+        "transcript": "Patient: I've been trying to reach my doctor's office for three days about my prescription! AI: I'm sorry you've been having difficulty. What do you need help with? Patient: I need a prior authorization form filled out, but no one is calling me back. AI: I can help with that. I have the form here and I'll fax it directly to your doctor with a follow-up call. I'll also give you a direct line to their office. Patient: Finally! Someone who can actually help. AI: I'll make sure this gets done today.",
+        "sentiment": 0.5,
+        "friction": ["PA Delays", "Access to Care"],
+        "outcome": "resolved",
+        "barriers": [],
+        "programs": []
+    },
+    {
+        "transcript": "AI: Good afternoon! I'm calling with an update on your financial assistance application. Patient: Oh good, I've been waiting to hear. AI: Great news - you've been approved for 12 months of coverage. Your medication will cost $0. Patient: [crying] I can't believe it. I was about to stop treatment because I couldn't afford it. AI: I'm so glad we could help. You'll receive a welcome packet in the mail with all the details. Patient: Thank you, thank you so much.",
+        "sentiment": 0.95,
+        "friction": [],
+        "outcome": "resolved",
+        "barriers": ["cost", "food_insecurity"],
+        "programs": ["pap", "foundation"]
+    },
+    {
+        "transcript": "Patient: I'm calling because my pharmacy says my medication is on backorder. What do I do? AI: Let me check our pharmacy network. [pause] I found three pharmacies within 10 miles of you that have it in stock. I can transfer your prescription right now. Which location works best for you? Patient: The one on Main Street would be perfect. AI: Done. It'll be ready for pickup in one hour. I'm also adding you to our inventory alert system so this doesn't happen again.",
+        "sentiment": 0.7,
+        "friction": ["Pharmacy Issues"],
+        "outcome": "resolved",
+        "barriers": ["transportation"],
+        "programs": []
+    },
+    {
+        "transcript": "AI: This is a courtesy call to let you know your medication is being delivered today between 2-4 PM. Patient: I won't be home then. Can you change the delivery? AI: Absolutely. What day and time works better for you? Patient: Can you do Saturday morning? AI: Yes, I've rescheduled for Saturday between 9-11 AM. You'll get a text reminder the day before. Patient: Perfect, thank you!",
+        "sentiment": 0.85,
+        "friction": [],
+        "outcome": "resolved",
+        "barriers": [],
+        "programs": []
+    },
+    {
+        "transcript": "Patient: I got a call that my insurance changed and I need to re-enroll in the assistance program? AI: Yes, that's correct. Your employer switched insurance plans, so we need to update your information. It only takes a few minutes. Patient: This is so frustrating. Do I have to pay full price now? AI: No, don't worry. Your current enrollment stays active while we process the update. You won't have any gap in coverage. Patient: Okay, that's good at least. Let's get this done.",
+        "sentiment": 0.5,
+        "friction": ["Insurance Questions"],
+        "outcome": "resolved",
+        "barriers": [],
+        "programs": ["copay_assistance"]
+    },
+    {
+        "transcript": "[Outbound call - no answer, left voicemail] AI: Hello, this is PharmAI calling for Sarah Martinez regarding your Dupixent prescription. We have an important update about your prior authorization. Please call us back at 1-800-555-0123. Thank you.",
+        "sentiment": 0.5,
+        "friction": [],
+        "outcome": "voicemail",
+        "barriers": [],
+        "programs": []
+    },
+    {
+        "transcript": "Patient: My medication was supposed to arrive 3 days ago and it's still not here! AI: I sincerely apologize for the delay. Let me track your shipment right now. [pause] I see the carrier had a delay in your area due to weather. Your package is now scheduled for delivery tomorrow with guaranteed delivery. Patient: This is unacceptable. I'm almost out of my medication! AI: I completely understand your frustration. Let me see if I can get you an emergency supply from a local pharmacy today. Patient: Yes, please do that.",
+        "sentiment": 0.3,
+        "friction": ["Pharmacy Issues", "Access to Care"],
+        "outcome": "escalated",
+        "barriers": [],
+        "programs": []
+    }
+]
@@ -0,0 +1,172 @@
+"""
+Incremental trigger detection over a transcript that arrives in chunks
+"""
+from typing import Dict, List, Optional
+
+from app.services.trigger_detection import (
+    TriggerMatcher,
+    calculate_abandonment_risk,
+    get_trigger_matcher,
+)
+
+# Characters of context kept around a hit, and retained behind the scan position
+CONTEXT_CHARS = 50
+
+
+def _lower_same_length(text: str) -> str:
+    """Lowercase text without changing its length so offsets stay aligned"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+class StreamingTriggerDetector:
+    """
+    Detect triggers in a live transcript one chunk at a time
+
+    A position is scanned once the longest possible keyword hit starting there has
+    fully arrived, so keywords split across chunks are still found and only a short
+    tail of text is carried between chunks. Per-pattern non-overlap is kept across
+    chunks, so after finish() the match counts equal detect_triggers_in_transcript()
+    on the joined text. Context snippets cover the text received when a trigger was
+    first seen.
+    """
+
+    def __init__(self, patient_history: Dict = None, matcher: Optional[TriggerMatcher] = None):
+        self.matcher = matcher or get_trigger_matcher()
+        self.patient_history = patient_history
+        self.received = 0
+        self.finished = False
+        self.risk_score, self.risk_level = calculate_abandonment_risk([], patient_history)
+
+        self._text = ""
+        self._lower = ""
+        # Absolute position of the retained text, and where scanning resumes
+        self._offset = 0
+        self._scanned = 0
+        # Per-pattern end of the previous hit, relative to the retained text
+        self._last_end = [0] * self.matcher.pattern_count
+        self._found: Dict[str, Dict] = {}
+        self._triggers: Dict[str, Dict] = {}
+
+    def feed(self, chunk: str) -> Dict:
+        """
+        Add the next piece of transcript text
+
+        Returns:
+            Update with the triggers this chunk added or escalated and the current risk
+        """
+        if self.finished:
+            raise ValueError("Transcript stream is already finished")
+
+        self._text += chunk
+        self._lower += _lower_same_length(chunk)
+        self.received += len(chunk)
+        return self._advance(self.received - self.matcher.max_match_length)
+
+    def finish(self) -> Dict:
+        """
+        Scan the remaining tail once the transcript is complete
+
+        Returns:
+            The last update plus the full list of detected triggers
+        """
+        if self.finished:
+            raise ValueError("Transcript stream is already finished")
+
+        update = self._advance(self.received)
+        self.finished = True
+        update["triggers"] = self.triggers()
+        return update
+
+    def triggers(self) -> List[Dict]:
+        """Triggers detected so far, highest confidence first"""
+        return sorted(self._triggers.values(), key=lambda x: x["confidence"], reverse=True)
+
+    def _advance(self, limit: int) -> Dict:
+        """Scan up to the absolute position limit and report what changed"""
+        matcher = self.matcher
+        offset = self._offset
+
+        changed = []
+        if limit > self._scanned:
+            for index, keyword, start, end in matcher.iter_hits(
+                self._lower,
+                self._scanned - offset,
+                stop=limit - offset,
+                last_end=self._last_end,
+            ):
+                trigger_type = matcher.pattern_trigger_type(index)
+                found = self._found.get(trigger_type)
+                if found is None:
+                    context_start = max(0, start - CONTEXT_CHARS)
+                    found = self._found[trigger_type] = {
+                        "match_count": 0,
+                        "keywords": {},
+                        "offsets": [],
+                        "context": self._text[context_start:end + CONTEXT_CHARS].strip(),
+                    }
+                found["match_count"] += 1
+                found["keywords"][keyword] = None
+                found["offsets"].append([start + offset, end + offset])
+                if trigger_type not in changed:
+                    changed.append(trigger_type)
+            self._scanned = limit
+            self._trim()
+
+        new_triggers = []
+        escalated_triggers = []
+        for trigger_type in changed:
+            previous = self._triggers.get(trigger_type)
+            trigger = self._build_trigger(trigger_type)
+            self._triggers[trigger_type] = trigger
+            if previous is None:
+                new_triggers.append(trigger)
+            elif trigger["confidence"] > previous["confidence"]:
+                escalated_triggers.append(trigger)
+
+        risk_changed = False
+        if new_triggers:
+            # The score only depends on which trigger types were seen
+            risk_score, risk_level = calculate_abandonment_risk(
+                list(self._triggers.values()), self.patient_history
+            )
+            risk_changed = risk_score != self.risk_score
+            self.risk_score, self.risk_level = risk_score, risk_level
+
+        return {
+            "received_chars": self.received,
+            "new_triggers": new_triggers,
+            "escalated_triggers": escalated_triggers,
+            "trigger_count": len(self._triggers),
+            "risk_score": self.risk_score,
+            "risk_level": self.risk_level,
+            "risk_changed": risk_changed,
+        }
+
+    def _build_trigger(self, trigger_type: str) -> Dict:
+        """Same shape as a trigger from detect_triggers_in_transcript()"""
+        found = self._found[trigger_type]
+        confidence = min(0.6 + (found["match_count"] * 0.1), 0.99)
+        return {
+            "trigger_type": trigger_type,
+            "confidence": round(confidence, 2),
+            "severity": self.matcher.patterns[trigger_type]["severity"],
+            "match_count": found["match_count"],
+            "context": found["context"],
+            "keywords_found": list(found["keywords"])[:5],
+            "offsets": sorted(found["offsets"]),
+            "recommendation": self.matcher.recommendations.get(trigger_type, {}),
+        }
+
+    def _trim(self) -> None:
+        """Drop text behind the scan position except what context and \\b need"""
+        keep_from = max(self._offset, self._scanned - CONTEXT_CHARS)
+        shift = keep_from - self._offset
+        if shift <= 0:
+            return
+        self._text = self._text[shift:]
+        self._lower = self._lower[shift:]
+        self._offset = keep_from
+        self._last_end = [max(0, end - shift) for end in self._last_end]
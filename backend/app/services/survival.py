@@ -0,0 +1,189 @@
+"""
+Kaplan–Meier survival of therapy after a detected trigger
+
+Each patient's time to abandonment is measured from the trigger of their first
+intervention in a cohort (the intervention type when it was applied, otherwise
+"no_intervention"). Patients whose outcome_status is patient_abandoned have an
+event at the end of their last adherent supply (falling back to the last
+adherence event or follow-up date); everyone else is censored at their last
+observation. Postgres reduces the population to event and censoring counts per
+(cohort, day), so the NumPy estimator works on at most a few thousand distinct
+times per cohort however many patients there are.
+"""
+from datetime import datetime, timezone
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import Integer, and_, case, cast, extract, func, literal
+from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy.orm import Session
+
+from app.models import AdherenceEvent, Intervention
+
+NO_INTERVENTION = "no_intervention"
+
+ABANDONED_STATUS = "patient_abandoned"
+
+# Upper bound on grid points evaluated per request
+MAX_TIME_POINTS = 1000
+
+
+def survival_counts(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cohorts: Optional[Iterable[str]] = None,
+    as_of: Optional[datetime] = None
+) -> List[tuple]:
+    """
+    Events and subjects per cohort and whole day since trigger
+
+    Args:
+        db: Database session
+        start: Only triggers on or after this time
+        end: Only triggers on or before this time
+        cohorts: Only these cohorts (intervention types or NO_INTERVENTION)
+        as_of: Observation cut-off for censoring (defaults to now)
+
+    Returns:
+        (cohort, day, events, subjects) rows
+    """
+    as_of = as_of or datetime.now(timezone.utc)
+    cohort = case(
+        (Intervention.intervention_applied.is_(True), Intervention.intervention_type),
+        else_=literal(NO_INTERVENTION)
+    )
+
+    filters = [Intervention.trigger_timestamp.isnot(None), Intervention.trigger_timestamp <= as_of]
+    if start:
+        filters.append(Intervention.trigger_timestamp >= start)
+    if end:
+        filters.append(Intervention.trigger_timestamp <= end)
+    if cohorts:
+        filters.append(cohort.in_(list(cohorts)))
+
+    # First trigger per patient and cohort
+    first = db.query(
+        Intervention.id,
+        Intervention.patient_id,
+        cohort.label("cohort"),
+        Intervention.trigger_timestamp.label("origin"),
+        Intervention.outcome_status,
+        Intervention.follow_up_date
+    ).filter(*filters).distinct(
+        Intervention.patient_id, cohort
+    ).order_by(
+        Intervention.patient_id, cohort, Intervention.trigger_timestamp
+    ).cte("first_triggers")
+
+    supply_end = AdherenceEvent.event_date + func.coalesce(AdherenceEvent.days_supply, 0) * cast("1 day", INTERVAL)
+    history = db.query(
+        first.c.id,
+        func.max(case((AdherenceEvent.adherent.is_(True), supply_end))).label("last_covered"),
+        func.max(AdherenceEvent.event_date).label("last_seen")
+    ).join(
+        AdherenceEvent,
+        and_(
+            AdherenceEvent.patient_id == first.c.patient_id,
+            AdherenceEvent.event_date >= first.c.origin,
+            AdherenceEvent.event_date <= as_of
+        )
+    ).group_by(first.c.id).subquery()
+
+    abandoned = first.c.outcome_status == ABANDONED_STATUS
+    # greatest/least ignore NULLs, so missing history falls back to the trigger itself
+    end_time = func.least(
+        case(
+            (abandoned, func.coalesce(history.c.last_covered, history.c.last_seen, first.c.follow_up_date, first.c.origin)),
+            else_=func.greatest(history.c.last_seen, first.c.follow_up_date, first.c.origin)
+        ),
+        as_of
+    )
+    day = func.greatest(func.floor(extract("epoch", end_time - first.c.origin) / 86400), 0).cast(Integer).label("day")
+
+    return db.query(
+        first.c.cohort,
+        day,
+        func.sum(case((abandoned, 1), else_=0)),
+        func.count()
+    ).outerjoin(
+        history, history.c.id == first.c.id
+    ).group_by(first.c.cohort, day).order_by(first.c.cohort, day).all()
+
+
+def kaplan_meier(days: np.ndarray, events: np.ndarray, subjects: np.ndarray, confidence: float = 0.95) -> Dict:
+    """
+    Kaplan–Meier estimate with log-log (Kalbfleisch–Prentice) confidence bands
+
+    Args:
+        days: Distinct times, ascending
+        events: Events at each time
+        subjects: Subjects leaving the risk set at each time (events + censored)
+        confidence: Two-sided confidence level of the bands
+
+    Returns:
+        Dict of arrays times, survival, lower, upper plus patients and events
+    """
+    days = np.asarray(days, dtype=np.float64)
+    events = np.asarray(events, dtype=np.float64)
+    subjects = np.asarray(subjects, dtype=np.float64)
+
+    at_risk = subjects.sum() - np.concatenate(([0.0], np.cumsum(subjects)[:-1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        survival = np.cumprod(1.0 - events / at_risk)
+        # Greenwood variance of log S, transformed to the log(-log S) scale
+        greenwood = np.cumsum(np.where(at_risk > events, events / (at_risk * (at_risk - events)), np.inf))
+        se = np.sqrt(greenwood) / np.abs(np.log(survival))
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        lower = np.power(survival, np.exp(z * se))
+        upper = np.power(survival, np.exp(-z * se))
+
+    # No events yet: S = 1 exactly; everyone gone: S = 0 exactly
+    certain = (survival >= 1.0) | (survival <= 0.0) | ~np.isfinite(se)
+    lower = np.where(certain, survival, lower)
+    upper = np.where(certain, survival, upper)
+
+    return {
+        "times": days,
+        "survival": survival,
+        "lower": lower,
+        "upper": upper,
+        "patients": int(subjects.sum()),
+        "events": int(events.sum()),
+    }
+
+
+def survival_curves(counts: List[tuple], confidence: float = 0.95) -> Dict[str, Dict]:
+    """Kaplan–Meier estimate per cohort from survival_counts() rows"""
+    if not counts:
+        return {}
+
+    cohorts = np.array([row[0] for row in counts], dtype=object)
+    values = np.array([row[1:] for row in counts], dtype=np.float64)
+    # Rows arrive sorted by cohort, so each cohort is one contiguous slice
+    boundaries = np.flatnonzero(cohorts[1:] != cohorts[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(counts)]))
+
+    return {
+        cohorts[s]: kaplan_meier(values[s:e, 0], values[s:e, 1], values[s:e, 2], confidence)
+        for s, e in zip(starts, ends)
+    }
+
+
+def evaluate_curve(curve: Dict, time_points: np.ndarray) -> Dict[str, np.ndarray]:
+    """Step-function values of a curve at arbitrary times (days)"""
+    index = np.searchsorted(curve["times"], time_points, side="right") - 1
+    before_first = index < 0
+    index = np.maximum(index, 0)
+    return {
+        key: np.where(before_first, 1.0, curve[key][index])
+        for key in ("survival", "lower", "upper")
+    }
+
+
+def median_survival(curve: Dict) -> Optional[float]:
+    """First time at which survival drops to 50% or below, if it does"""
+    below = np.flatnonzero(curve["survival"] <= 0.5)
+    return float(curve["times"][below[0]]) if below.size else None
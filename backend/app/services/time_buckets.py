@@ -0,0 +1,95 @@
+"""
+SQL-side time bucketing for trend queries
+
+Calendar intervals (day, week, month, quarter, year) bucket with date_trunc;
+fixed-length intervals such as "6 hours", "3d" or "2 weeks" bucket with
+date_bin anchored at the start of the range. In both cases Postgres assigns
+buckets and generate_series produces the empty ones, so a trend is one grouped
+query whatever the range or bucket size.
+"""
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, cast, func, literal
+from sqlalchemy.dialects.postgresql import INTERVAL
+
+CALENDAR_UNITS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=30),
+    "quarter": timedelta(days=91),
+    "year": timedelta(days=365),
+}
+
+FIXED_UNITS = {
+    "m": "minutes", "min": "minutes", "minute": "minutes", "minutes": "minutes",
+    "h": "hours", "hour": "hours", "hours": "hours",
+    "d": "days", "day": "days", "days": "days",
+    "w": "weeks", "week": "weeks", "weeks": "weeks",
+}
+
+_FIXED_PATTERN = re.compile(r"^\s*(\d+)\s*([a-z]+)\s*$")
+
+# Upper bound on buckets in one trend, to keep responses a sane size
+MAX_BUCKETS = 10000
+
+
+class TimeBuckets:
+    """Bucketing of one range: SQL bucket expression plus the series of all buckets"""
+
+    def __init__(self, interval: str, start: datetime, end: datetime):
+        """
+        Args:
+            interval: Calendar unit ("day", "week", "month", "quarter", "year") or a
+                fixed length such as "6 hours", "3d", "2w"
+            start: Start of the range
+            end: End of the range
+
+        Raises:
+            ValueError: If the interval can't be parsed or yields too many buckets
+        """
+        if end < start:
+            raise ValueError("end_date is before start_date")
+
+        interval = interval.strip().lower()
+        self.start = start
+        self.end = end
+
+        if interval in CALENDAR_UNITS:
+            self.unit = interval
+            self.step = f"1 {interval}"
+            approximate_step = CALENDAR_UNITS[interval]
+        else:
+            match = _FIXED_PATTERN.match(interval)
+            if not match or match.group(2) not in FIXED_UNITS or int(match.group(1)) < 1:
+                raise ValueError(
+                    f"Unsupported interval {interval!r}; use day, week, month, quarter, year "
+                    "or a fixed length such as '6 hours' or '3d'"
+                )
+            self.unit = None
+            count, unit = int(match.group(1)), FIXED_UNITS[match.group(2)]
+            self.step = f"{count} {unit}"
+            approximate_step = timedelta(**{unit: count})
+
+        if (end - start) / approximate_step > MAX_BUCKETS:
+            raise ValueError(f"Interval {interval!r} gives more than {MAX_BUCKETS} buckets for this range")
+
+    def _timestamp(self, value: datetime):
+        return cast(literal(value), DateTime(timezone=True))
+
+    def bucket(self, column):
+        """SQL expression giving the bucket start of a timestamp column"""
+        if self.unit:
+            return func.date_trunc(self.unit, column)
+        return func.date_bin(cast(self.step, INTERVAL), column, self._timestamp(self.start))
+
+    def series(self, name: str = "bucket"):
+        """Table-valued generate_series of every bucket start in the range"""
+        if self.unit:
+            first = func.date_trunc(self.unit, self._timestamp(self.start))
+        else:
+            first = self._timestamp(self.start)
+        return func.generate_series(
+            first, self._timestamp(self.end), cast(self.step, INTERVAL)
+        ).table_valued(name)
+
@@ -0,0 +1,199 @@
+"""
+Local topic classifier for marketing content
+
+Scores website content against the PATIENT_BARRIERS categories without a model
+call. Each category has a lexicon of terms and phrases; terms are weighted by
+how specific they are to one category (IDF across categories) and a page's
+term counts are multiplied through that sparse category-term matrix with NumPy.
+The result has the same shape as the LLM analysis plus a confidence, which the
+hybrid mode uses to decide when to escalate to the model.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.llm_gateway import PATIENT_BARRIERS
+
+# Extra terms per category beyond the keywords in PATIENT_BARRIERS, taken from
+# what the LLM prompt tells the model to look for
+CATEGORY_TERMS = {
+    'Cost & Insurance Support': [
+        "copay card", "copay cards", "savings card", "savings cards", "financial help", "financial support",
+        "eligibility", "eligible", "out-of-pocket", "deductible", "coverage", "covered", "prior authorization",
+        "reimbursement", "afford", "affordable", "free drug", "cares program", "lillycares", "assistance program",
+        "apply", "application", "income", "uninsured", "underinsured", "medicare", "medicaid",
+        "commercial insurance", "savings",
+    ],
+    'Injection Support & Training': [
+        "inject", "injecting", "injection technique", "injection site", "injection sites", "autoinjector", "auto-injector",
+        "prefilled syringe", "pen", "syringe", "needle", "self-inject", "nurse educator", "training video",
+        "step-by-step", "instructions for use", "fear of needles",
+    ],
+    'Side Effects Management': [
+        "side effect", "adverse reaction", "reaction", "warnings", "precautions", "risk", "risks", "allergic",
+        "infection", "nausea", "headache", "contraindication", "boxed warning", "important safety information",
+        "tell your doctor", "serious",
+    ],
+    'Access & Logistics': [
+        "prescription", "fill", "refill", "ship", "shipping", "shipped", "home delivery", "mail order",
+        "enroll", "enrollment", "hub", "case manager", "find a pharmacy", "in stock", "supply",
+    ],
+    'Efficacy & Clinical Results': [
+        "clinical trial", "clinical study", "study", "studies", "trial", "placebo", "response rate",
+        "remission", "improvement", "improved", "data", "endpoint", "proven", "demonstrated", "works",
+        "symptom relief", "clear skin",
+    ],
+    'Dosing & Convenience': [
+        "dose", "doses", "dosage", "once a month", "once monthly", "every two weeks", "every 4 weeks",
+        "every other week", "weekly", "monthly", "maintenance dose", "starter dose", "loading dose",
+        "schedule", "regimen", "missed dose", "storage", "refrigerate", "room temperature",
+    ],
+}
+
+# Hits per 100 words at which the evidence for a page counts as complete
+TARGET_HIT_DENSITY = 1.0
+
+# Matched terms needed before a page's result is trusted (e^-1 short at this count)
+EVIDENCE_SCALE = 5.0
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+
+def _normalize(word: str) -> str:
+    # Crude plural folding, applied identically to lexicon and content. Short
+    # words are left alone so e.g. "cares" doesn't become the everyday "care",
+    # and -us/-is/-ss endings are not plurals.
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 5 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _tokenize(text: str) -> List[str]:
+    return [_normalize(word) for word in _WORD_PATTERN.findall(text.lower())]
+
+
+class TopicClassifier:
+    """
+    IDF-weighted lexicon classifier over a sparse category-term matrix
+
+    Args:
+        categories: Category name -> terms and phrases (case-insensitive)
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.categories = list(categories)
+        self._terms: Dict[Tuple[str, ...], int] = {}
+        postings: List[Tuple[int, int]] = []
+
+        for category_index, category in enumerate(self.categories):
+            for phrase in categories[category]:
+                term = tuple(_tokenize(phrase))
+                if not term:
+                    continue
+                term_index = self._terms.setdefault(term, len(self._terms))
+                postings.append((term_index, category_index))
+
+        self.max_ngram = max((len(term) for term in self._terms), default=1)
+
+        weights = np.zeros((len(self._terms), len(self.categories)), dtype=np.float64)
+        if postings:
+            term_indices, category_indices = np.array(sorted(set(postings))).T
+            weights[term_indices, category_indices] = 1.0
+        # Terms shared by several categories say less about any one of them
+        document_frequency = np.maximum(weights.sum(axis=1, keepdims=True), 1.0)
+        self._weights = weights * np.log1p(len(self.categories) / document_frequency)
+
+    def _term_counts(self, text: str) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Sparse term counts of one text: (term indices, counts, word count)"""
+        words = _tokenize(text)
+        matched = [
+            self._terms[ngram]
+            for n in range(1, self.max_ngram + 1)
+            for ngram in zip(*(words[i:] for i in range(n)))
+            if ngram in self._terms
+        ]
+        if not matched:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), len(words)
+        indices, counts = np.unique(np.asarray(matched, dtype=np.int64), return_counts=True)
+        return indices, counts.astype(np.float64), len(words)
+
+    def classify_many(self, texts: List[str]) -> List[Dict]:
+        """
+        Classify several texts with one sparse-dense product
+
+        Returns:
+            One dict per text with topics ([{name, percentage}]), total_words,
+            confidence (0-1) and matched_terms
+        """
+        rows, columns, values, word_counts = [], [], [], []
+        for row, text in enumerate(texts):
+            indices, counts, words = self._term_counts(text or "")
+            rows.append(np.full(len(indices), row, dtype=np.int64))
+            columns.append(indices)
+            values.append(counts)
+            word_counts.append(words)
+
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+        columns = np.concatenate(columns) if columns else np.empty(0, dtype=np.int64)
+        counts = np.concatenate(values) if values else np.empty(0, dtype=np.float64)
+
+        # Sublinear tf, then scores[row] += tf * weights[term] for every stored entry
+        scores = np.zeros((len(texts), len(self.categories)), dtype=np.float64)
+        np.add.at(scores, rows, (1.0 + np.log(np.maximum(counts, 1.0)))[:, None] * self._weights[columns])
+        hits = np.bincount(rows, weights=counts, minlength=len(texts)).astype(np.float64)
+
+        totals = scores.sum(axis=1, keepdims=True)
+        percentages = np.divide(scores * 100.0, totals, out=np.zeros_like(scores), where=totals > 0)
+
+        word_array = np.asarray(word_counts, dtype=np.float64)
+        density = np.divide(hits * 100.0, word_array, out=np.zeros_like(hits), where=word_array > 0)
+        confidence = (1.0 - np.exp(-hits / EVIDENCE_SCALE)) * np.minimum(density / TARGET_HIT_DENSITY, 1.0)
+
+        return [
+            {
+                "topics": [
+                    {"name": name, "percentage": round(float(percentage), 1)}
+                    for name, percentage in zip(self.categories, percentages[row])
+                ],
+                "total_words": word_counts[row],
+                "confidence": round(float(confidence[row]), 3),
+                "matched_terms": int(hits[row]),
+            }
+            for row in range(len(texts))
+        ]
+
+    def classify(self, website_contents: List[str], total_words: Optional[int] = None) -> Dict:
+        """
+        Classify one site's content
+
+        Args:
+            website_contents: Page texts
+            total_words: Word count reported back (defaults to the tokenized count)
+        """
+        result = self.classify_many(["\n".join(website_contents)])[0]
+        if total_words is not None:
+            result["total_words"] = total_words
+        return result
+
+
+def default_categories() -> Dict[str, List[str]]:
+    """PATIENT_BARRIERS keywords merged with CATEGORY_TERMS"""
+    return {
+        barrier["name"]: [keyword.strip() for keyword in barrier["keywords"].split(",")]
+        + CATEGORY_TERMS.get(barrier["name"], [])
+        for barrier in PATIENT_BARRIERS
+    }
+
+
+_classifier: Optional[TopicClassifier] = None
+
+
+def get_topic_classifier() -> TopicClassifier:
+    """Return the process-wide classifier, built on first use"""
+    global _classifier
+    if _classifier is None:
+        _classifier = TopicClassifier(default_categories())
+    return _classifier
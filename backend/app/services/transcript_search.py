@@ -0,0 +1,158 @@
+"""
+Full-text search over call transcripts
+
+Queries use Postgres websearch syntax ("quoted phrases", OR, -exclusions)
+against the generated calls.transcript_tsv column, so matching is a GIN index
+lookup. Results are ranked with ts_rank_cd and paged with an opaque keyset
+cursor; snippets are only highlighted for the rows on the returned page.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import REAL, and_, cast, func, literal, or_
+from sqlalchemy.orm import Session
+
+from app.models import Call
+
+TEXT_SEARCH_CONFIG = "english"
+
+SORT_ORDERS = ("relevance", "date")
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter= … "
+
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values: Dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    Raises:
+        ValueError: If the cursor is not one this module produced
+    """
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def search_calls(
+    db: Session,
+    query: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    patient_id: Optional[UUID] = None,
+    outcome: Optional[str] = None,
+    sort: str = "relevance",
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Dict:
+    """
+    Search transcripts
+
+    Args:
+        db: Database session
+        query: Websearch-style query, e.g. '"can't afford" copay -insurance'
+        start: Only calls on or after this time
+        end: Only calls on or before this time
+        patient_id: Only this patient's calls
+        outcome: Only calls with this outcome
+        sort: "relevance" (rank, then id) or "date" (newest first, then id)
+        limit: Page size (capped at MAX_PAGE_SIZE)
+        cursor: next_cursor from the previous page
+
+    Raises:
+        ValueError: For an empty query, unknown sort order or bad cursor
+
+    Returns:
+        Dict with results and next_cursor (None on the last page)
+    """
+    if not query or not query.strip():
+        raise ValueError("Query must not be empty")
+    if sort not in SORT_ORDERS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_ORDERS)}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    ts_query = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+    rank = func.ts_rank_cd(Call.transcript_tsv, ts_query)
+
+    filters = [Call.transcript_tsv.op("@@")(ts_query)]
+    if start:
+        filters.append(Call.call_date >= start)
+    if end:
+        filters.append(Call.call_date <= end)
+    if patient_id:
+        filters.append(Call.patient_id == patient_id)
+    if outcome:
+        filters.append(Call.outcome == outcome)
+
+    if cursor:
+        after = decode_cursor(cursor)
+        try:
+            after_id = UUID(after["id"])
+            if sort == "relevance":
+                # Compare as real, the type ts_rank_cd returns, so the boundary row matches exactly
+                after_rank = cast(literal(float(after["rank"])), REAL)
+                filters.append(or_(rank < after_rank, and_(rank == after_rank, Call.id > after_id)))
+            else:
+                after_date = datetime.fromisoformat(after["date"])
+                filters.append(or_(
+                    Call.call_date < after_date,
+                    and_(Call.call_date == after_date, Call.id > after_id)
+                ))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+
+    # Rank and page on the index first; highlight only the page's rows
+    page = db.query(
+        Call.id.label("call_id"),
+        rank.label("rank")
+    ).filter(*filters).order_by(
+        *((rank.desc(), Call.id) if sort == "relevance" else (Call.call_date.desc(), Call.id))
+    ).limit(limit + 1).subquery()
+
+    rows = db.query(
+        Call.id,
+        Call.patient_id,
+        Call.call_date,
+        Call.outcome,
+        page.c.rank,
+        func.ts_headline(TEXT_SEARCH_CONFIG, Call.transcript, ts_query, HEADLINE_OPTIONS)
+    ).join(page, page.c.call_id == Call.id).order_by(
+        *((page.c.rank.desc(), Call.id) if sort == "relevance" else (Call.call_date.desc(), Call.id))
+    ).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    results: List[Dict] = [
+        {
+            "call_id": str(call_id),
+            "patient_id": str(row_patient_id),
+            "call_date": call_date.isoformat() if call_date else None,
+            "outcome": row_outcome,
+            "rank": round(row_rank, 6),
+            "snippet": snippet,
+        }
+        for call_id, row_patient_id, call_date, row_outcome, row_rank, snippet in rows
+    ]
+
+    next_cursor = None
+    if has_more and rows:
+        call_id, _, call_date, _, row_rank, _ = rows[-1]
+        if sort == "relevance":
+            next_cursor = encode_cursor({"rank": row_rank, "id": str(call_id)})
+        else:
+            next_cursor = encode_cursor({"date": call_date.isoformat(), "id": str(call_id)})
+
+    return {
+        "query": query,
+        "sort": sort,
+        "results": results,
+        "next_cursor": next_cursor,
+    }
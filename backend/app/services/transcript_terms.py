@@ -0,0 +1,186 @@
+"""
+Daily rollups of transcript keyword counts
+
+Each call's transcript is tokenized once, when it is stored, and its term counts
+are added to transcript_term_daily under the call's UTC day: once for the whole
+transcript (speaker "all") and once per speaker's turns. Word clouds over any
+range of days are then a SUM ... GROUP BY term over the rollup instead of a
+re-tokenization of every transcript in the window.
+"""
+import re
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Call, TranscriptTermDaily
+from app.services.transcript_turns import parse_speaker_turns, speaker_spans
+
+# Speaker value of counts over whole transcripts
+ALL_SPEAKERS = "all"
+
+MIN_TERM_LENGTH = 4
+
+# Longest term kept; matches the column size
+MAX_TERM_LENGTH = 100
+
+# Rollup rows sent per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 5000
+
+STOP_WORDS = frozenset({
+    'the', 'and', 'for', 'that', 'this', 'with', 'from', 'have', 'has',
+    'will', 'can', 'about', 'just', 'like', 'know', 'what', 'when', 'where',
+    'would', 'could', 'should', 'your', 'you', 'are', 'was', 'were', 'been',
+    'being', 'they', 'them', 'their', 'there', 'here', 'than', 'then', 'these',
+    'those', 'said', 'says', 'okay', 'yeah', 'yes', 'well', 'want', 'need'
+})
+
+_word_patterns: Dict[int, "re.Pattern"] = {}
+
+
+def _word_pattern(min_length: int) -> "re.Pattern":
+    pattern = _word_patterns.get(min_length)
+    if pattern is None:
+        pattern = _word_patterns[min_length] = re.compile(r'\b[a-z]{' + str(min_length) + r',}\b')
+    return pattern
+
+
+def count_transcript_terms(
+    transcript: str,
+    turns: Optional[List[List]] = None,
+    speaker: Optional[str] = None,
+    min_length: int = MIN_TERM_LENGTH
+) -> Counter:
+    """
+    Count the non-stop-word terms of a transcript
+
+    Args:
+        transcript: The call transcript text
+        turns: Stored speaker turns of the transcript (parsed on demand if missing)
+        speaker: Only count this speaker's turns
+
+    Returns:
+        Counter of term occurrences
+    """
+    if not transcript:
+        return Counter()
+
+    word_pattern = _word_pattern(min_length)
+    transcript_lower = transcript.lower()
+
+    if speaker:
+        if turns is None or len(transcript_lower) != len(transcript):
+            turns = parse_speaker_turns(transcript_lower)
+        words = []
+        for start, end in speaker_spans(turns, speaker):
+            words.extend(word_pattern.findall(transcript_lower, start, end))
+    else:
+        words = word_pattern.findall(transcript_lower)
+
+    return Counter(word for word in words if word not in STOP_WORDS and len(word) <= MAX_TERM_LENGTH)
+
+
+def call_term_counts(transcript: str, turns: Optional[List[List]] = None) -> Dict[str, Counter]:
+    """Term counts of a transcript as a whole and for each speaker in it"""
+    if not transcript:
+        return {}
+
+    transcript_lower = transcript.lower()
+    if turns is None or len(transcript_lower) != len(transcript):
+        turns = parse_speaker_turns(transcript_lower)
+
+    counts = {ALL_SPEAKERS: count_transcript_terms(transcript)}
+    for speaker in sorted({turn[0] for turn in turns}):
+        counts[speaker] = count_transcript_terms(transcript, turns=turns, speaker=speaker)
+    return counts
+
+
+def _call_day(call_date: Optional[datetime]) -> date:
+    if call_date is None:
+        return datetime.utcnow().date()
+    if call_date.tzinfo is not None:
+        call_date = call_date.astimezone(timezone.utc)
+    return call_date.date()
+
+
+def add_term_counts(
+    db: Session,
+    calls: Iterable[Tuple[Optional[datetime], str, Optional[List[List]]]]
+) -> int:
+    """
+    Add calls' term counts to the daily rollup
+
+    Args:
+        db: Database session (the caller commits and marks the calls as counted)
+        calls: (call_date, transcript, speaker_turns) of each call
+
+    Returns:
+        Number of rollup rows written
+    """
+    totals: Counter = Counter()
+    for call_date, transcript, turns in calls:
+        day = _call_day(call_date)
+        for speaker, counts in call_term_counts(transcript, turns).items():
+            for term, count in counts.items():
+                totals[(day, speaker, term)] += count
+
+    rows = [
+        {"day": day, "speaker": speaker, "term": term, "count": count}
+        for (day, speaker, term), count in totals.items()
+    ]
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(TranscriptTermDaily).values(rows[i:i + UPSERT_BATCH_SIZE])
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[
+                TranscriptTermDaily.day,
+                TranscriptTermDaily.speaker,
+                TranscriptTermDaily.term,
+            ],
+            set_={"count": TranscriptTermDaily.count + statement.excluded["count"]}
+        ))
+
+    return len(rows)
+
+
+def store_call_terms(db: Session, call: Call) -> None:
+    """Add one new call to the rollup (the caller commits)"""
+    if call.terms_counted or not call.transcript:
+        return
+
+    add_term_counts(db, [(call.call_date, call.transcript, call.speaker_turns)])
+    call.terms_counted = True
+
+
+def backfill_term_rollups(db: Session, batch_size: int = 500) -> int:
+    """
+    Add every call that isn't in the rollup yet, committing batch by batch
+
+    Counts and the counted flag are committed together, so an interrupted
+    backfill resumes without double counting.
+
+    Returns:
+        Number of calls added
+    """
+    added = 0
+
+    while True:
+        batch = db.query(Call.id, Call.call_date, Call.transcript, Call.speaker_turns).filter(
+            Call.terms_counted.is_(False)
+        ).order_by(Call.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        add_term_counts(
+            db,
+            [(row.call_date, row.transcript, row.speaker_turns) for row in batch if row.transcript]
+        )
+        db.query(Call).filter(Call.id.in_([row.id for row in batch])).update(
+            {Call.terms_counted: True},
+            synchronize_session=False
+        )
+        db.commit()
+        added += len(batch)
+
+    return added
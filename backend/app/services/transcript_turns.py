@@ -0,0 +1,61 @@
+"""
+Speaker-turn parsing for flat call transcripts
+
+Transcripts are stored as one string such as "AI: ... Patient: ...". The parser
+splits it once into a compact list of [speaker, start, end] turns whose offsets
+point into the original string, so scanners can restrict themselves to one
+speaker's text with pos/endpos arguments instead of copying substrings.
+"""
+import re
+from typing import List, Optional, Tuple
+
+# Labels used in transcripts, mapped to the speaker they identify
+SPEAKER_LABELS = {
+    "ai": "agent",
+    "agent": "agent",
+    "assistant": "agent",
+    "patient": "patient",
+    "caller": "patient",
+}
+
+UNKNOWN_SPEAKER = "unknown"
+
+_LABEL_PATTERN = re.compile(
+    r"(?:^|(?<=\s))(%s)\s*:" % "|".join(SPEAKER_LABELS),
+    re.IGNORECASE,
+)
+
+
+def parse_speaker_turns(transcript: Optional[str]) -> List[List]:
+    """
+    Split a transcript into speaker turns
+
+    Args:
+        transcript: The call transcript text
+
+    Returns:
+        List of [speaker, start, end] where transcript[start:end] is the turn's text
+        without its label; text before the first label belongs to "unknown"
+    """
+    if not transcript:
+        return []
+
+    turns = []
+    speaker = UNKNOWN_SPEAKER
+    start = 0
+
+    for match in _LABEL_PATTERN.finditer(transcript):
+        if transcript[start:match.start()].strip():
+            turns.append([speaker, start, match.start()])
+        speaker = SPEAKER_LABELS[match.group(1).lower()]
+        start = match.end()
+
+    if transcript[start:].strip():
+        turns.append([speaker, start, len(transcript)])
+
+    return turns
+
+
+def speaker_spans(turns: List[List], speaker: str) -> List[Tuple[int, int]]:
+    """Return the (start, end) offsets of one speaker's turns"""
+    return [(start, end) for turn_speaker, start, end in turns if turn_speaker == speaker]
@@ -0,0 +1,97 @@
+"""
+Streaming aggregation of stored trigger results
+
+Aggregates read only (call_id, trigger_type) pairs from call_trigger_analyses
+through a server-side cursor, ordered by call and rank, so each call's triggers
+arrive together and are folded into the counters before the next call is read.
+Memory depends on the number of trigger types, never on the number of calls.
+"""
+from collections import Counter
+from itertools import combinations, groupby
+from operator import itemgetter
+from typing import Iterator, List, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models import Call, CallTriggerAnalysis
+
+
+class TriggerSummaryAggregator:
+    """
+    One-pass counters over each call's trigger types (strongest first)
+
+    Tracks per-type counts, calls with any trigger, the pair formed by each call's
+    two strongest triggers, and full co-occurrence of every pair in a call.
+    """
+
+    def __init__(self):
+        self.calls_with_triggers = 0
+        self.total_triggers = 0
+        self.type_counts: Counter = Counter()
+        self.top_pair_counts: Counter = Counter()
+        self.co_occurrence: Counter = Counter()
+
+    def add(self, trigger_types: List[str]) -> None:
+        """Fold in one call's trigger types, ordered by rank"""
+        if not trigger_types:
+            return
+
+        self.calls_with_triggers += 1
+        self.total_triggers += len(trigger_types)
+        self.type_counts.update(trigger_types)
+
+        if len(trigger_types) > 1:
+            self.top_pair_counts[tuple(sorted(trigger_types[:2]))] += 1
+            for pair in combinations(sorted(set(trigger_types)), 2):
+                self.co_occurrence[pair] += 1
+
+    @staticmethod
+    def _ranked(counts: Counter, limit: int = None) -> List[Tuple[Tuple[str, str], int]]:
+        # Highest count first, ties broken alphabetically so results are stable
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def top_combinations(self, limit: int = 5) -> List[Tuple[Tuple[str, str], int]]:
+        """Most common pairs of each call's two strongest triggers"""
+        return self._ranked(self.top_pair_counts, limit)
+
+    def co_occurring_pairs(self) -> List[Tuple[Tuple[str, str], int]]:
+        """Every pair of trigger types seen in the same call, most common first"""
+        return self._ranked(self.co_occurrence)
+
+
+def stream_call_trigger_types(
+    db: Session,
+    call_filter,
+    chunk_size: int = 5000
+) -> Iterator[Tuple[UUID, List[str]]]:
+    """
+    Yield (call_id, trigger types strongest first) for calls matching a filter
+
+    Rows are fetched chunk_size at a time through a server-side cursor.
+    """
+    rows = db.query(
+        CallTriggerAnalysis.call_id,
+        CallTriggerAnalysis.trigger_type
+    ).join(Call, Call.id == CallTriggerAnalysis.call_id).filter(
+        call_filter
+    ).order_by(
+        CallTriggerAnalysis.call_id,
+        CallTriggerAnalysis.rank
+    ).execution_options(stream_results=True).yield_per(chunk_size)
+
+    for call_id, group in groupby(rows, key=itemgetter(0)):
+        yield call_id, [trigger_type for _, trigger_type in group]
+
+
+def aggregate_trigger_summary(
+    db: Session,
+    call_filter,
+    chunk_size: int = 5000
+) -> TriggerSummaryAggregator:
+    """Aggregate stored triggers of every call matching a filter in one streaming pass"""
+    aggregator = TriggerSummaryAggregator()
+    for _, trigger_types in stream_call_trigger_types(db, call_filter, chunk_size):
+        aggregator.add(trigger_types)
+    return aggregator
@@ -1,11 +1,21 @@
 """
 Trigger detection service for identifying abandonment signals in call transcripts
 """
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
 import re
-from typing import Dict, List, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime, timedelta
 import random
 
+import numpy as np
+
+from app.services.transcript_turns import parse_speaker_turns, speaker_spans
+
 
 # Trigger patterns with keywords
 TRIGGER_PATTERNS = {
@@ -100,48 +110,308 @@ INTERVENTION_RECOMMENDATIONS = {
 }
 
 
-def detect_triggers_in_transcript(transcript: str) -> List[Dict]:
+# Span allowed for a single hit of a pattern that isn't a plain keyword list
+FREEFORM_MATCH_LENGTH = 100
+
+
+def compute_ruleset_version(patterns: Dict[str, Dict], recommendations: Dict[str, Dict]) -> str:
+    """Content hash identifying a trigger ruleset; changes whenever a rule changes"""
+    payload = json.dumps(
+        {"patterns": patterns, "recommendations": recommendations},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _expand_literal_alternatives(pattern: str) -> Optional[List[str]]:
+    """
+    Expand a keyword pattern of the form \\b(word|word|...) into the literals it matches
+
+    Only plain words with single-character optionals (e.g. can'?t) are expanded.
+    Anything else returns None and is prefiltered with the raw pattern instead.
+    """
+    if not (pattern.startswith(r"\b(") and pattern.endswith(")")):
+        return None
+
+    literals = []
+    for alternative in pattern[3:-1].split("|"):
+        variants = [""]
+        i = 0
+        while i < len(alternative):
+            char = alternative[i]
+            if not (char.isalnum() or char in " '-"):
+                return None
+            if i + 1 < len(alternative) and alternative[i + 1] == "?":
+                variants = [v + char for v in variants] + variants
+                i += 2
+            else:
+                variants = [v + char for v in variants]
+                i += 1
+        if not all(variants):
+            return None
+        literals.extend(variants)
+
+    return literals
+
+
+def build_trie_regex(literals: List[str]) -> str:
+    """Build a regex that matches any of the literals with one character per step"""
+    trie: Dict = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:%s)?" % body if "" in node else body
+
+    return emit(trie)
+
+
+class TriggerMatcher:
+    """
+    Single-pass matcher compiled from a trigger ruleset
+
+    All keyword patterns are folded into one regex: a trie-shaped prefilter finds the
+    positions where any keyword can start, and one optional lookahead per pattern
+    captures what that pattern matches there. Each transcript is scanned once, and
+    per-pattern non-overlap is applied afterwards so the hits are exactly what
+    re.findall would return for each pattern on its own.
+    """
+
+    __slots__ = (
+        "patterns", "recommendations", "version", "max_match_length", "_regex", "_pattern_groups"
+    )
+
+    def __init__(self, patterns: Dict[str, Dict], recommendations: Dict[str, Dict]):
+        # Private copies, so editing the source dicts can't change an installed matcher
+        self.patterns = copy.deepcopy(patterns)
+        self.recommendations = copy.deepcopy(recommendations)
+        self.version = compute_ruleset_version(patterns, recommendations)
+
+        literals = []
+        prefilters = []
+        # Longest text a single hit can span; free-form patterns get a fixed allowance
+        max_match_length = 0
+        for config in patterns.values():
+            for pattern in config["keywords"]:
+                expanded = _expand_literal_alternatives(pattern)
+                if expanded is None:
+                    prefilters.append(pattern)
+                    max_match_length = max(max_match_length, FREEFORM_MATCH_LENGTH)
+                else:
+                    literals.extend(expanded)
+                    max_match_length = max(max_match_length, *map(len, expanded))
+        self.max_match_length = max_match_length
+        if literals:
+            prefilters.insert(0, r"\b" + build_trie_regex(literals))
+        prefilter = "|".join(prefilters) or "(?!)"
+
+        lookaheads = []
+        # (trigger_type, wrapper group, keyword group) for every pattern, in ruleset order
+        pattern_groups = []
+        group_count = re.compile(prefilter).groups
+
+        for trigger_type, config in patterns.items():
+            for pattern in config["keywords"]:
+                inner_groups = re.compile(pattern).groups
+                if inner_groups > 1:
+                    raise ValueError(f"Trigger pattern has more than one group: {pattern}")
+
+                wrapper_group = group_count + 1
+                keyword_group = wrapper_group + 1 if inner_groups else wrapper_group
+                pattern_groups.append((trigger_type, wrapper_group, keyword_group))
+                lookaheads.append("(?=(%s)|)" % pattern)
+                group_count += 1 + inner_groups
+
+        self._regex = re.compile(
+            "(?=%s)%s" % (prefilter, "".join(lookaheads)),
+            re.IGNORECASE,
+        )
+        self._pattern_groups = tuple(pattern_groups)
+
+    def scan(
+        self,
+        transcript_lower: str,
+        spans: Optional[Sequence[Tuple[int, int]]] = None
+    ) -> Dict[str, List[Tuple[str, int, int]]]:
+        """
+        Scan a lowercased transcript once
+
+        Args:
+            transcript_lower: Lowercased transcript text
+            spans: Only scan these (start, end) ranges, e.g. one speaker's turns
+
+        Returns:
+            Matches per trigger type as (keyword, start, end), ordered pattern by pattern
+            the same way the per-pattern findall results used to be concatenated
+        """
+        pattern_groups = self._pattern_groups
+        per_pattern: List[List[Tuple[str, int, int]]] = [[] for _ in pattern_groups]
+        last_end = [0] * len(pattern_groups)
+
+        if spans is None:
+            spans = ((0, len(transcript_lower)),)
+
+        for span_start, span_end in spans:
+            for index, keyword, start, end in self.iter_hits(
+                transcript_lower, span_start, span_end, last_end=last_end
+            ):
+                per_pattern[index].append((keyword, start, end))
+
+        hits: Dict[str, List[Tuple[str, int, int]]] = {}
+        for (trigger_type, _, _), found in zip(pattern_groups, per_pattern):
+            if found:
+                hits.setdefault(trigger_type, []).extend(found)
+        return hits
+
+    @property
+    def pattern_count(self) -> int:
+        """Number of keyword patterns in the ruleset"""
+        return len(self._pattern_groups)
+
+    def pattern_trigger_type(self, index: int) -> str:
+        """Trigger type of the pattern at this index in ruleset order"""
+        return self._pattern_groups[index][0]
+
+    def iter_hits(
+        self,
+        transcript_lower: str,
+        pos: int = 0,
+        endpos: Optional[int] = None,
+        stop: Optional[int] = None,
+        last_end: Optional[List[int]] = None
+    ) -> Iterator[Tuple[int, str, int, int]]:
+        """
+        Yield keyword hits in text order
+
+        Args:
+            transcript_lower: Lowercased transcript text
+            pos: Where scanning starts
+            endpos: Text past this position is invisible to the patterns
+            stop: Stop at the first hit starting at or after this position
+            last_end: Per-pattern end of the previous hit; updated in place so
+                consecutive calls keep findall's non-overlapping semantics
+
+        Yields:
+            (pattern index, keyword, start, end)
+        """
+        pattern_groups = self._pattern_groups
+        if endpos is None:
+            endpos = len(transcript_lower)
+        if last_end is None:
+            last_end = [0] * len(pattern_groups)
+
+        for match in self._regex.finditer(transcript_lower, pos, endpos):
+            position = match.start()
+            if stop is not None and position >= stop:
+                break
+            for index, (_, wrapper_group, keyword_group) in enumerate(pattern_groups):
+                if match.start(wrapper_group) < 0 or position < last_end[index]:
+                    continue
+                # findall resumes after the previous match; an empty match still advances
+                last_end[index] = max(match.end(wrapper_group), position + 1)
+                yield (
+                    index,
+                    match.group(keyword_group),
+                    match.start(keyword_group),
+                    match.end(keyword_group),
+                )
+
+
+_matcher = TriggerMatcher(TRIGGER_PATTERNS, INTERVENTION_RECOMMENDATIONS)
+
+# Below this many transcripts a process pool costs more than it saves
+BATCH_PARALLEL_THRESHOLD = 200
+
+
+def get_trigger_matcher() -> TriggerMatcher:
+    """Return the compiled matcher for the active trigger ruleset"""
+    return _matcher
+
+
+def install_trigger_matcher(matcher: TriggerMatcher) -> None:
+    """
+    Make a compiled matcher the active one (e.g. in a worker process)
+
+    The swap is a single reference assignment: callers that already fetched the
+    previous matcher keep using it, and nothing is recompiled on the request path.
+    """
+    global _matcher
+    _matcher = matcher
+
+
+def get_ruleset_version() -> str:
+    """Return the content hash of the active trigger ruleset"""
+    return _matcher.version
+
+
+def reload_trigger_patterns() -> TriggerMatcher:
+    """Recompile TRIGGER_PATTERNS / INTERVENTION_RECOMMENDATIONS after they change"""
+    global _matcher
+    _matcher = TriggerMatcher(TRIGGER_PATTERNS, INTERVENTION_RECOMMENDATIONS)
+    return _matcher
+
+
+def detect_triggers_in_transcript(
+    transcript: str,
+    turns: Optional[List[List]] = None,
+    speaker: Optional[str] = None
+) -> List[Dict]:
     """
     Analyze a call transcript and detect abandonment triggers
 
     Args:
         transcript: The call transcript text
+        turns: Stored speaker turns of the transcript (parsed on demand if missing)
+        speaker: Only scan this speaker's turns, e.g. "patient"
 
     Returns:
-        List of detected triggers with confidence scores
+        List of detected triggers with confidence scores and match offsets
     """
     if not transcript:
         return []
 
+    matcher = _matcher
     detected_triggers = []
     transcript_lower = transcript.lower()
 
-    for trigger_type, config in TRIGGER_PATTERNS.items():
-        matches = []
-        for pattern in config["keywords"]:
-            found = re.findall(pattern, transcript_lower, re.IGNORECASE)
-            matches.extend(found)
-
-        if matches:
-            # Calculate confidence based on number of matches and pattern complexity
-            confidence = min(0.6 + (len(matches) * 0.1), 0.99)
-
-            # Extract context around first match
-            first_match = matches[0]
-            match_index = transcript_lower.find(first_match)
-            start = max(0, match_index - 50)
-            end = min(len(transcript), match_index + len(first_match) + 50)
-            context = transcript[start:end].strip()
-
-            detected_triggers.append({
-                "trigger_type": trigger_type,
-                "confidence": round(confidence, 2),
-                "severity": config["severity"],
-                "match_count": len(matches),
-                "context": context,
-                "keywords_found": list(set(matches))[:5],  # Top 5 unique matches
-                "recommendation": INTERVENTION_RECOMMENDATIONS.get(trigger_type, {})
-            })
+    spans = None
+    if speaker:
+        # Lowercasing can change the length of a few non-ASCII strings
+        if turns is None or len(transcript_lower) != len(transcript):
+            turns = parse_speaker_turns(transcript_lower)
+        spans = speaker_spans(turns, speaker)
+
+    for trigger_type, hits in matcher.scan(transcript_lower, spans).items():
+        matches = [keyword for keyword, _, _ in hits]
+
+        # Calculate confidence based on number of matches and pattern complexity
+        confidence = min(0.6 + (len(matches) * 0.1), 0.99)
+
+        # Extract context around first occurrence of the first match
+        first_match, first_start, first_end = hits[0]
+        match_index = transcript_lower.find(first_match, 0 if spans is None else first_start, first_end)
+        start = max(0, match_index - 50)
+        end = min(len(transcript), match_index + len(first_match) + 50)
+        context = transcript[start:end].strip()
+
+        detected_triggers.append({
+            "trigger_type": trigger_type,
+            "confidence": round(confidence, 2),
+            "severity": matcher.patterns[trigger_type]["severity"],
+            "match_count": len(matches),
+            "context": context,
+            "keywords_found": list(set(matches))[:5],  # Top 5 unique matches
+            "offsets": sorted([start_idx, end_idx] for _, start_idx, end_idx in hits),
+            "recommendation": matcher.recommendations.get(trigger_type, {})
+        })
 
     # Sort by confidence (highest first)
     detected_triggers.sort(key=lambda x: x["confidence"], reverse=True)
@@ -149,6 +419,70 @@ def detect_triggers_in_transcript(transcript: str) -> List[Dict]:
     return detected_triggers
 
 
+def _init_trigger_worker(patterns: Dict[str, Dict], recommendations: Dict[str, Dict]) -> None:
+    """Compile the parent's ruleset in a worker process so results match its version"""
+    install_trigger_matcher(TriggerMatcher(patterns, recommendations))
+
+
+def _detect_triggers_chunk(transcripts: List[str]) -> List[List[Dict]]:
+    return [detect_triggers_in_transcript(transcript) for transcript in transcripts]
+
+
+def create_trigger_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Create a process pool whose workers use the active trigger ruleset
+
+    Workers are spawned rather than forked so the pool is safe to create from a
+    threaded API process.
+    """
+    matcher = _matcher
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_trigger_worker,
+        initargs=(matcher.patterns, matcher.recommendations),
+    )
+
+
+def detect_triggers_batch(
+    transcripts: Sequence[str],
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> List[List[Dict]]:
+    """
+    Detect triggers in many transcripts across a process pool
+
+    Args:
+        transcripts: Transcripts to analyze
+        max_workers: Worker processes when no executor is given (defaults to CPU count)
+        chunk_size: Transcripts sent to a worker at a time (defaults to ~4 chunks per worker)
+        executor: Existing pool to reuse, e.g. from create_trigger_pool()
+
+    Returns:
+        One trigger list per transcript, in input order
+    """
+    transcripts = list(transcripts)
+    if not transcripts:
+        return []
+
+    workers = max_workers or os.cpu_count() or 1
+    if executor is None and (workers == 1 or len(transcripts) < BATCH_PARALLEL_THRESHOLD):
+        return _detect_triggers_chunk(transcripts)
+
+    if not chunk_size:
+        chunk_size = min(max(1, -(-len(transcripts) // (workers * 4))), 1000)
+    chunks = [transcripts[i:i + chunk_size] for i in range(0, len(transcripts), chunk_size)]
+
+    if executor is not None:
+        chunk_results = executor.map(_detect_triggers_chunk, chunks)
+        return [triggers for chunk in chunk_results for triggers in chunk]
+
+    with create_trigger_pool(workers) as pool:
+        chunk_results = pool.map(_detect_triggers_chunk, chunks)
+        return [triggers for chunk in chunk_results for triggers in chunk]
+
+
 def calculate_abandonment_risk(
     triggers: List[Dict],
     patient_history: Dict = None
@@ -194,6 +528,49 @@ def calculate_abandonment_risk(
     return risk_score, risk_level
 
 
+def calculate_abandonment_risk_batch(
+    high_counts: Sequence[int],
+    medium_counts: Sequence[int],
+    trigger_counts: Sequence[int],
+    sdoh_risk_scores: Optional[Sequence[float]] = None,
+    prior_abandonments: Optional[Sequence[int]] = None,
+    missed_appointments: Optional[Sequence[int]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score many patients at once; identical to calculate_abandonment_risk per row
+
+    Args:
+        high_counts: High severity triggers per patient
+        medium_counts: Medium severity triggers per patient
+        trigger_counts: All triggers per patient (low-only patients still score as triggered)
+        sdoh_risk_scores: Patient SDOH risk scores (0 where unknown)
+        prior_abandonments: Prior abandonments per patient
+        missed_appointments: Missed appointments per patient
+
+    Returns:
+        Tuple of (risk_scores int array, risk_levels str array)
+    """
+    high = np.asarray(high_counts, dtype=np.int64)
+    medium = np.asarray(medium_counts, dtype=np.int64)
+    triggered = np.asarray(trigger_counts, dtype=np.int64) > 0
+
+    risk = np.where(triggered, high * 25 + medium * 15 + 10, 20)
+
+    # History adjustments; missing columns behave like an empty patient history
+    if prior_abandonments is not None:
+        risk = risk + np.where(np.asarray(prior_abandonments) > 0, 20, 0)
+    if missed_appointments is not None:
+        risk = risk + np.where(np.asarray(missed_appointments) > 2, 15, 0)
+    if sdoh_risk_scores is not None:
+        risk = risk + np.where(np.asarray(sdoh_risk_scores) > 70, 10, 0)
+
+    risk_scores = np.minimum(risk, 99)
+    risk_levels = np.where(
+        risk_scores >= 70, "high", np.where(risk_scores >= 40, "medium", "low")
+    )
+    return risk_scores, risk_levels
+
+
 def generate_intervention_plan(triggers: List[Dict]) -> Dict:
     """
     Generate a recommended intervention plan based on detected triggers
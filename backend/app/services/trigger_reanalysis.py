@@ -0,0 +1,163 @@
+"""
+Background re-analysis of stored trigger results after the ruleset changes
+
+Only calls whose stored analysis was produced by a different ruleset version are
+reprocessed. Calls are walked in id-ordered chunks that are committed one at a
+time, so the job can be interrupted and simply started again to resume. Trigger
+detection for each chunk is spread over a process pool using every CPU core.
+"""
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import and_, func, or_
+
+from app.core.database import SessionLocal
+from app.models import Call
+from app.services.trigger_detection import (
+    create_trigger_pool,
+    detect_triggers_batch,
+    get_trigger_matcher,
+)
+from app.services.trigger_rules import refresh_trigger_matcher
+from app.services.trigger_store import replace_call_triggers
+
+_job_lock = threading.Lock()
+_job_thread: Optional[threading.Thread] = None
+_job_progress: Dict = {"status": "idle"}
+
+
+def stale_calls_filter(ruleset_version: str):
+    """SQL filter for calls whose stored analysis is missing or out of date"""
+    return and_(
+        Call.transcript.isnot(None),
+        or_(
+            Call.trigger_ruleset_version.is_(None),
+            Call.trigger_ruleset_version != ruleset_version
+        )
+    )
+
+
+def run_reanalysis(
+    chunk_size: int = 500,
+    max_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[Dict], None]] = None
+) -> Dict:
+    """
+    Re-analyze every call whose stored triggers came from another ruleset version
+
+    Args:
+        chunk_size: Calls fetched, analyzed and committed per chunk
+        max_workers: Worker processes (defaults to the number of CPU cores)
+        progress_callback: Called with a progress dict after every chunk
+
+    Returns:
+        Final progress dict
+    """
+    progress = {
+        "status": "running",
+        "ruleset_version": None,
+        "total_calls": 0,
+        "processed_calls": 0,
+        "started_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+        "error": None,
+    }
+
+    db = SessionLocal()
+    try:
+        # Re-analyze with the active stored ruleset, not whatever this process last loaded
+        refresh_trigger_matcher(db)
+        matcher = get_trigger_matcher()
+        progress["ruleset_version"] = matcher.version
+        stale = stale_calls_filter(matcher.version)
+        progress["total_calls"] = db.query(func.count(Call.id)).filter(stale).scalar() or 0
+        if progress_callback:
+            progress_callback(dict(progress))
+
+        with create_trigger_pool(max_workers) as pool:
+            last_id = None
+            while True:
+                query = db.query(Call.id, Call.transcript).filter(stale)
+                if last_id is not None:
+                    query = query.filter(Call.id > last_id)
+                chunk = query.order_by(Call.id).limit(chunk_size).all()
+                if not chunk:
+                    break
+
+                triggers = detect_triggers_batch(
+                    [transcript for _, transcript in chunk],
+                    executor=pool
+                )
+                replace_call_triggers(
+                    db,
+                    list(zip([call_id for call_id, _ in chunk], triggers)),
+                    matcher.version
+                )
+                db.commit()
+
+                last_id = chunk[-1].id
+                progress["processed_calls"] += len(chunk)
+                if progress_callback:
+                    progress_callback(dict(progress))
+
+        progress["status"] = "completed"
+    except Exception as e:
+        db.rollback()
+        progress["status"] = "failed"
+        progress["error"] = str(e)
+    finally:
+        db.close()
+
+    progress["finished_at"] = datetime.utcnow().isoformat()
+    if progress_callback:
+        progress_callback(dict(progress))
+    return progress
+
+
+def _update_job_progress(progress: Dict) -> None:
+    with _job_lock:
+        _job_progress.clear()
+        _job_progress.update(progress)
+
+
+def get_reanalysis_progress() -> Dict:
+    """Return a snapshot of the background re-analysis job's progress"""
+    with _job_lock:
+        return dict(_job_progress)
+
+
+def start_reanalysis_in_background(
+    chunk_size: int = 500,
+    max_workers: Optional[int] = None
+) -> bool:
+    """
+    Start the re-analysis job on a background thread unless one is already running
+
+    The thread only fetches chunks and writes results; detection happens in worker
+    processes, so request handling in this process is not held up.
+
+    Returns:
+        True if a new job was started
+    """
+    global _job_thread
+
+    with _job_lock:
+        if _job_thread is not None and _job_thread.is_alive():
+            return False
+
+        _job_progress.clear()
+        _job_progress.update({"status": "starting"})
+        _job_thread = threading.Thread(
+            target=run_reanalysis,
+            kwargs={
+                "chunk_size": chunk_size,
+                "max_workers": max_workers,
+                "progress_callback": _update_job_progress,
+            },
+            name="trigger-reanalysis",
+            daemon=True,
+        )
+        _job_thread.start()
+
+    return True
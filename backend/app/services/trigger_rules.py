@@ -0,0 +1,190 @@
+"""
+Database-backed trigger rules with hot reload
+
+The active ruleset lives in the trigger_rulesets table. Each worker polls the
+active row's version (one indexed single-column lookup) on a background thread;
+when it differs from the installed matcher, the new rules are compiled on that
+thread and the finished TriggerMatcher is swapped in with a single reference
+assignment. Requests never compile patterns or take a lock, and in-flight
+requests finish with the matcher they started with, so reloads need no draining.
+When the table has no active row the built-in TRIGGER_PATTERNS are used.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models import TriggerRuleset
+from app.services.trigger_detection import (
+    INTERVENTION_RECOMMENDATIONS,
+    TRIGGER_PATTERNS,
+    TriggerMatcher,
+    compute_ruleset_version,
+    get_trigger_matcher,
+    install_trigger_matcher,
+)
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("high", "medium", "low")
+
+_watcher_lock = threading.Lock()
+_watcher_thread: Optional[threading.Thread] = None
+_watcher_stop = threading.Event()
+
+
+def validate_ruleset(patterns: Dict[str, Dict], recommendations: Dict[str, Dict]) -> TriggerMatcher:
+    """
+    Check a ruleset's shape and compile it
+
+    Raises:
+        ValueError: If a trigger is malformed or a pattern doesn't compile
+
+    Returns:
+        The compiled matcher
+    """
+    if not patterns:
+        raise ValueError("Ruleset has no trigger patterns")
+
+    for trigger_type, config in patterns.items():
+        keywords = config.get("keywords") if isinstance(config, dict) else None
+        if not keywords or not all(isinstance(k, str) and k for k in keywords):
+            raise ValueError(f"Trigger {trigger_type} needs a non-empty list of keyword patterns")
+        if config.get("severity") not in SEVERITIES:
+            raise ValueError(f"Trigger {trigger_type} has invalid severity {config.get('severity')!r}")
+
+    for trigger_type, recommendation in recommendations.items():
+        if trigger_type not in patterns:
+            raise ValueError(f"Recommendation for unknown trigger {trigger_type}")
+        if not isinstance(recommendation, dict) or not recommendation.get("primary"):
+            raise ValueError(f"Recommendation for {trigger_type} needs a primary intervention")
+
+    try:
+        return TriggerMatcher(patterns, recommendations)
+    except Exception as e:
+        raise ValueError(f"Ruleset does not compile: {e}") from e
+
+
+def get_active_ruleset_version(db: Session) -> Optional[str]:
+    """Version of the active stored ruleset, or None to use the built-in rules"""
+    row = db.query(TriggerRuleset.version).filter(TriggerRuleset.is_active.is_(True)).first()
+    return row.version if row else None
+
+
+def save_ruleset(
+    db: Session,
+    patterns: Dict[str, Dict],
+    recommendations: Dict[str, Dict],
+    notes: Optional[str] = None
+) -> TriggerRuleset:
+    """
+    Store a ruleset and make it the active one, then install it in this worker
+
+    Saving rules identical to an earlier ruleset re-activates that row. Other
+    workers pick the change up on their next poll.
+
+    Raises:
+        ValueError: If the ruleset is invalid
+    """
+    matcher = validate_ruleset(patterns, recommendations)
+
+    ruleset = db.query(TriggerRuleset).filter(TriggerRuleset.version == matcher.version).first()
+    if ruleset is None:
+        ruleset = TriggerRuleset(
+            version=matcher.version,
+            patterns=matcher.patterns,
+            recommendations=matcher.recommendations,
+        )
+        db.add(ruleset)
+    if notes is not None:
+        ruleset.notes = notes
+
+    db.query(TriggerRuleset).filter(
+        TriggerRuleset.is_active.is_(True),
+        TriggerRuleset.version != matcher.version
+    ).update({TriggerRuleset.is_active: False}, synchronize_session=False)
+    db.flush()
+    ruleset.is_active = True
+    ruleset.activated_at = datetime.utcnow()
+    db.commit()
+
+    # Compile from the stored copy so every worker sees the same trigger order
+    db.refresh(ruleset)
+    install_trigger_matcher(TriggerMatcher(ruleset.patterns, ruleset.recommendations))
+    return ruleset
+
+
+def refresh_trigger_matcher(db: Session) -> bool:
+    """
+    Install the active stored ruleset if it differs from the running one
+
+    Returns:
+        True if a different matcher was installed
+    """
+    version = get_active_ruleset_version(db)
+
+    if version is None:
+        if get_trigger_matcher().version == compute_ruleset_version(
+            TRIGGER_PATTERNS, INTERVENTION_RECOMMENDATIONS
+        ):
+            return False
+        install_trigger_matcher(TriggerMatcher(TRIGGER_PATTERNS, INTERVENTION_RECOMMENDATIONS))
+        return True
+
+    if version == get_trigger_matcher().version:
+        return False
+
+    ruleset = db.query(TriggerRuleset).filter(TriggerRuleset.version == version).first()
+    if ruleset is None:
+        return False
+
+    matcher = TriggerMatcher(ruleset.patterns, ruleset.recommendations)
+    install_trigger_matcher(matcher)
+    logger.info("Installed trigger ruleset %s", matcher.version)
+    return True
+
+
+def _watch_rules(interval_seconds: float) -> None:
+    while not _watcher_stop.is_set():
+        db = SessionLocal()
+        try:
+            refresh_trigger_matcher(db)
+        except Exception:
+            # Keep serving with the installed matcher; try again next poll
+            logger.exception("Trigger ruleset refresh failed")
+        finally:
+            db.close()
+        _watcher_stop.wait(interval_seconds)
+
+
+def start_rule_watcher(interval_seconds: float) -> bool:
+    """
+    Poll for ruleset changes on a background thread unless already polling
+
+    Returns:
+        True if a new watcher was started
+    """
+    global _watcher_thread
+
+    with _watcher_lock:
+        if _watcher_thread is not None and _watcher_thread.is_alive():
+            return False
+
+        _watcher_stop.clear()
+        _watcher_thread = threading.Thread(
+            target=_watch_rules,
+            args=(interval_seconds,),
+            name="trigger-rule-watcher",
+            daemon=True,
+        )
+        _watcher_thread.start()
+
+    return True
+
+
+def stop_rule_watcher() -> None:
+    """Stop the background watcher after its current poll"""
+    _watcher_stop.set()
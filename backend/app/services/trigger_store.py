@@ -0,0 +1,283 @@
+"""
+Persistence of per-call trigger analysis results
+
+Analytics endpoints aggregate over call_trigger_analyses instead of re-running
+trigger detection on raw transcripts for every request. Every stored analysis
+records the ruleset version that produced it, so stale rows can be found and
+re-analyzed after the rules change. Parsed speaker turns are stored on the call
+the same way so transcripts are never re-parsed. Storing a call's triggers also
+refreshes its patient's materialized risk score. The bulk entry points load
+the active stored ruleset before detecting, so they never stamp calls with the
+built-in rules while a different ruleset is active.
+"""
+from contextlib import ExitStack
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models import Call, CallTriggerAnalysis, Patient
+from app.services.analysis_cache import cached_detect_triggers
+from app.services.patient_risk import refresh_patient_risk, refresh_patient_risk_for_calls
+from app.services.transcript_turns import parse_speaker_turns
+from app.services.trigger_detection import (
+    BATCH_PARALLEL_THRESHOLD,
+    calculate_abandonment_risk_batch,
+    create_trigger_pool,
+    detect_triggers_batch,
+    detect_triggers_in_transcript,
+    get_ruleset_version,
+)
+from app.services.trigger_rules import refresh_trigger_matcher
+
+
+def build_trigger_rows(
+    call_id: UUID,
+    triggers: List[Dict],
+    ruleset_version: str
+) -> List[CallTriggerAnalysis]:
+    """Convert detected triggers (already sorted by confidence) into table rows"""
+    return [
+        CallTriggerAnalysis(
+            call_id=call_id,
+            trigger_type=trigger["trigger_type"],
+            confidence=trigger["confidence"],
+            severity=trigger["severity"],
+            match_count=trigger["match_count"],
+            rank=rank,
+            offsets=trigger.get("offsets", []),
+            ruleset_version=ruleset_version,
+        )
+        for rank, trigger in enumerate(triggers)
+    ]
+
+
+def replace_call_triggers(
+    db: Session,
+    results: List[Tuple[UUID, List[Dict]]],
+    ruleset_version: str
+) -> None:
+    """
+    Replace the stored trigger rows of several calls in one go
+
+    Args:
+        db: Database session (the caller commits)
+        results: (call_id, triggers) pairs
+        ruleset_version: Version of the ruleset the triggers were detected with
+    """
+    if not results:
+        return
+
+    call_ids = [call_id for call_id, _ in results]
+
+    db.query(CallTriggerAnalysis).filter(
+        CallTriggerAnalysis.call_id.in_(call_ids)
+    ).delete(synchronize_session=False)
+
+    for call_id, triggers in results:
+        db.add_all(build_trigger_rows(call_id, triggers, ruleset_version))
+
+    db.query(Call).filter(Call.id.in_(call_ids)).update(
+        {Call.trigger_ruleset_version: ruleset_version},
+        synchronize_session=False
+    )
+
+    refresh_patient_risk_for_calls(db, call_ids)
+
+
+def store_call_triggers(
+    db: Session,
+    call: Call,
+    triggers: Optional[List[Dict]] = None
+) -> List[Dict]:
+    """
+    Analyze a call and replace its stored trigger rows
+
+    Args:
+        db: Database session (the caller commits)
+        call: Call to analyze
+        triggers: Pre-computed triggers for the call's transcript, if available
+
+    Returns:
+        The detected triggers
+    """
+    ruleset_version = get_ruleset_version()
+    if triggers is None:
+        # Memoized: re-submitted or duplicate transcripts skip detection
+        triggers = cached_detect_triggers(call.transcript or "")
+
+    db.query(CallTriggerAnalysis).filter(
+        CallTriggerAnalysis.call_id == call.id
+    ).delete(synchronize_session=False)
+    db.add_all(build_trigger_rows(call.id, triggers, ruleset_version))
+    call.trigger_ruleset_version = ruleset_version
+
+    refresh_patient_risk(db, [call.patient_id])
+
+    return triggers
+
+
+def backfill_call_triggers(db: Session, batch_size: int = 500) -> int:
+    """
+    Analyze every call with a transcript that has never been analyzed
+
+    Calls are walked in id order and committed batch by batch, so an interrupted
+    backfill simply picks up the remaining calls on the next run. Calls analyzed
+    with an older ruleset are handled by the re-analysis job instead.
+
+    Returns:
+        Number of calls analyzed
+    """
+    refresh_trigger_matcher(db)
+    ruleset_version = get_ruleset_version()
+    analyzed = 0
+    last_id = None
+
+    while True:
+        query = db.query(Call.id, Call.transcript).filter(
+            Call.transcript.isnot(None),
+            Call.trigger_ruleset_version.is_(None)
+        )
+        if last_id is not None:
+            query = query.filter(Call.id > last_id)
+        batch = query.order_by(Call.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        replace_call_triggers(
+            db,
+            [(call_id, detect_triggers_in_transcript(transcript)) for call_id, transcript in batch],
+            ruleset_version
+        )
+        db.commit()
+        analyzed += len(batch)
+        last_id = batch[-1].id
+
+    return analyzed
+
+
+def backfill_speaker_turns(db: Session, batch_size: int = 1000) -> int:
+    """
+    Parse and store speaker turns for calls that have a transcript but no turn index
+
+    Returns:
+        Number of calls updated
+    """
+    updated = 0
+    last_id = None
+
+    while True:
+        query = db.query(Call.id, Call.transcript).filter(
+            Call.transcript.isnot(None),
+            Call.speaker_turns.is_(None)
+        )
+        if last_id is not None:
+            query = query.filter(Call.id > last_id)
+        batch = query.order_by(Call.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        db.bulk_update_mappings(Call, [
+            {"id": call_id, "speaker_turns": parse_speaker_turns(transcript)}
+            for call_id, transcript in batch
+        ])
+        db.commit()
+        updated += len(batch)
+        last_id = batch[-1].id
+
+    return updated
+
+
+def analyze_calls_in_batches(
+    db: Session,
+    call_filter,
+    chunk_size: int = 1000,
+    max_workers: Optional[int] = None,
+    persist: bool = True,
+    after_id: Optional[UUID] = None
+) -> Iterator[List[Dict]]:
+    """
+    Analyze every call matching a filter, chunk by chunk, across a process pool
+
+    Args:
+        db: Database session
+        call_filter: SQL filter on Call selecting the calls to analyze
+        chunk_size: Calls fetched and analyzed per chunk
+        max_workers: Worker processes (defaults to the number of CPU cores; 1 analyzes in this process)
+        persist: Replace the stored trigger rows of each chunk and commit it
+        after_id: Only calls with a greater id (resume after a previous page)
+
+    Yields:
+        Per-call analysis summaries for each chunk, in call id order
+    """
+    refresh_trigger_matcher(db)
+    ruleset_version = get_ruleset_version()
+    last_id = after_id
+
+    with ExitStack() as stack:
+        pool = None
+        while True:
+            query = db.query(
+                Call.id,
+                Call.patient_id,
+                Call.call_date,
+                Call.transcript,
+                Patient.sdoh_risk_score
+            ).outerjoin(Patient, Patient.id == Call.patient_id).filter(
+                call_filter,
+                Call.transcript.isnot(None)
+            )
+            if last_id is not None:
+                query = query.filter(Call.id > last_id)
+            chunk = query.order_by(Call.id).limit(chunk_size).all()
+            if not chunk:
+                break
+
+            # Start worker processes only once there is enough work to share
+            if pool is None and max_workers != 1 and len(chunk) >= BATCH_PARALLEL_THRESHOLD:
+                pool = stack.enter_context(create_trigger_pool(max_workers))
+            triggers_list = detect_triggers_batch(
+                [row.transcript for row in chunk],
+                max_workers=max_workers,
+                executor=pool
+            )
+
+            if persist:
+                replace_call_triggers(
+                    db,
+                    [(row.id, triggers) for row, triggers in zip(chunk, triggers_list)],
+                    ruleset_version
+                )
+                db.commit()
+
+            risk_scores, risk_levels = calculate_abandonment_risk_batch(
+                [sum(1 for t in triggers if t["severity"] == "high") for triggers in triggers_list],
+                [sum(1 for t in triggers if t["severity"] == "medium") for triggers in triggers_list],
+                [len(triggers) for triggers in triggers_list],
+                sdoh_risk_scores=[row.sdoh_risk_score or 0 for row in chunk]
+            )
+
+            results = []
+            for row, triggers, risk_score, risk_level in zip(
+                chunk, triggers_list, risk_scores.tolist(), risk_levels.tolist()
+            ):
+                results.append({
+                    "call_id": str(row.id),
+                    "patient_id": str(row.patient_id),
+                    "call_date": row.call_date.isoformat() if row.call_date else None,
+                    "trigger_count": len(triggers),
+                    "triggers": [
+                        {
+                            "trigger_type": trigger["trigger_type"],
+                            "confidence": trigger["confidence"],
+                            "severity": trigger["severity"],
+                            "match_count": trigger["match_count"],
+                        }
+                        for trigger in triggers
+                    ],
+                    "risk_score": risk_score,
+                    "risk_level": risk_level,
+                })
+
+            last_id = chunk[-1].id
+            yield results
@@ -0,0 +1,219 @@
+"""
+Trigger engine benchmark
+
+Times detect_triggers_in_transcript, calculate_abandonment_risk and
+generate_intervention_plan over a deterministic synthetic corpus. No database is
+needed; results are written as JSON so runs can be compared across commits.
+
+Usage (from backend/):
+    python -m benchmarks.trigger_engine [--transcripts 10000] [--turns 8] [--seed 42] [--output results.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from app.services.sample_transcripts import SAMPLE_TRANSCRIPTS
+from app.services.transcript_turns import parse_speaker_turns
+from app.services.trigger_detection import (
+    calculate_abandonment_risk,
+    detect_triggers_in_transcript,
+    generate_intervention_plan,
+    get_ruleset_version,
+)
+
+SPEAKER_PREFIXES = {"agent": "AI", "patient": "Patient"}
+
+# Histories drawn for the risk scorer so every adjustment branch gets exercised
+PATIENT_HISTORIES = [
+    None,
+    {"sdoh_risk_score": 35},
+    {"sdoh_risk_score": 80, "missed_appointments": 3},
+    {"sdoh_risk_score": 55, "prior_abandonments": 1},
+]
+
+
+def _turn_pools() -> Dict[str, List[str]]:
+    """Split the sample transcripts into agent and patient turns"""
+    pools: Dict[str, List[str]] = {"agent": [], "patient": []}
+    for sample in SAMPLE_TRANSCRIPTS:
+        transcript = sample["transcript"]
+        for speaker, start, end in parse_speaker_turns(transcript):
+            if speaker in pools:
+                pools[speaker].append(transcript[start:end].strip())
+    return pools
+
+
+def generate_corpus(size: int, turns: int = 8, seed: int = 42) -> Iterator[str]:
+    """
+    Yield synthetic transcripts recombined from the sample transcripts' turns
+
+    Args:
+        size: Number of transcripts
+        turns: Speaker turns per transcript (controls transcript length)
+        seed: Seed so every run sees the same corpus
+    """
+    rng = random.Random(seed)
+    pools = _turn_pools()
+    speakers = ("agent", "patient")
+
+    for _ in range(size):
+        first = rng.randrange(2)
+        parts = []
+        for turn in range(turns):
+            speaker = speakers[(first + turn) % 2]
+            parts.append(f"{SPEAKER_PREFIXES[speaker]}: {rng.choice(pools[speaker])}")
+        yield " ".join(parts)
+
+
+def _percentile(sorted_values: array, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _summarize(latencies: array, total_seconds: float) -> Dict:
+    """Throughput and latency percentiles (microseconds) for one function"""
+    ordered = array("d", sorted(latencies))
+    count = len(ordered)
+    return {
+        "calls": count,
+        "total_seconds": round(total_seconds, 4),
+        "throughput_per_sec": round(count / total_seconds, 1) if total_seconds else None,
+        "latency_us": {
+            "mean": round(total_seconds / count * 1e6, 2) if count else 0.0,
+            "p50": round(_percentile(ordered, 0.50) * 1e6, 2),
+            "p99": round(_percentile(ordered, 0.99) * 1e6, 2),
+            "max": round(ordered[-1] * 1e6, 2) if count else 0.0,
+        },
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(size: int, turns: int = 8, seed: int = 42) -> Dict:
+    """
+    Run every transcript through detection, risk scoring and plan generation
+
+    Each function is timed per transcript; corpus generation is not timed.
+
+    Returns:
+        JSON-serializable results
+    """
+    history_rng = random.Random(seed + 1)
+    timings = {
+        "detect_triggers_in_transcript": array("d"),
+        "calculate_abandonment_risk": array("d"),
+        "generate_intervention_plan": array("d"),
+    }
+    detect_times = timings["detect_triggers_in_transcript"]
+    risk_times = timings["calculate_abandonment_risk"]
+    plan_times = timings["generate_intervention_plan"]
+
+    total_chars = 0
+    total_triggers = 0
+    clock = time.perf_counter
+
+    for transcript in generate_corpus(size, turns, seed):
+        total_chars += len(transcript)
+        history = history_rng.choice(PATIENT_HISTORIES)
+
+        started = clock()
+        triggers = detect_triggers_in_transcript(transcript)
+        detected = clock()
+        calculate_abandonment_risk(triggers, history)
+        scored = clock()
+        generate_intervention_plan(triggers)
+        planned = clock()
+
+        detect_times.append(detected - started)
+        risk_times.append(scored - detected)
+        plan_times.append(planned - scored)
+        total_triggers += len(triggers)
+
+    totals = {name: sum(latencies) for name, latencies in timings.items()}
+
+    detect_seconds = totals["detect_triggers_in_transcript"]
+    return {
+        "benchmark": "trigger_engine",
+        "run_at": datetime.utcnow().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ruleset_version": get_ruleset_version(),
+        "corpus": {
+            "transcripts": size,
+            "turns_per_transcript": turns,
+            "seed": seed,
+            "total_chars": total_chars,
+            "avg_chars": round(total_chars / size, 1) if size else 0,
+            "avg_triggers": round(total_triggers / size, 3) if size else 0,
+        },
+        "results": {name: _summarize(latencies, totals[name]) for name, latencies in timings.items()},
+        "detect_chars_per_sec": round(total_chars / detect_seconds) if detect_seconds else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the trigger detection engine")
+    parser.add_argument("--transcripts", type=int, default=10000,
+                        help="Corpus size, e.g. 1000 up to 1000000")
+    parser.add_argument("--turns", type=int, default=8, help="Speaker turns per transcript")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.transcripts < 1 or args.turns < 1:
+        parser.error("--transcripts and --turns must be positive")
+
+    results = run_benchmark(args.transcripts, args.turns, args.seed)
+    payload = json.dumps(results, indent=2)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+        detect = results["results"]["detect_triggers_in_transcript"]
+        print(f"✓ {args.transcripts} transcripts, {detect['throughput_per_sec']} detections/sec, "
+              f"p99 {detect['latency_us']['p99']}us, peak RSS {results['peak_rss_mb']} MB "
+              f"-> {args.output}")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Cohort stratification over the per-(stratum, applied) count rows
+"""
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.services import cohort_analysis
+from app.services.cohort_analysis import analyze_cohorts, bootstrap_difference_ci, normalize_cohort_query
+
+
+@pytest.fixture
+def counts(monkeypatch):
+    def install(rows):
+        monkeypatch.setattr(cohort_analysis, "cohort_counts", lambda db, filters, strata: rows)
+    return install
+
+
+def test_one_arm_strata_with_decimal_sums(counts):
+    # (state, applied, size, adherent, follow-up days sum, follow-up count); Postgres sums are Decimal
+    counts([
+        ("CA", True, 3, 2, Decimal("40.5"), 3),
+        ("NY", False, 2, 1, Decimal("10"), 2),
+        ("TX", True, 4, 3, Decimal("20"), 2),
+        ("TX", False, 4, 1, None, 0),
+    ])
+    result = analyze_cohorts(None, {}, ["state"], resamples=200)
+
+    assert result["total_patients"] == 13
+    assert result["adherence_difference"] == round((5 / 7 - 2 / 6) * 100, 1)
+    strata = {stratum["stratum"]["state"]: stratum for stratum in result["strata"]}
+    assert list(strata) == ["CA", "NY", "TX"]
+
+    california = strata["CA"]
+    assert california["size"] == 3
+    assert [cohort["cohort_name"] for cohort in california["cohorts"]] == ["intervention_applied"]
+    assert california["cohorts"][0]["avg_days_to_follow_up"] == 13.5
+    # No comparison is possible with one arm
+    assert california["adherence_difference"] is None
+    assert california["ci_lower"] is None and california["ci_upper"] is None
+
+    assert [cohort["cohort_name"] for cohort in strata["NY"]["cohorts"]] == ["intervention_not_applied"]
+
+    texas = strata["TX"]
+    assert texas["adherence_difference"] == 50.0
+    assert texas["cohorts"][1]["avg_days_to_follow_up"] is None
+    assert texas["ci_lower"] <= 50.0 <= texas["ci_upper"]
+
+
+def test_no_rows(counts):
+    counts([])
+    result = analyze_cohorts(None, {}, [], resamples=100)
+    assert result["total_patients"] == 0
+    assert result["cohorts"] == []
+    assert result["adherence_difference"] is None
+    assert result["strata"] == []
+
+
+def test_bootstrap_is_seeded_and_brackets_the_difference():
+    args = ([50, 0], [40, 0], [60, 10], [24, 5])
+    lower, upper = bootstrap_difference_ci(*args, resamples=500)
+    again = bootstrap_difference_ci(*args, resamples=500)
+    np.testing.assert_array_equal(lower, again[0])
+    assert lower[0] < 40.0 < upper[0]
+    assert np.isnan(lower[1]) and np.isnan(upper[1])
+
+
+def test_normalize_cohort_query():
+    filters, strata = normalize_cohort_query(
+        {"state": [" TX", "CA", "TX", ""], "insurance_type": None},
+        ["journey_stage", "trigger_type"]
+    )
+    assert filters == {"state": ["CA", "TX"]}
+    assert strata == ["trigger_type", "journey_stage"]
+    with pytest.raises(ValueError):
+        normalize_cohort_query({"color": ["red"]}, None)
@@ -0,0 +1,106 @@
+"""
+Coalescing and cancellation behaviour of the LLM gateway
+"""
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app.services.llm_gateway import LLMError, LLMGateway
+
+
+class SlowBackend:
+    name = "test"
+    model = "test"
+
+    def __init__(self, response='{"ok": true}', delay=0.05):
+        self.response = response
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def complete(self, system, prompt):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.response
+
+
+def unique_prompt():
+    # The analysis cache is process-wide; keep tests from serving each other's results
+    return f"prompt {uuid.uuid4()}"
+
+
+def test_cancelled_first_caller_does_not_cancel_coalesced_waiters():
+    async def scenario():
+        backend = SlowBackend()
+        gateway = LLMGateway(backend)
+        prompt = unique_prompt()
+        first = asyncio.create_task(gateway.complete_json("system", prompt))
+        second = asyncio.create_task(gateway.complete_json("system", prompt))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == {"ok": True}
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return backend
+
+    backend = asyncio.run(scenario())
+    assert backend.calls == 1
+    assert backend.cancelled == 0
+
+
+def test_completion_is_cancelled_once_nobody_waits():
+    async def scenario():
+        backend = SlowBackend()
+        gateway = LLMGateway(backend)
+        caller = asyncio.create_task(gateway.complete_json("system", unique_prompt()))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+        return backend, gateway
+
+    backend, gateway = asyncio.run(scenario())
+    assert backend.cancelled == 1
+    assert not gateway._in_flight and not gateway._waiters
+
+
+def test_empty_and_invalid_responses_raise_llm_error():
+    async def scenario(response):
+        return await LLMGateway(SlowBackend(response, delay=0)).complete_json("system", unique_prompt())
+
+    with pytest.raises(LLMError, match="empty response"):
+        asyncio.run(scenario(""))
+    with pytest.raises(LLMError, match="invalid JSON"):
+        asyncio.run(scenario("not json"))
+    assert asyncio.run(scenario(json.dumps({"topics": []}))) == {"topics": []}
+
+
+class FailingChunkBackend(SlowBackend):
+    async def complete(self, system, prompt):
+        if "boom" in prompt:
+            self.calls += 1
+            raise LLMError("chunk failed")
+        return await super().complete(system, prompt)
+
+
+def test_failing_chunk_cancels_the_other_chunks():
+    async def scenario():
+        backend = FailingChunkBackend(delay=1.0)
+        gateway = LLMGateway(backend)
+        marker = uuid.uuid4().hex
+        pages = [f"{marker} page one", f"{marker} page two", f"{marker} boom", f"{marker} page four"]
+        with pytest.raises(LLMError, match="chunk failed"):
+            await asyncio.wait_for(gateway.analyze_website(pages, max_tokens=4), timeout=0.5)
+        await asyncio.sleep(0.01)
+        # Checked before asyncio.run() cancels whatever is still pending
+        return backend.calls, backend.cancelled
+
+    calls, cancelled = asyncio.run(scenario())
+    assert calls > 1
+    assert cancelled == calls - 1
@@ -0,0 +1,64 @@
+"""
+Analytics queries must not break on trigger types named like their own columns
+
+Trigger type names come from user-defined rulesets. The queries are built
+against a session without a database; the one query that runs returns canned
+rows.
+"""
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
+from app.api import marketing
+from app.services.trigger_detection import TRIGGER_PATTERNS, TriggerMatcher
+
+
+def matcher_with_types(*trigger_types):
+    config = TRIGGER_PATTERNS["cost_concern"]
+    return TriggerMatcher({trigger_type: config for trigger_type in trigger_types}, {})
+
+
+def run_with_rows(endpoint, matcher, rows, **params):
+    """Call an endpoint, compiling every executed query and answering with rows"""
+    compiled = []
+
+    def all_(query):
+        compiled.append(str(query.statement.compile(dialect=postgresql.dialect())))
+        return rows
+
+    with mock.patch.object(marketing, "get_trigger_matcher", lambda: matcher), \
+            mock.patch.object(Query, "all", all_):
+        return endpoint(db=Session(), **params), compiled
+
+
+def test_barrier_trends_with_colliding_trigger_types():
+    matcher = matcher_with_types("bucket", "total_calls", "date")
+    day = datetime(2025, 1, 6)
+    result, compiled = run_with_rows(
+        marketing.get_barrier_trends, matcher, [(day, 10, 1, 2, 3)],
+        start_date="2025-01-01", end_date="2025-01-31",
+    )
+    assert compiled
+    assert result["trend_data"] == [
+        {"bucket": 1, "total_calls": 10, "date": day.isoformat()}
+    ]
+
+
+def test_geographic_insights_count_the_four_abandonment_trigger_types():
+    # Other ruleset types, even ones named like the query's columns, don't enter the estimate
+    matcher = matcher_with_types(*marketing.GEOGRAPHIC_TRIGGER_TYPES, "state", "call_count")
+    rows = [("TX", 4, 72.5, 10, 5, 5, 3, 2), ("CA", 2, None, 0, 0, 0, 0, 0)]
+    with mock.patch.object(marketing, "get_ruleset_version", lambda: matcher.version):
+        result, compiled = run_with_rows(
+            marketing.get_geographic_insights, matcher, rows,
+            start_date="2024-02-01", end_date="2024-02-29",
+        )
+
+    assert compiled
+    texas = result["state_breakdown"]["TX"]
+    assert texas["trigger_breakdown"] == dict(zip(marketing.GEOGRAPHIC_TRIGGER_TYPES, [5, 5, 3, 2]))
+    assert texas["estimated_abandonment_rate"] == 30.0
+    assert result["state_breakdown"]["CA"]["estimated_abandonment_rate"] == 0
+    assert [hotspot["state"] for hotspot in result["hotspots"]] == ["TX"]
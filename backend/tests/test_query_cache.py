@@ -0,0 +1,28 @@
+"""
+Cached results must not be shared between callers
+"""
+from app.services.query_cache import QueryCache
+
+
+def test_results_are_copied_in_and_out():
+    cache = QueryCache(ttl_seconds=60)
+    computed = {"rows": [1, 2]}
+
+    first = cache.get_or_compute("key", lambda: computed)
+    first["rows"].append(3)
+    computed["rows"].append(4)
+
+    assert cache.get_or_compute("key", lambda: {"rows": []}) == {"rows": [1, 2]}
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_expired_and_evicted_entries_are_recomputed():
+    cache = QueryCache(ttl_seconds=0, max_entries=1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+    cache = QueryCache(ttl_seconds=60, max_entries=1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
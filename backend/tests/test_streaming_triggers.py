@@ -0,0 +1,53 @@
+"""
+Chunked detection must end up with the same hits as one-shot detection
+"""
+import random
+
+from app.services.streaming_triggers import StreamingTriggerDetector
+from app.services.trigger_detection import detect_triggers_in_transcript
+from benchmarks.trigger_engine import generate_corpus
+
+
+def stream(transcript, chunk_sizes):
+    detector = StreamingTriggerDetector()
+    position = 0
+    for size in chunk_sizes:
+        detector.feed(transcript[position:position + size])
+        position += size
+    detector.feed(transcript[position:])
+    return detector.finish()
+
+
+def summary(triggers):
+    return {t["trigger_type"]: (t["match_count"], t["offsets"], t["severity"]) for t in triggers}
+
+
+def test_streaming_matches_one_shot_detection():
+    rng = random.Random(3)
+    for transcript in generate_corpus(100, turns=6, seed=11):
+        expected = summary(detect_triggers_in_transcript(transcript))
+        # Single characters, short chunks and chunks longer than any keyword
+        for upper in (1, 7, 40, 500):
+            chunk_sizes = []
+            while sum(chunk_sizes) < len(transcript):
+                chunk_sizes.append(rng.randint(1, upper))
+            assert summary(stream(transcript, chunk_sizes)["triggers"]) == expected
+
+
+def test_keyword_split_across_chunks():
+    transcript = "Patient: I really can't afford this medication."
+    result = stream(transcript, [20, 3, 1])
+    triggers = {t["trigger_type"]: t for t in result["triggers"]}
+    assert "cost_concern" in triggers
+    assert triggers["cost_concern"]["offsets"] == [
+        [transcript.index("can't"), transcript.index(" this")]
+    ]
+
+
+def test_updates_report_new_triggers_once():
+    detector = StreamingTriggerDetector()
+    first = detector.feed("Patient: I can't afford the copay. " + " " * 200)
+    second = detector.feed("The copay is just too expensive for me. " + " " * 200)
+    assert [t["trigger_type"] for t in first["new_triggers"]] == ["cost_concern"]
+    assert not second["new_triggers"]
+    assert detector.finish()["trigger_count"] == 1
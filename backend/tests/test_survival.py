@@ -0,0 +1,75 @@
+"""
+Kaplan–Meier and Greenwood checks against a hand-worked example
+
+Six patients: events on days 1, 3, 3 and 5; censored on days 2 and 4.
+
+    day  at risk  events  S(t)
+     1      6       1     5/6
+     2      5       0     5/6
+     3      4       2     5/12
+     4      2       0     5/12
+     5      1       1     0
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pytest
+
+from app.services.survival import evaluate_curve, kaplan_meier, median_survival, survival_curves
+
+DAYS = [1, 2, 3, 4, 5]
+EVENTS = [1, 0, 2, 0, 1]
+SUBJECTS = [1, 1, 2, 1, 1]
+
+
+def log_log_band(survival, greenwood_sum, confidence=0.95):
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    se = math.sqrt(greenwood_sum) / abs(math.log(survival))
+    return survival ** math.exp(z * se), survival ** math.exp(-z * se)
+
+
+def test_kaplan_meier_hand_worked():
+    curve = kaplan_meier(DAYS, EVENTS, SUBJECTS)
+
+    np.testing.assert_allclose(curve["survival"], [5 / 6, 5 / 6, 5 / 12, 5 / 12, 0.0])
+    assert curve["patients"] == 6
+    assert curve["events"] == 4
+
+    # Greenwood: sum of d / (n (n - d)) over event times so far
+    day_1 = 1 / (6 * 5)
+    day_3 = day_1 + 2 / (4 * 2)
+    expected_bands = [
+        log_log_band(5 / 6, day_1),
+        log_log_band(5 / 6, day_1),
+        log_log_band(5 / 12, day_3),
+        log_log_band(5 / 12, day_3),
+    ]
+    np.testing.assert_allclose(curve["lower"][:4], [lower for lower, _ in expected_bands])
+    np.testing.assert_allclose(curve["upper"][:4], [upper for _, upper in expected_bands])
+    # Everyone has had the event: the band collapses onto S = 0
+    assert curve["lower"][4] == curve["upper"][4] == 0.0
+
+
+def test_no_events_gives_certain_survival():
+    curve = kaplan_meier([2, 9], [0, 0], [3, 4])
+    np.testing.assert_array_equal(curve["survival"], [1.0, 1.0])
+    np.testing.assert_array_equal(curve["lower"], [1.0, 1.0])
+    np.testing.assert_array_equal(curve["upper"], [1.0, 1.0])
+
+
+def test_evaluate_curve_and_median():
+    curve = kaplan_meier(DAYS, EVENTS, SUBJECTS)
+    values = evaluate_curve(curve, np.array([0, 1, 2.5, 3, 10]))
+    np.testing.assert_allclose(values["survival"], [1.0, 5 / 6, 5 / 6, 5 / 12, 0.0])
+    assert median_survival(curve) == 3.0
+    assert median_survival(kaplan_meier([4], [0], [5])) is None
+
+
+def test_survival_curves_split_by_cohort():
+    rows = [("a", d, e, s) for d, e, s in zip(DAYS, EVENTS, SUBJECTS)] + [("b", 7, 1, 2)]
+    curves = survival_curves(rows)
+    assert sorted(curves) == ["a", "b"]
+    np.testing.assert_allclose(curves["a"]["survival"], kaplan_meier(DAYS, EVENTS, SUBJECTS)["survival"])
+    assert curves["b"]["survival"][0] == pytest.approx(0.5)
+    assert survival_curves([]) == {}
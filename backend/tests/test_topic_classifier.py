@@ -0,0 +1,54 @@
+"""
+Local topic classifier: plural folding and lexicon false positives
+"""
+import pytest
+
+from app.core.config import settings
+from app.services.topic_classifier import TopicClassifier, _normalize, _tokenize, get_topic_classifier
+
+
+def topic_shares(result):
+    return {topic["name"]: topic["percentage"] for topic in result["topics"] if topic["percentage"]}
+
+
+@pytest.mark.parametrize("word, expected", [
+    ("needles", "needle"),
+    ("results", "result"),
+    ("studies", "study"),
+    ("pharmacies", "pharmacy"),
+    # Short words and non-plural endings stay as they are
+    ("cares", "cares"),
+    ("doses", "doses"),
+    ("status", "status"),
+    ("diagnosis", "diagnosis"),
+    ("access", "access"),
+])
+def test_normalize(word, expected):
+    assert _normalize(word) == expected
+
+
+def test_everyday_care_is_not_cost_support():
+    text = "Our care team will take care of you. Our nurses care about every patient and really cares."
+    result = get_topic_classifier().classify([text])
+    assert "Cost & Insurance Support" not in topic_shares(result)
+    assert result["confidence"] < settings.TOPIC_CLASSIFIER_MIN_CONFIDENCE
+
+
+def test_assistance_program_names_still_count_as_cost_support():
+    text = "Enroll in LillyCares or ask about the Cares Program to lower your copay."
+    shares = topic_shares(get_topic_classifier().classify([text]))
+    assert max(shares, key=shares.get) == "Cost & Insurance Support"
+
+
+def test_plural_content_matches_singular_lexicon_phrases():
+    classifier = TopicClassifier({"injection": ["prefilled syringe"], "efficacy": ["clinical study"]})
+    result = classifier.classify(["Prefilled syringes were used in the clinical studies."])
+    assert result["matched_terms"] == 2
+    assert topic_shares(result) == {"injection": 50.0, "efficacy": 50.0}
+
+
+def test_text_without_lexicon_terms_has_no_confidence():
+    result = get_topic_classifier().classify_many(["", "The weather was lovely today."])
+    assert [r["confidence"] for r in result] == [0.0, 0.0]
+    assert [r["total_words"] for r in result] == [0, 5]
+    assert _tokenize("Don't-stop") == ["don't-stop"]
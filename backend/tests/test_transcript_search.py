@@ -0,0 +1,29 @@
+"""
+Keyset cursors are opaque to clients but must round-trip and reject tampering
+"""
+import pytest
+
+from app.services.transcript_search import decode_cursor, encode_cursor, search_calls
+
+
+def test_cursor_round_trip():
+    values = {"rank": 0.123456789, "id": "6f1c1c9e-9f3e-4d59-9b0e-2a4c5e1f7a10"}
+    assert decode_cursor(encode_cursor(values)) == values
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    encode_cursor({"rank": 0.5}),
+    encode_cursor({"rank": "high", "id": "6f1c1c9e-9f3e-4d59-9b0e-2a4c5e1f7a10"}),
+    encode_cursor({"rank": 0.5, "id": "not-a-uuid"}),
+])
+def test_bad_relevance_cursor_is_rejected(cursor):
+    # Cursor validation happens before any query runs
+    with pytest.raises(ValueError):
+        search_calls(None, "copay", cursor=cursor)
+
+
+def test_bad_date_cursor_is_rejected():
+    cursor = encode_cursor({"date": "yesterday", "id": "6f1c1c9e-9f3e-4d59-9b0e-2a4c5e1f7a10"})
+    with pytest.raises(ValueError):
+        search_calls(None, "copay", sort="date", cursor=cursor)
@@ -0,0 +1,108 @@
+"""
+The single-pass matcher must report exactly what the original per-pattern
+re.findall loop did, and batch risk scoring must agree with the scalar scorer.
+"""
+import itertools
+import re
+
+import pytest
+
+from app.services.trigger_detection import (
+    INTERVENTION_RECOMMENDATIONS,
+    TRIGGER_PATTERNS,
+    TriggerMatcher,
+    calculate_abandonment_risk,
+    calculate_abandonment_risk_batch,
+    detect_triggers_in_transcript,
+)
+from benchmarks.trigger_engine import generate_corpus
+
+EDGE_CASES = [
+    "",
+    "I can't afford it. I cannot afford it. I can not afford it, really can't afford it!",
+    "The COPAY is too high; copays, co-pay, co pay and deductible deductibles.",
+    "Side effects? side-effects, SIDE EFFECT: nausea nausea nausea.",
+    "needle needles needle-phobia injection injections inject",
+    "affordable afford afforded unaffordable",
+]
+
+
+def baseline_matches(transcript):
+    """The detection loop the matcher replaced: one re.findall per pattern"""
+    transcript_lower = transcript.lower()
+    result = {}
+    for trigger_type, config in TRIGGER_PATTERNS.items():
+        matches = []
+        for pattern in config["keywords"]:
+            matches.extend(re.findall(pattern, transcript_lower, re.IGNORECASE))
+        if matches:
+            result[trigger_type] = matches
+    return result
+
+
+def corpus():
+    return list(generate_corpus(300, turns=6, seed=7)) + EDGE_CASES
+
+
+def test_scan_matches_per_pattern_findall():
+    matcher = TriggerMatcher(TRIGGER_PATTERNS, INTERVENTION_RECOMMENDATIONS)
+    for transcript in corpus():
+        hits = matcher.scan(transcript.lower())
+        found = {trigger_type: [keyword for keyword, _, _ in matches] for trigger_type, matches in hits.items()}
+        assert found == baseline_matches(transcript), transcript
+
+
+def test_scan_offsets_point_at_keywords():
+    matcher = TriggerMatcher(TRIGGER_PATTERNS, INTERVENTION_RECOMMENDATIONS)
+    for transcript in corpus():
+        transcript_lower = transcript.lower()
+        for matches in matcher.scan(transcript_lower).values():
+            for keyword, start, end in matches:
+                assert transcript_lower[start:end] == keyword
+
+
+def test_detect_triggers_matches_baseline_counts():
+    for transcript in corpus():
+        expected = baseline_matches(transcript)
+        triggers = detect_triggers_in_transcript(transcript)
+        assert {t["trigger_type"]: t["match_count"] for t in triggers} == {
+            trigger_type: len(matches) for trigger_type, matches in expected.items()
+        }
+        for trigger in triggers:
+            assert set(trigger["keywords_found"]) <= set(expected[trigger["trigger_type"]])
+            assert trigger["confidence"] == round(min(0.6 + trigger["match_count"] * 0.1, 0.99), 2)
+
+
+def test_matcher_rejects_patterns_with_several_groups():
+    patterns = {"cost_concern": {**TRIGGER_PATTERNS["cost_concern"], "keywords": [r"(a)(b)"]}}
+    with pytest.raises(ValueError):
+        TriggerMatcher(patterns, INTERVENTION_RECOMMENDATIONS)
+
+
+@pytest.mark.parametrize("history", [
+    None,
+    {"sdoh_risk_score": 71},
+    {"prior_abandonments": 1, "missed_appointments": 3},
+    {"prior_abandonments": 2, "missed_appointments": 5, "sdoh_risk_score": 90},
+    {"sdoh_risk_score": 70, "missed_appointments": 2},
+])
+def test_batch_risk_matches_scalar(history):
+    combos = list(itertools.product(range(4), range(4), range(3)))
+    expected = []
+    for high, medium, low in combos:
+        triggers = (
+            [{"severity": "high"}] * high + [{"severity": "medium"}] * medium + [{"severity": "low"}] * low
+        )
+        expected.append(calculate_abandonment_risk(triggers, history))
+
+    history = history or {}
+    size = len(combos)
+    scores, levels = calculate_abandonment_risk_batch(
+        [high for high, _, _ in combos],
+        [medium for _, medium, _ in combos],
+        [high + medium + low for high, medium, low in combos],
+        sdoh_risk_scores=[history.get("sdoh_risk_score", 0)] * size,
+        prior_abandonments=[history.get("prior_abandonments", 0)] * size,
+        missed_appointments=[history.get("missed_appointments", 0)] * size,
+    )
+    assert list(zip(scores.tolist(), levels.tolist())) == expected